@@ -0,0 +1,146 @@
+# File: aturan_pindai.py
+# Aturan sertakan/kecualikan untuk penjelajahan pemindaian: glob nama/path, path yang dilewati, ukuran file maksimum,
+# tetap di satu filesystem, lewati file khusus (FIFO, socket, device) & filesystem semu (/proc, /sys, ...).
+# Dikompilasi sekali; folder yang dikecualikan dipangkas sebelum dibuka, sehingga isinya tidak pernah dijelajahi.
+# Disimpan sebagai JSON (FILE_ATURAN) yang dibaca GUI & CLI.
+
+import fnmatch
+import json
+import os
+import re
+from collections import Counter
+
+# --- KONFIGURASI ---
+FILE_ATURAN = "aturan_pindai.json" # File aturan default (dibaca GUI & CLI jika ada, ditulis dari dialog aturan GUI)
+# Jenis filesystem yang isinya bukan file sungguhan (bisa memblok atau tidak pernah selesai dibaca); titik mount-nya dipangkas
+FS_SEMU = frozenset(("proc", "sysfs", "devtmpfs", "devpts", "cgroup", "cgroup2", "debugfs", "tracefs", "securityfs", "pstore",
+                     "bpf", "configfs", "fusectl", "mqueue", "hugetlbfs", "binfmt_misc", "autofs", "efivarfs", "rpc_pipefs", "nsfs"))
+
+def _mount_semu():
+    """Titik mount filesystem semu (Linux, dari /proc/self/mounts); kosong di sistem lain."""
+    hasil = set()
+    try:
+        with open("/proc/self/mounts", encoding="utf-8", errors="surrogateescape") as f:
+            for baris in f:
+                kolom = baris.split()
+                if len(kolom) >= 3 and kolom[2] in FS_SEMU: hasil.add(re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), kolom[1])) # \040 = spasi
+    except OSError: pass
+    return frozenset(hasil)
+
+def _kompilasi(pola):
+    """(cocok_nama, cocok_relatif): satu regex gabungan per jenis pola, None jika tidak ada. Pola dengan '/' ditambatkan ke folder yang dipindai."""
+    bendera = re.IGNORECASE if os.name == "nt" else 0
+    gabung = lambda daftar: re.compile("|".join(fnmatch.translate(p) for p in daftar), bendera).match if daftar else None
+    return gabung([p for p in pola if "/" not in p]), gabung([p.strip("/") for p in pola if "/" in p])
+
+class AturanPindai:
+    """
+    kecuali / sertakan: glob fnmatch. Tanpa '/' dicocokkan ke nama entri ('*.iso', 'node_modules'); dengan '/' ke path
+    relatif terhadap folder yang dipindai, pemisah '/' ('build/*/cache'). kecuali berlaku untuk file & folder (folder
+    yang cocok dipangkas beserta isinya), sertakan hanya untuk file (kosong = semua file).
+    kecuali_path: path file/folder yang dilewati. ukuran_maks: byte, file lebih besar dilewati (None/0 = tanpa batas).
+    satu_filesystem: jangan masuk ke folder di filesystem lain. lewati_khusus: FIFO, socket, device & symlink rusak tidak
+    dibuka. lewati_semu: titik mount FS_SEMU dipangkas. Folder yang dipindai sendiri tidak pernah dikecualikan.
+    """
+    def __init__(self, kecuali=(), sertakan=(), kecuali_path=(), ukuran_maks=None, satu_filesystem=False, lewati_khusus=True, lewati_semu=True):
+        self.kecuali = tuple(kecuali); self.sertakan = tuple(sertakan); self.kecuali_path = tuple(kecuali_path)
+        self.ukuran_maks = ukuran_maks or None; self.satu_filesystem = satu_filesystem; self.lewati_khusus = lewati_khusus; self.lewati_semu = lewati_semu
+        self._kecuali_nama, self._kecuali_relatif = _kompilasi(self.kecuali)
+        self._sertakan_nama, self._sertakan_relatif = _kompilasi(self.sertakan)
+        self._path_file = frozenset(os.path.normcase(os.path.abspath(p)) for p in self.kecuali_path)
+        self._path_folder = self._path_file | (_mount_semu() if lewati_semu else frozenset())
+
+    def konfigurasi(self):
+        """Argumen untuk membuat AturanPindai setara (isi file aturan & argumen proses worker)."""
+        return {"kecuali": list(self.kecuali), "sertakan": list(self.sertakan), "kecuali_path": list(self.kecuali_path), "ukuran_maks": self.ukuran_maks,
+                "satu_filesystem": self.satu_filesystem, "lewati_khusus": self.lewati_khusus, "lewati_semu": self.lewati_semu}
+
+    def uraian(self):
+        bagian = [f"kecuali {', '.join(self.kecuali)}" if self.kecuali else "", f"hanya {', '.join(self.sertakan)}" if self.sertakan else "",
+                  f"{len(self.kecuali_path)} path dilewati" if self.kecuali_path else "", f"maks {self.ukuran_maks / 1048576:g} MB per file" if self.ukuran_maks else "",
+                  "satu filesystem" if self.satu_filesystem else "", "file khusus dilewati" if self.lewati_khusus else "",
+                  f"{len(self._path_folder) - len(self._path_file)} mount semu dipangkas" if self.lewati_semu else ""]
+        return "Aturan: " + ("; ".join(b for b in bagian if b) or "semua file dipindai") + "."
+
+    def penyaring(self, folder_path):
+        return PenyaringPindai(self, folder_path)
+
+class PenyaringPindai:
+    """
+    Evaluasi AturanPindai untuk satu pemindaian folder_path, per DirEntry dari os.scandir (tanpa syscall tambahan kecuali
+    stat file untuk ukuran_maks/byte yang dihemat dan lstat folder untuk satu_filesystem). Hitungan yang dilewati ada di
+    `lewati`: folder_dikecualikan, folder_fs_lain, file_dikecualikan/byte_dikecualikan, file_terlalu_besar/byte_terlalu_besar, file_khusus.
+    """
+    def __init__(self, aturan, folder_path):
+        self.aturan = aturan; self.lewati = Counter()
+        self._potong = len(os.path.join(folder_path, "")) # entry.path[_potong:] = path relatif terhadap folder_path
+        self._abs = os.path.normcase(os.path.join(os.path.abspath(folder_path), ""))
+        try: self._dev = os.stat(folder_path).st_dev if aturan.satu_filesystem else None
+        except OSError: self._dev = None
+
+    def _relatif_dari(self, path):
+        relatif = path[self._potong:]
+        return relatif.replace(os.sep, "/") if os.sep != "/" else relatif
+
+    def _dikecualikan(self, entry, daftar_path):
+        a = self.aturan
+        if daftar_path and self._abs + os.path.normcase(entry.path[self._potong:]) in daftar_path: return True
+        if a._kecuali_nama and a._kecuali_nama(entry.name): return True
+        return bool(a._kecuali_relatif and a._kecuali_relatif(self._relatif_dari(entry.path)))
+
+    def _disertakan(self, entry):
+        a = self.aturan
+        if not a.sertakan: return True
+        return bool(a._sertakan_nama and a._sertakan_nama(entry.name) or a._sertakan_relatif and a._sertakan_relatif(self._relatif_dari(entry.path)))
+
+    def folder(self, entry):
+        """True jika folder (bukan symlink) boleh dimasuki."""
+        if self._dikecualikan(entry, self.aturan._path_folder): self.lewati["folder_dikecualikan"] += 1; return False
+        if self._dev is not None:
+            try:
+                if entry.stat(follow_symlinks=False).st_dev != self._dev: self.lewati["folder_fs_lain"] += 1; return False
+            except OSError: pass # Biarkan scandir yang melaporkan errornya
+        return True
+
+    def file(self, entry):
+        """True jika entri bukan-folder boleh dipindai."""
+        a = self.aturan
+        if a.lewati_khusus:
+            try: biasa = entry.is_file() # d_type dari scandir; symlink diikuti
+            except OSError: biasa = False
+            if not biasa: self.lewati["file_khusus"] += 1; return False
+        if self._dikecualikan(entry, a._path_file) or not self._disertakan(entry):
+            self.lewati["file_dikecualikan"] += 1
+            try: self.lewati["byte_dikecualikan"] += entry.stat().st_size
+            except OSError: pass
+            return False
+        if a.ukuran_maks:
+            try: ukuran = entry.stat().st_size # Di-cache DirEntry, jadi pemindai tidak stat ulang
+            except OSError: return True # Biarkan hashing yang melaporkan errornya
+            if ukuran > a.ukuran_maks: self.lewati["file_terlalu_besar"] += 1; self.lewati["byte_terlalu_besar"] += ukuran; return False
+        return True
+
+def uraian_lewati(n):
+    """Ringkasan hitungan PenyaringPindai.lewati (Counter/dict) untuk EventStatus; None jika tidak ada yang dilewati."""
+    n = Counter(n); mb = lambda b: f"{b / 1048576:.1f} MB"
+    bagian = [f"{n['folder_dikecualikan']} folder dipangkas" if n["folder_dikecualikan"] else "", f"{n['folder_fs_lain']} folder di filesystem lain" if n["folder_fs_lain"] else "",
+              f"{n['file_dikecualikan']} file dikecualikan ({mb(n['byte_dikecualikan'])})" if n["file_dikecualikan"] else "",
+              f"{n['file_terlalu_besar']} file melebihi ukuran maks ({mb(n['byte_terlalu_besar'])})" if n["file_terlalu_besar"] else "",
+              f"{n['file_khusus']} file khusus" if n["file_khusus"] else ""]
+    return "Dilewati aturan: " + ", ".join(b for b in bagian if b) + "." if any(bagian) else None
+
+def baca_aturan(path=FILE_ATURAN):
+    """AturanPindai dari file JSON; aturan default jika file tidak ada. ValueError jika isinya tidak valid."""
+    try:
+        with open(path, encoding="utf-8") as f: data = json.load(f)
+    except FileNotFoundError: return AturanPindai()
+    except (OSError, json.JSONDecodeError) as e: raise ValueError(f"File aturan '{path}' tidak bisa dibaca: {e}") from e
+    if not isinstance(data, dict): raise ValueError(f"File aturan '{path}' harus berisi objek JSON.")
+    try: return AturanPindai(**data)
+    except TypeError as e: raise ValueError(f"File aturan '{path}' tidak valid: {e}") from e
+
+def simpan_aturan(aturan, path=FILE_ATURAN):
+    """Menulis aturan ke file JSON secara atomik (file sementara lalu rename)."""
+    sementara = f"{path}.{os.getpid()}.tmp"
+    with open(sementara, "w", encoding="utf-8") as f: json.dump(aturan.konfigurasi(), f, ensure_ascii=False, indent=2)
+    os.replace(sementara, path)
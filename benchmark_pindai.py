@@ -0,0 +1,258 @@
+# File: benchmark_pindai.py
+# Mengukur throughput pipeline pemindai pada pohon folder sintetis.
+# Contoh: python benchmark_pindai.py --files 20000 --ukuran lognormal:8192,1.5 --signature 10,100000 --output hasil.json
+#         python benchmark_pindai.py ... --bandingkan hasil_lama.json
+
+import argparse
+import json
+import math
+import os
+import platform
+import queue
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import scanner_logic
+from event_pindai import EventDeteksi, EventSelesai, PengirimEvent
+from metrik import MetrikPindai
+from scanner_logic import MAX_SCAN_WORKERS, MESIN_BACA_TERSEDIA, Scanner
+
+BATCH_INSERT = 100_000 # Baris per executemany saat membuat DB signature sintetis
+JUMLAH_LOOKUP = 200_000 # Jumlah panggilan _check_hash per DB
+
+# ======================================================================
+# --- DATA SINTETIS ---
+# ======================================================================
+def buat_pembangkit_ukuran(spesifikasi, rng):
+    """'tetap:N', 'seragam:A,B' atau 'lognormal:MEDIAN,SIGMA' -> fungsi tanpa argumen yang menghasilkan ukuran byte."""
+    jenis, _, nilai = spesifikasi.partition(":")
+    angka = [float(x) for x in nilai.split(",")] if nilai else []
+    if jenis == "tetap": return lambda: int(angka[0])
+    if jenis == "seragam": return lambda: rng.randint(int(angka[0]), int(angka[1]))
+    if jenis == "lognormal":
+        mu = math.log(angka[0]); sigma = angka[1] if len(angka) > 1 else 1.0
+        return lambda: min(int(rng.lognormvariate(mu, sigma)), 1 << 30)
+    raise ValueError(f"Distribusi ukuran tidak dikenal: {spesifikasi}")
+
+def buat_pohon(root, jumlah_file, ukuran, kedalaman, cabang, jumlah_virus, rng):
+    """Membuat jumlah_file file acak tersebar di pohon folder (kedalaman x cabang). Mengembalikan (total byte, [path virus])."""
+    folder = [root]
+    for _ in range(kedalaman):
+        folder = [os.path.join(f, f"d{i}") for f in folder for i in range(cabang)]
+    total_byte = 0; path_virus = []
+    for i in range(jumlah_file):
+        d = folder[i % len(folder)]; os.makedirs(d, exist_ok=True)
+        path = os.path.join(d, f"f{i}.bin"); n = ukuran()
+        with open(path, "wb") as f: f.write(rng.randbytes(n))
+        total_byte += n
+        if len(path_virus) < jumlah_virus and i % max(1, jumlah_file // max(1, jumlah_virus)) == 0: path_virus.append(path)
+    return total_byte, path_virus
+
+def buat_db_signature(db_path, jumlah, signature_virus, ukuran, rng):
+    """Membuat DB berisi `jumlah` signature acak + signature_virus (md5, sha256, ukuran, hash_awal) dari file yang ditanam."""
+    if os.path.exists(db_path): os.remove(db_path)
+    Scanner(db_path) # Skema standar
+    conn = sqlite3.connect(db_path); conn.execute("PRAGMA synchronous = OFF"); conn.execute("PRAGMA journal_mode = MEMORY")
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO signatures (md5, sha256, ukuran, hash_awal) VALUES (?, ?, ?, ?)",
+                         ((bytes.fromhex(m), bytes.fromhex(sha), u, bytes.fromhex(h)) for m, sha, u, h in signature_virus))
+        sisa = max(0, jumlah - len(signature_virus))
+        while sisa > 0:
+            n = min(BATCH_INSERT, sisa); sisa -= n
+            conn.executemany("INSERT OR IGNORE INTO signatures (md5, sha256, ukuran, hash_awal) VALUES (?, ?, ?, ?)",
+                             ((rng.randbytes(16), rng.randbytes(32), ukuran(), rng.randbytes(16)) for _ in range(n)))
+    conn.close()
+
+# ======================================================================
+# --- PENGUKURAN ---
+# ======================================================================
+def persentil(nilai, p):
+    if not nilai: return None
+    urut = sorted(nilai); return urut[min(len(urut) - 1, int(p * (len(urut) - 1) + 0.5))]
+
+def ringkas_latensi(latensi_ns):
+    return {"p50_us": round(persentil(latensi_ns, 0.50) / 1000, 2), "p99_us": round(persentil(latensi_ns, 0.99) / 1000, 2)} if latensi_ns else {}
+
+def ukur_hitung_hashes(scanner, daftar_file, mesin=None):
+    latensi = []; total_byte = 0; mulai = time.perf_counter()
+    for path, ukuran in daftar_file:
+        t0 = time.perf_counter_ns(); scanner._hitung_hashes(path, mesin); latensi.append(time.perf_counter_ns() - t0); total_byte += ukuran
+    detik = time.perf_counter() - mulai
+    return {"file": len(daftar_file), "detik": round(detik, 4), "file_per_detik": round(len(daftar_file) / detik, 1),
+            "mb_per_detik": round(total_byte / 1048576 / detik, 2), **ringkas_latensi(latensi)}
+
+def ukur_check_hash(scanner, hash_cocok, rng):
+    conn = scanner._create_connection(); scanner.invalidasi_indeks()
+    if os.path.exists(scanner._path_indeks()): os.remove(scanner._path_indeks())
+    t0 = time.perf_counter(); scanner._muat_indeks(conn); waktu_bangun = time.perf_counter() - t0 # Membangun file indeks dari DB
+    scanner.invalidasi_indeks()
+    t0 = time.perf_counter(); scanner._muat_indeks(conn); waktu_muat = time.perf_counter() - t0 # Memetakan file indeks yang sudah ada
+    kueri = [hash_cocok[i % len(hash_cocok)] if hash_cocok and i % 100 == 0 else (rng.randbytes(16).hex(), rng.randbytes(32).hex()) for i in range(JUMLAH_LOOKUP)]
+    latensi = []; mulai = time.perf_counter()
+    for hash_md5, hash_sha256 in kueri:
+        t0 = time.perf_counter_ns(); scanner._check_hash(conn, hash_md5, hash_sha256); latensi.append(time.perf_counter_ns() - t0)
+    detik = time.perf_counter() - mulai; conn.close()
+    return {"lookup": len(kueri), "detik_bangun_indeks": round(waktu_bangun, 4), "detik_muat_indeks": round(waktu_muat, 4), "lookup_per_detik": round(len(kueri) / detik, 1), **ringkas_latensi(latensi)}
+
+def ukur_jelajah(scanner, root):
+    antrian = queue.Queue(); berhenti = threading.Event(); mulai = time.perf_counter()
+    scanner._jelajahi_folder(root, antrian, PengirimEvent(queue.Queue()), berhenti)
+    detik = time.perf_counter() - mulai; jumlah = 0
+    while (item := antrian.get()) is not None:
+        if isinstance(item, tuple): jumlah += len(item[1]) # Folder yang gagal dibuka datang sebagai EventError
+    return {"file": jumlah, "detik": round(detik, 4), "file_per_detik": round(jumlah / detik, 1)}
+
+def ukur_pasang_pantau(scanner, root, backend):
+    """Waktu memasang watch mode pantau pada seluruh pohon (inotify: satu watch per folder)."""
+    if not sys.platform.startswith("linux"): return {}
+    from pantau import Pemantau
+    pemantau = Pemantau(scanner, [root], queue.Queue(), threading.Event(), backend)
+    try: jumlah_watch, detik = pemantau.pasang()
+    except OSError as e: return {"error": str(e)}
+    finally:
+        if pemantau.sumber: pemantau.sumber.tutup()
+    return {"backend": pemantau.sumber.nama, "watch": jumlah_watch, "detik": round(detik, 4), "watch_per_detik": round(jumlah_watch / detik, 1) if detik else None}
+
+def ukur_daemon(scanner, daftar_file, kerja, jumlah=500):
+    """Latensi satu permintaan pindai satu file lewat daemon (klien & koneksi dipakai ulang) dan termasuk membuka koneksi."""
+    if not hasattr(socket, "AF_UNIX"): return {}
+    import asyncio
+    from daemon_pindai import DaemonPindai, KlienDaemon
+    path_socket = os.path.join(kerja, "daemon.sock"); daemon = DaemonPindai(scanner, path_socket)
+    thread = threading.Thread(target=asyncio.run, args=(daemon.jalankan(),), daemon=True); thread.start()
+    async def ukur():
+        while not os.path.exists(path_socket): await asyncio.sleep(0.01)
+        hangat = []; dengan_koneksi = []
+        async with KlienDaemon(path_socket) as klien:
+            for path, _ in daftar_file[:jumlah]:
+                t0 = time.perf_counter_ns(); [e async for e in klien.pindai([path])]; hangat.append(time.perf_counter_ns() - t0)
+        for path, _ in daftar_file[:jumlah // 5]:
+            t0 = time.perf_counter_ns()
+            async with KlienDaemon(path_socket) as klien: [e async for e in klien.pindai([path])]
+            dengan_koneksi.append(time.perf_counter_ns() - t0)
+        return {"permintaan": len(hangat), "koneksi_dipakai_ulang": ringkas_latensi(hangat), "dengan_buka_koneksi": ringkas_latensi(dengan_koneksi)}
+    try: return asyncio.run(ukur())
+    finally:
+        daemon.hentikan(); thread.join(5)
+
+def ukur_pindai_folder(scanner, root, total_byte, jumlah_worker, paksa, metrik=None):
+    antrian = queue.Queue(); mulai = time.perf_counter()
+    scanner.pindai_folder(root, antrian, threading.Event(), jumlah_worker=jumlah_worker, paksa_pindai_ulang=paksa, metrik=metrik)
+    detik = time.perf_counter() - mulai; selesai = None; terdeteksi = 0
+    while not antrian.empty():
+        event = antrian.get_nowait()
+        if isinstance(event, EventDeteksi): terdeteksi += 1
+        elif isinstance(event, EventSelesai): selesai = event
+    dipindai = selesai.dipindai if selesai else 0
+    return {"worker": jumlah_worker, "cache": not paksa, "file": dipindai, "terdeteksi": terdeteksi, "detik": round(detik, 4),
+            "file_per_detik": round(dipindai / detik, 1), "mb_per_detik": round(total_byte / 1048576 / detik, 2),
+            "statistik": dict(scanner.statistik_terakhir)}
+
+def ukur_overhead_metrik(scanner, root, total_byte, jumlah_worker, ulangan=5):
+    """Waktu terbaik pindai_folder (paksa) tanpa vs dengan MetrikPindai, diselang-seling agar kondisi cache setara."""
+    tanpa = []; dengan = []; snapshot = {}
+    for _ in range(ulangan):
+        tanpa.append(ukur_pindai_folder(scanner, root, total_byte, jumlah_worker, paksa=True)["detik"])
+        metrik = MetrikPindai(); dengan.append(ukur_pindai_folder(scanner, root, total_byte, jumlah_worker, paksa=True, metrik=metrik)["detik"]); snapshot = metrik.snapshot()
+    scanner.metrik = None
+    return {"worker": jumlah_worker, "detik_tanpa": min(tanpa), "detik_dengan": min(dengan), "overhead_persen": round((min(dengan) / min(tanpa) - 1) * 100, 2), "snapshot": snapshot}
+
+# ======================================================================
+# --- LAPORAN ---
+# ======================================================================
+def info_lingkungan():
+    try: commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError: commit = None
+    return {"commit": commit, "waktu": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "platform": platform.platform(), "cpu": os.cpu_count()}
+
+def bandingkan(lama, baru, jalur=""):
+    """Mencetak rasio baru/lama untuk setiap metrik *_per_detik yang ada di kedua hasil."""
+    if isinstance(baru, dict):
+        for k, v in baru.items():
+            if isinstance(lama, dict) and k in lama: bandingkan(lama[k], v, f"{jalur}.{k}" if jalur else k)
+    elif isinstance(baru, list) and isinstance(lama, list):
+        for i, (a, b) in enumerate(zip(lama, baru)): bandingkan(a, b, f"{jalur}[{i}]")
+    elif jalur.endswith("_per_detik") and isinstance(lama, (int, float)) and lama:
+        print(f"{jalur:60s} {lama:>14.1f} -> {baru:>14.1f}  ({baru / lama:.2f}x)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline pemindai (hash, cek signature, jelajah, pasang watch, pindai_folder).")
+    parser.add_argument("--files", type=int, default=5000, help="jumlah file sintetis")
+    parser.add_argument("--ukuran", default="lognormal:8192,1.5", help="distribusi ukuran file: tetap:N | seragam:A,B | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--kedalaman", type=int, default=3, help="kedalaman pohon folder")
+    parser.add_argument("--cabang", type=int, default=4, help="jumlah subfolder per folder")
+    parser.add_argument("--virus", type=int, default=10, help="jumlah file yang ditanam sebagai virus")
+    parser.add_argument("--signature", default="10,10000,1000000", help="daftar ukuran DB signature, dipisah koma (10 s/d 10000000)")
+    parser.add_argument("--workers", default=f"1,{MAX_SCAN_WORKERS}", help="daftar jumlah worker untuk pindai_folder")
+    parser.add_argument("--file-besar", type=int, default=256, help="ukuran (MiB) satu file besar untuk membandingkan mesin baca, 0 = lewati")
+    parser.add_argument("--dir", default=None, help="folder kerja (default: folder sementara yang dihapus setelah selesai)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="simpan hasil sebagai JSON ke file ini")
+    parser.add_argument("--bandingkan", default=None, help="file JSON hasil sebelumnya untuk dibandingkan")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed); ukuran = buat_pembangkit_ukuran(args.ukuran, rng)
+    kerja = args.dir or tempfile.mkdtemp(prefix="bench_kss_"); root = os.path.join(kerja, "pohon")
+    hasil = {"lingkungan": info_lingkungan(), "parameter": vars(args), "db": []}
+    try:
+        print(f"Membuat {args.files} file di {root}...", file=sys.stderr)
+        if os.path.exists(root): shutil.rmtree(root)
+        total_byte, path_virus = buat_pohon(root, args.files, ukuran, args.kedalaman, args.cabang, args.virus, rng)
+        hasil["pohon"] = {"file": args.files, "byte": total_byte}
+        scanner_awal = Scanner(os.path.join(kerja, "kosong.db"))
+        signature_virus = [(*scanner_awal._hitung_hashes(p), os.path.getsize(p), scanner_awal._hitung_hash_awal(p)) for p in path_virus]
+        daftar_file = [(p, os.path.getsize(p)) for d, _, files in os.walk(root) for p in (os.path.join(d, f) for f in files)]
+
+        print("Mengukur _hitung_hashes & penjelajahan...", file=sys.stderr)
+        hasil["hitung_hashes"] = ukur_hitung_hashes(scanner_awal, daftar_file)
+        fadvise_asli = scanner_logic.FADVISE_DONTNEED
+        # Perbandingan mesin baca dengan page cache hangat, agar yang diukur biaya baca+hash, bukan disk
+        scanner_logic.FADVISE_DONTNEED = False; ukur_hitung_hashes(scanner_awal, daftar_file)
+        hasil["mesin_baca"] = {mesin: ukur_hitung_hashes(scanner_awal, daftar_file, mesin) for mesin in MESIN_BACA_TERSEDIA}
+        if args.file_besar:
+            path_besar = os.path.join(kerja, "besar.bin"); ukuran_besar = args.file_besar << 20
+            with open(path_besar, "wb") as f:
+                for _ in range(args.file_besar): f.write(os.urandom(1 << 20))
+            hasil["mesin_baca_file_besar"] = {mesin: ukur_hitung_hashes(scanner_awal, [(path_besar, ukuran_besar)] * 3, mesin) for mesin in MESIN_BACA_TERSEDIA}
+            os.remove(path_besar)
+        scanner_logic.FADVISE_DONTNEED = fadvise_asli
+        hasil["jelajah"] = ukur_jelajah(scanner_awal, root)
+        hasil["pasang_pantau"] = [ukur_pasang_pantau(scanner_awal, root, backend) for backend in ("inotify", "fanotify")]
+        for jumlah in (int(x) for x in args.signature.split(",")):
+            db_path = os.path.join(kerja, f"sig_{jumlah}.db")
+            print(f"Membuat DB {jumlah} signature...", file=sys.stderr); t0 = time.perf_counter()
+            buat_db_signature(db_path, jumlah, signature_virus, ukuran, rng)
+            scanner = Scanner(db_path)
+            entri = {"signature": jumlah, "detik_buat_db": round(time.perf_counter() - t0, 2), "ukuran_db_mb": round(os.path.getsize(db_path) / 1048576, 2),
+                     "check_hash": ukur_check_hash(scanner, [v[:2] for v in signature_virus], rng), "pindai_folder": []}
+            entri["ukuran_indeks_mb"] = round(os.path.getsize(scanner._path_indeks()) / 1048576, 2)
+            for jumlah_worker in (int(x) for x in args.workers.split(",")):
+                entri["pindai_folder"].append(ukur_pindai_folder(scanner, root, total_byte, jumlah_worker, paksa=True))
+            entri["pindai_folder"].append(ukur_pindai_folder(scanner, root, total_byte, jumlah_worker, paksa=False)) # Dengan scan_cache hangat
+            entri["overhead_metrik"] = ukur_overhead_metrik(scanner, root, total_byte, jumlah_worker)
+            entri["daemon"] = ukur_daemon(scanner, daftar_file, kerja)
+            hasil["db"].append(entri)
+    finally:
+        if not args.dir: shutil.rmtree(kerja, ignore_errors=True)
+
+    teks = json.dumps(hasil, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: f.write(teks + "\n")
+        print(f"Hasil disimpan ke {args.output}", file=sys.stderr)
+    else: print(teks)
+    if args.bandingkan:
+        with open(args.bandingkan, encoding="utf-8") as f: lama = json.load(f)
+        print(f"\nPerbandingan {lama['lingkungan'].get('commit')} -> {hasil['lingkungan'].get('commit')}:")
+        bandingkan(lama, hasil)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
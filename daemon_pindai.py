@@ -0,0 +1,294 @@
+# File: daemon_pindai.py
+# Daemon pemindai berumur panjang: indeks signature & scan_cache tetap hangat di memori, permintaan pindai dilayani
+# lewat Unix socket lokal (asyncio). Semua permintaan (dari banyak klien sekaligus) berbagi satu pool worker.
+# Protokol JSON Lines. Permintaan: {"id": 1, "perintah": "pindai", "path": ["/abs/file", ...], "paksa": false}
+# (juga "ping" & "statistik"); balasan: {"id": 1, "event": "deteksi", ...} dalam format ke_dict event_pindai,
+# selalu ditutup satu event akhir (selesai/fatal/dibatalkan). KlienDaemon: API async yang mengalirkan event balasan.
+
+import asyncio
+import json
+import os
+import signal
+import stat
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from event_pindai import EVENT_AKHIR, EventDeteksi, EventError, EventFatal, EventSelesai, EventStatistik, dari_dict, ke_dict
+from scanner_logic import LEWATI_HASH_AWAL, MAX_SCAN_WORKERS
+
+# --- KONFIGURASI ---
+SOCKET_DAEMON = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or "/tmp", f"kss_pindai-{os.getuid() if hasattr(os, 'getuid') else 0}.sock")
+MAKS_CACHE_MEMORI = 200_000 # Entri scan_cache (per inode) yang disimpan di memori daemon, yang paling lama tidak dipakai dibuang
+INTERVAL_TULIS_CACHE = 1.0 # Detik antar penulisan batch hasil hash baru ke tabel scan_cache
+INTERVAL_CEK_SIGNATURE = 2.0 # Detik antar pengecekan revisi tabel signatures; indeks ditambal dari riwayat delta atau dimuat ulang jika DB diubah proses lain
+MAKS_INFLIGHT_PERMINTAAN = 64 # File per permintaan yang diperiksa bersamaan (permintaan besar tidak memonopoli pool)
+MAKS_BARIS_PROTOKOL = 1 << 20 # Panjang maksimum satu baris JSON (byte)
+
+def _baca_folder(root):
+    """(file, subfolder, error) satu folder; symlink ke folder tidak diikuti (sama seperti pindai_folder)."""
+    files = []; subdirs = []
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                try: is_dir = entry.is_dir()
+                except OSError: is_dir = False
+                if not is_dir: files.append(entry.path)
+                elif not entry.is_symlink(): subdirs.append(entry.path)
+    except OSError as e: return files, subdirs, EventError("PINDAI", root, "Izin ditolak untuk folder" if isinstance(e, PermissionError) else f"Gagal akses folder - {e}")
+    return files, subdirs, None
+
+class DaemonPindai:
+    """
+    Server pindai satu proses. scan_cache dilapis LRU di memori (dev, ino) -> (metadata, hash): hit tidak menyentuh
+    SQLite; hasil hash baru & stempel 'terakhir_dilihat' ditulis ke tabel per batch setiap INTERVAL_TULIS_CACHE.
+    Koneksi SQLite satu per thread worker, dibuka sekali lalu dipakai ulang selama daemon hidup.
+    """
+    def __init__(self, scanner, path_socket=SOCKET_DAEMON, jumlah_worker=None, laporan=None):
+        self.scanner = scanner; self.path_socket = path_socket; self.jumlah_worker = max(1, jumlah_worker or MAX_SCAN_WORKERS)
+        self.laporan = laporan or (lambda pesan: None); self.executor = None; self._loop = self._berhenti = None
+        self._lokal = threading.local(); self._kunci = threading.Lock(); self.statistik = Counter()
+        self._cache = OrderedDict(); self._cache_simpan = {}; self._cache_sentuh = {}
+
+    # --- DI THREAD WORKER ---
+
+    def _koneksi(self):
+        conn = getattr(self._lokal, "conn", None)
+        if conn is None: conn = self._lokal.conn = self.scanner._create_connection()
+        return conn
+
+    def _catat(self, nama, n=1):
+        with self._kunci: self.statistik[nama] += n
+
+    def _panaskan(self):
+        """Memuat indeks signature & entri scan_cache terbaru ke memori sebelum socket dibuka."""
+        mulai = time.perf_counter(); conn = self._koneksi()
+        indeks = self.scanner._muat_indeks(conn)
+        rows = conn.execute("SELECT dev, ino, ukuran, mtime_ns, ctime_ns, md5, sha256 FROM scan_cache ORDER BY terakhir_dilihat DESC LIMIT ?", (MAKS_CACHE_MEMORI,)).fetchall()
+        with self._kunci:
+            for dev, ino, ukuran, mtime_ns, ctime_ns, md5, sha256 in reversed(rows): self._cache[(dev, ino)] = ((ukuran, mtime_ns, ctime_ns), (md5, sha256)) # Terbaru di ujung LRU
+        return (len(indeks) if indeks is not None else None), len(rows), time.perf_counter() - mulai
+
+    def _cari_cache(self, conn, st, kunci, meta):
+        with self._kunci:
+            entri = self._cache.get(kunci)
+            if entri is not None:
+                if entri[0] != meta: del self._cache[kunci]; return None # File berubah: entri DB untuk inode ini juga usang
+                self._cache.move_to_end(kunci); self._cache_sentuh[kunci] = time.time_ns(); return entri[1]
+        hasil = self.scanner._cari_cache(conn, st) # Belum pernah dilihat daemon: mungkin sudah di-hash pemindaian GUI/CLI
+        if hasil:
+            with self._kunci: self._simpan_memori(kunci, meta, tuple(hasil)); self._cache_sentuh[kunci] = time.time_ns()
+        return hasil
+
+    def _simpan_memori(self, kunci, meta, hasil):
+        self._cache[kunci] = (meta, hasil); self._cache.move_to_end(kunci)
+        while len(self._cache) > MAKS_CACHE_MEMORI: self._cache.popitem(last=False)
+
+    def _simpan_cache(self, kunci, meta, hasil):
+        with self._kunci:
+            self._simpan_memori(kunci, meta, hasil); self._cache_sentuh.pop(kunci, None)
+            self._cache_simpan[kunci] = (*kunci, *meta, *hasil, time.time_ns())
+
+    def _tulis_cache_tertunda(self):
+        with self._kunci:
+            simpan = list(self._cache_simpan.values()); sentuh = [(waktu, *kunci) for kunci, waktu in self._cache_sentuh.items()]
+            self._cache_simpan.clear(); self._cache_sentuh.clear()
+        if simpan or sentuh: self.scanner._tulis_cache(self._koneksi(), simpan, sentuh)
+
+    def _cek_signature(self):
+        """Menyusulkan indeks jika tabel signatures diubah proses lain (GUI, impor/delta CLI) sejak dimuat.
+        Mengembalikan None, "ditambal" (dari riwayat delta, di tempat) atau "dimuat ulang". Indeks yang gagal dimuat dicoba lagi di sini."""
+        if self.scanner._indeks is None: return "dimuat ulang" if self.scanner._muat_indeks(self._koneksi()) is not None else None
+        return self.scanner.sinkronkan_indeks(self._koneksi())
+
+    def _periksa(self, path, paksa=False):
+        """Tahapan yang sama dengan pindai_folder (ukuran -> cache -> blok awal -> hash penuh) untuk satu file.
+        Mengembalikan EventDeteksi/EventError, atau None jika bersih."""
+        try:
+            scanner = self.scanner; conn = self._koneksi(); indeks = scanner._indeks # Gagal dimuat: dicoba lagi oleh _cek_signature, bukan per file
+            try: st = os.stat(path)
+            except OSError as e: return EventError("HASH", path, "File tidak ditemukan" if isinstance(e, FileNotFoundError) else str(e))
+            if not stat.S_ISREG(st.st_mode): return EventError("HASH", path, "Bukan file biasa")
+            if indeks and not indeks.lolos_ukuran(st.st_size): self._catat("file_lewati_prefilter"); return None
+            kunci = (st.st_dev, st.st_ino); meta = (st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+            hasil = None if paksa else self._cari_cache(conn, st, kunci, meta)
+            if hasil: self._catat("file_dari_cache")
+            else:
+                hasil = scanner._hitung_bertahap(path, st.st_size, indeks) if indeks and indeks.perlu_hash_awal(st.st_size) else scanner._hitung_hashes(path)
+                if hasil is LEWATI_HASH_AWAL: self._catat("file_lewati_prefilter"); return None
+                if hasil[1] is None: return EventError("HASH", path, hasil[0])
+                self._catat("file_di_hash"); self._simpan_cache(kunci, meta, tuple(hasil))
+            if scanner._check_hash(conn, *hasil): self._catat("terinfeksi"); return EventDeteksi(path, hasil[1])
+            return None
+        except Exception as e: return EventError("HASH", path, f"Gagal memeriksa file - {e}")
+
+    # --- DI EVENT LOOP ---
+
+    async def _jelajahi(self, daftar_path, id_permintaan, kirim):
+        """Menghasilkan path file; folder dijelajahi di pool worker agar event loop tidak terblok."""
+        loop = asyncio.get_running_loop(); stack = []
+        for path in daftar_path:
+            if not isinstance(path, str) or not os.path.isabs(path): await kirim(id_permintaan, EventError("PINDAI", str(path), "Path harus absolut (cwd daemon berbeda dengan klien)")); continue
+            if os.path.isdir(path): stack.append(path)
+            else: yield path
+        while stack:
+            files, subdirs, error = await loop.run_in_executor(self.executor, _baca_folder, stack.pop())
+            if error: await kirim(id_permintaan, error)
+            stack.extend(reversed(subdirs))
+            for path in files: yield path
+
+    async def _pindai(self, id_permintaan, daftar_path, paksa, kirim):
+        loop = asyncio.get_running_loop(); berjalan = set(); hitungan = Counter()
+        async def kumpulkan(selesai):
+            for future in selesai:
+                event = future.result(); hitungan["dipindai"] += 1
+                if isinstance(event, EventDeteksi): hitungan["terinfeksi"] += 1
+                if event: await kirim(id_permintaan, event)
+        async for path in self._jelajahi(daftar_path, id_permintaan, kirim):
+            if len(berjalan) >= MAKS_INFLIGHT_PERMINTAAN:
+                selesai, berjalan = await asyncio.wait(berjalan, return_when=asyncio.FIRST_COMPLETED); await kumpulkan(selesai)
+            berjalan.add(loop.run_in_executor(self.executor, self._periksa, path, paksa))
+        if berjalan: await kumpulkan((await asyncio.wait(berjalan))[0])
+        self._catat("file_diperiksa", hitungan["dipindai"])
+        await kirim(id_permintaan, EventSelesai(hitungan["dipindai"], hitungan["terinfeksi"]))
+
+    async def _jalankan_permintaan(self, permintaan, kirim):
+        id_permintaan = permintaan.get("id"); perintah = permintaan.get("perintah"); self._catat("permintaan")
+        try:
+            if perintah == "pindai": await self._pindai(id_permintaan, permintaan.get("path") or [], bool(permintaan.get("paksa")), kirim)
+            elif perintah == "ping": await kirim(id_permintaan, EventSelesai(0, 0, "pong"))
+            elif perintah == "statistik":
+                await kirim(id_permintaan, EventStatistik(self.snapshot())); await kirim(id_permintaan, EventSelesai(0, 0))
+            else: await kirim(id_permintaan, EventFatal(f"Perintah tidak dikenal: {perintah}"))
+        except ConnectionError: pass # Klien sudah pergi
+        except Exception as e: await kirim(id_permintaan, EventFatal(f"Gagal memproses permintaan: {e}"))
+
+    async def _layani_klien(self, reader, writer):
+        """Satu koneksi klien; permintaan di dalamnya berjalan bersamaan dan balasannya dibedakan dengan id."""
+        kunci_tulis = asyncio.Lock(); tugas = set()
+        async def kirim(id_permintaan, event):
+            writer.write((json.dumps({"id": id_permintaan, **ke_dict(event)}, ensure_ascii=False) + "\n").encode())
+            async with kunci_tulis: await writer.drain() # Klien lambat -> permintaan ini menunggu (backpressure)
+        try:
+            while baris := await reader.readline():
+                try:
+                    permintaan = json.loads(baris)
+                    if not isinstance(permintaan, dict): raise ValueError(baris)
+                except ValueError: await kirim(None, EventFatal("Permintaan bukan objek JSON yang valid.")); continue
+                t = asyncio.create_task(self._jalankan_permintaan(permintaan, kirim)); tugas.add(t); t.add_done_callback(tugas.discard)
+            if tugas: await asyncio.wait(tugas) # Klien menutup sisi tulisnya (EOF): balasan yang tersisa tetap dikirim
+        except (ConnectionError, ValueError): pass # ValueError: baris melebihi MAKS_BARIS_PROTOKOL
+        finally:
+            for t in tugas: t.cancel()
+            writer.close()
+
+    async def _tugas_latar(self):
+        loop = asyncio.get_running_loop(); waktu_cek = time.monotonic()
+        while True:
+            await asyncio.sleep(INTERVAL_TULIS_CACHE)
+            try:
+                await loop.run_in_executor(self.executor, self._tulis_cache_tertunda)
+                if time.monotonic() - waktu_cek >= INTERVAL_CEK_SIGNATURE:
+                    waktu_cek = time.monotonic()
+                    if cara := await loop.run_in_executor(self.executor, self._cek_signature): self.laporan(f"Tabel signatures berubah, indeks {cara}.")
+            except Exception as e: self.laporan(f"Tugas latar daemon gagal: {e}")
+
+    def snapshot(self):
+        with self._kunci: return dict(self.statistik, entri_cache_memori=len(self._cache), jumlah_signature=len(self.scanner._indeks) if self.scanner._indeks is not None else None)
+
+    def hentikan(self):
+        """Menghentikan daemon; aman dipanggil dari thread lain."""
+        if self._berhenti is not None: self._loop.call_soon_threadsafe(self._berhenti.set)
+
+    async def jalankan(self):
+        """Berjalan sampai SIGINT/SIGTERM atau hentikan(). Socket lama yang tidak dilayani siapa pun dibersihkan dulu."""
+        loop = self._loop = asyncio.get_running_loop(); self._berhenti = asyncio.Event()
+        self.executor = ThreadPoolExecutor(max_workers=self.jumlah_worker, thread_name_prefix="daemon")
+        try:
+            jumlah, jumlah_cache, detik = await loop.run_in_executor(self.executor, self._panaskan)
+            self.laporan(f"Indeks {jumlah if jumlah is not None else 'gagal dimuat (cek hash lewat query DB)'} signature & {jumlah_cache} entri scan_cache dimuat dalam {detik:.2f} detik.")
+            if os.path.exists(self.path_socket):
+                try: _, w = await asyncio.open_unix_connection(self.path_socket); w.close(); raise RuntimeError(f"Daemon lain sudah melayani {self.path_socket}")
+                except (ConnectionRefusedError, FileNotFoundError): os.unlink(self.path_socket)
+            umask_lama = os.umask(0o177) # Socket hanya untuk pemilik (0600) sejak dibuat
+            try: server = await asyncio.start_unix_server(self._layani_klien, path=self.path_socket, limit=MAKS_BARIS_PROTOKOL)
+            finally: os.umask(umask_lama)
+            for sinyal in (signal.SIGINT, signal.SIGTERM):
+                try: loop.add_signal_handler(sinyal, self._berhenti.set)
+                except (NotImplementedError, RuntimeError, ValueError): pass # Bukan thread utama
+            self.laporan(f"Daemon siap di {self.path_socket} dengan {self.jumlah_worker} worker.")
+            latar = asyncio.create_task(self._tugas_latar())
+            try:
+                async with server: await self._berhenti.wait()
+            finally:
+                latar.cancel(); server.close()
+                try: os.unlink(self.path_socket)
+                except FileNotFoundError: pass
+                await loop.run_in_executor(self.executor, self._tulis_cache_tertunda)
+        finally: self.executor.shutdown(wait=False, cancel_futures=True)
+        self.laporan("Daemon berhenti.")
+
+class KlienDaemon:
+    """
+    Klien async untuk DaemonPindai. Satu koneksi bisa menjalankan banyak permintaan bersamaan:
+        async with KlienDaemon() as klien:
+            async for event in klien.pindai(["upload.bin"]): ...
+    pindai() menghasilkan event (EventDeteksi, EventError, ...) begitu tiba, diakhiri salah satu EVENT_AKHIR.
+    """
+    def __init__(self, path_socket=SOCKET_DAEMON):
+        self.path_socket = path_socket; self._id = 0; self._antrian = {}; self._reader = self._writer = self._pembaca = None
+
+    async def buka(self):
+        self._reader, self._writer = await asyncio.open_unix_connection(self.path_socket, limit=MAKS_BARIS_PROTOKOL)
+        self._kunci_tulis = asyncio.Lock(); self._pembaca = asyncio.create_task(self._baca())
+        return self
+
+    async def tutup(self):
+        if self._writer is None: return
+        self._writer.close(); self._pembaca.cancel()
+        try: await self._writer.wait_closed()
+        except ConnectionError: pass
+        self._writer = None
+
+    async def __aenter__(self): return await self.buka()
+    async def __aexit__(self, *exc): await self.tutup()
+
+    async def _baca(self):
+        try:
+            while baris := await self._reader.readline():
+                try: data = json.loads(baris); antrian = self._antrian.get(data.pop("id", None)); event = dari_dict(data)
+                except (ValueError, TypeError): continue # Balasan dari versi daemon yang lebih baru: abaikan yang tidak dikenal
+                if antrian: antrian.put_nowait(event)
+        except (ConnectionError, ValueError): pass
+        finally:
+            for antrian in self._antrian.values(): antrian.put_nowait(EventFatal("Koneksi ke daemon terputus."))
+
+    async def _minta(self, perintah, **argumen):
+        """Mengirim satu permintaan lalu menghasilkan event balasannya sampai event akhir."""
+        self._id += 1; id_permintaan = self._id; antrian = self._antrian[id_permintaan] = asyncio.Queue()
+        try:
+            self._writer.write((json.dumps({"id": id_permintaan, "perintah": perintah, **argumen}, ensure_ascii=False) + "\n").encode())
+            async with self._kunci_tulis: await self._writer.drain()
+            while True:
+                event = await antrian.get(); yield event
+                if isinstance(event, EVENT_AKHIR): return
+        finally: self._antrian.pop(id_permintaan, None)
+
+    def pindai(self, daftar_path, paksa=False):
+        """File/folder (path relatif diubah jadi absolut di sisi klien). paksa: abaikan scan_cache."""
+        return self._minta("pindai", path=[os.path.abspath(p) for p in daftar_path], paksa=paksa)
+
+    async def ping(self):
+        async for event in self._minta("ping"): pass
+        return isinstance(event, EventSelesai)
+
+    async def statistik(self):
+        data = {}
+        async for event in self._minta("statistik"):
+            if isinstance(event, EventStatistik): data = event.data
+        return data
+
+def jalankan_daemon(scanner, path_socket=SOCKET_DAEMON, jumlah_worker=None, laporan=None):
+    """Menjalankan DaemonPindai di event loop baru sampai dihentikan (untuk CLI)."""
+    asyncio.run(DaemonPindai(scanner, path_socket, jumlah_worker, laporan).jalankan())
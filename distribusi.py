@@ -0,0 +1,314 @@
+# File: distribusi.py
+# Pemindaian terdistribusi: satu root dipecah menjadi manifest berisi shard (kumpulan subtree dengan perkiraan byte/file),
+# tiap node menjalankan worker yang mengklaim shard satu per satu (file klaim O_EXCL di folder hasil bersama) dan menulis
+# file hasil ringkas (JSON Lines gzip), lalu semua hasil digabung menjadi satu laporan. Shard yang workernya mati (detak
+# berhenti) atau jauh lebih lambat dari shard lain terdeteksi lewat status_shard(). jalankan_lokal() memakai beberapa
+# proses di satu mesin sebagai pengganti node untuk pengujian.
+
+import gzip
+import hashlib
+import heapq
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import queue
+import socket
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+
+from event_pindai import (EventDeteksi, EventDibatalkan, EventError, EventFatal, EventProgres, EventSelesai, EventStatistik,
+                          buat_antrian_event)
+
+# --- KONFIGURASI ---
+VERSI_MANIFEST = 1
+VERSI_HASIL = 1
+ITEM_PER_SHARD = 4 # Subtree dipecah sampai kira-kira sekian item per shard, agar pembagian beban bisa seimbang
+BOBOT_PER_FILE = 64 << 10 # Biaya tetap per file (buka, stat, cek cache) dalam satuan byte saat menimbang item
+INTERVAL_DETAK = 5.0 # Detik antar penulisan file progres (detak) oleh worker
+BATAS_DETAK_MACET = 60.0 # Detak lebih tua dari ini = worker dianggap mati, shard boleh diambil alih
+FAKTOR_LAMBAT = 2.0 # Shard berjalan lebih dari sekian kali perkiraan (dari laju shard yang sudah selesai) = straggler
+
+def _nama(folder_hasil, id_shard, akhiran):
+    return os.path.join(folder_hasil, f"shard_{id_shard:04d}.{akhiran}")
+
+def _tulis_atomik(path, data, kompres=False):
+    sementara = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with (gzip.open(sementara, "wb", compresslevel=6) if kompres else open(sementara, "wb")) as f: f.write(data)
+    os.replace(sementara, path) # File hasil/progres tidak pernah terbaca setengah jadi, juga di penyimpanan bersama
+
+def _baca_json(path):
+    try:
+        with open(path, encoding="utf-8") as f: return json.load(f)
+    except (OSError, ValueError): return None
+
+def _bobot(byte, file): return byte + file * BOBOT_PER_FILE
+
+# ======================================================================
+# --- MANIFEST ---
+# ======================================================================
+def _ukur_pohon(root):
+    """{folder relatif: [byte file langsung, jumlah file langsung, [subfolder relatif]]} dalam urutan preorder."""
+    pohon = {}; stack = ["."]
+    while stack:
+        rel = stack.pop(); byte = file = 0; subdirs = []
+        try:
+            with os.scandir(os.path.join(root, rel)) as it:
+                for entry in it:
+                    try: is_dir = entry.is_dir()
+                    except OSError: is_dir = False
+                    if is_dir:
+                        if not entry.is_symlink(): subdirs.append(os.path.normpath(os.path.join(rel, entry.name))) # Sama seperti pindai_folder
+                        continue
+                    file += 1
+                    try: byte += entry.stat().st_size
+                    except OSError: pass
+        except OSError:
+            if rel == ".": raise # Subfolder yang tidak bisa dibaca dihitung kosong; pindai_folder yang melaporkan errornya
+        subdirs.sort(); pohon[rel] = [byte, file, subdirs]; stack.extend(reversed(subdirs))
+    return pohon
+
+def buat_manifest(root, jumlah_shard, item_per_shard=ITEM_PER_SHARD):
+    """
+    Menjelajahi metadata root (stat saja, tanpa membaca isi) lalu membagi pohonnya menjadi `jumlah_shard` shard seimbang.
+    Subtree yang lebih berat dari bobot_total / (jumlah_shard * item_per_shard) dipecah: file yang langsung ada di folder
+    itu menjadi item non-rekursif, tiap subfoldernya ditimbang ulang. Item dibagi ke shard dengan LPT (terberat dulu ke
+    shard teringan). Gabungan semua item selalu mencakup seluruh pohon.
+    """
+    root = os.path.abspath(root); mulai = time.perf_counter(); pohon = _ukur_pohon(root); total = {}
+    for rel in reversed(list(pohon)): # Kebalikan preorder: anak selalu dihitung sebelum induknya
+        byte, file, subdirs = pohon[rel]
+        total[rel] = (byte + sum(total[s][0] for s in subdirs), file + sum(total[s][1] for s in subdirs))
+    total_byte, total_file = total["."]; jumlah_shard = max(1, jumlah_shard)
+    target = _bobot(total_byte, total_file) / (jumlah_shard * max(1, item_per_shard))
+    item = []; stack = ["."]
+    while stack:
+        rel = stack.pop(); byte, file, subdirs = pohon[rel]; t_byte, t_file = total[rel]
+        if not subdirs or _bobot(t_byte, t_file) <= target: item.append({"path": rel, "rekursif": True, "byte": t_byte, "file": t_file}); continue
+        item.append({"path": rel, "rekursif": False, "byte": byte, "file": file}) # Selalu ada agar file baru di folder ini tetap tercakup
+        stack.extend(subdirs)
+    shard = [{"id": i, "item": [], "perkiraan_byte": 0, "perkiraan_file": 0} for i in range(jumlah_shard)]; beban = [(0, i) for i in range(jumlah_shard)]
+    for it in sorted(item, key=lambda it: (-_bobot(it["byte"], it["file"]), it["path"])):
+        berat, i = heapq.heappop(beban); s = shard[i]
+        s["item"].append(it); s["perkiraan_byte"] += it["byte"]; s["perkiraan_file"] += it["file"]
+        heapq.heappush(beban, (berat + _bobot(it["byte"], it["file"]), i))
+    shard = [s for s in shard if s["item"]]
+    for i, s in enumerate(shard): s["id"] = i; s["item"].sort(key=lambda it: it["path"])
+    id_manifest = hashlib.sha256(json.dumps([root, shard], sort_keys=True).encode()).hexdigest()[:16]
+    return {"versi": VERSI_MANIFEST, "id": id_manifest, "root": root, "dibuat": time.time(), "host": socket.gethostname(),
+            "total_byte": total_byte, "total_file": total_file, "total_folder": len(pohon), "detik_jelajah": round(time.perf_counter() - mulai, 3), "shard": shard}
+
+def simpan_manifest(manifest, path):
+    _tulis_atomik(path, json.dumps(manifest, ensure_ascii=False, indent=1).encode())
+
+def baca_manifest(path):
+    manifest = _baca_json(path)
+    if not manifest or manifest.get("versi") != VERSI_MANIFEST: raise ValueError(f"Manifest tidak valid atau versinya tidak didukung: {path}")
+    return manifest
+
+# ======================================================================
+# --- WORKER (satu node) ---
+# ======================================================================
+def _klaim(folder_hasil, id_shard, token, ambil_alih=False):
+    """True jika shard berhasil diklaim untuk token ini. ambil_alih: klaim milik worker yang detaknya berhenti ditimpa."""
+    path = _nama(folder_hasil, id_shard, "klaim"); isi = json.dumps({"token": token, "host": socket.gethostname(), "pid": os.getpid(), "waktu": time.time()}).encode()
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        with os.fdopen(fd, "wb") as f: f.write(isi)
+        return True
+    except FileExistsError:
+        if not ambil_alih or _status_berjalan(folder_hasil, id_shard, time.time())[0] != "macet": return False
+    _tulis_atomik(path, isi)
+    return (_baca_json(path) or {}).get("token") == token # Dua pengambil alih bersamaan: hanya penulis terakhir yang lanjut
+
+def _pemilik(folder_hasil, id_shard):
+    return (_baca_json(_nama(folder_hasil, id_shard, "klaim")) or {}).get("token")
+
+def kerjakan_shard(scanner, manifest, id_shard, folder_hasil, token=None, root_lokal=None, jumlah_worker=None, paksa=False, batal=None):
+    """
+    Memindai semua item satu shard dengan pindai_folder lalu menulis shard_NNNN.hasil.gz. Selama berjalan, file progres
+    (detak) ditulis setiap INTERVAL_DETAK; jika klaim diambil alih worker lain, pemindaian dihentikan tanpa menulis hasil.
+    root_lokal: lokasi root manifest di node ini (mount penyimpanan bersama bisa berbeda per mesin).
+    Mengembalikan ringkasan hasil (dict), atau None jika dibatalkan/diambil alih.
+    """
+    shard = manifest["shard"][id_shard]; root = root_lokal or manifest["root"]; token = token or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    batal = batal or threading.Event(); selesai_detak = threading.Event(); hitungan = Counter()
+    ringkasan = {"jenis": "ringkasan", "versi": VERSI_HASIL, "id_manifest": manifest["id"], "shard": id_shard, "token": token,
+                 "host": socket.gethostname(), "pid": os.getpid(), "root_lokal": root, "mulai": time.time(), "status": "selesai",
+                 "perkiraan_byte": shard["perkiraan_byte"], "perkiraan_file": shard["perkiraan_file"]}
+    indeks = scanner._muat_indeks()
+    ringkasan["jumlah_signature"] = len(indeks) if indeks is not None else None
+    conn = scanner._create_connection()
+    if conn:
+        try: ringkasan["revisi_signature"] = scanner._revisi_signature(conn); ringkasan["versi_signature"] = scanner._versi_signature(conn)
+        finally: conn.close()
+    deteksi = []; error = []; statistik = Counter()
+
+    def detak():
+        while not selesai_detak.wait(INTERVAL_DETAK):
+            if _pemilik(folder_hasil, id_shard) != token: batal.set(); return # Diambil alih: berhenti
+            progres = {"token": token, "host": ringkasan["host"], "pid": ringkasan["pid"], "mulai": ringkasan["mulai"], "waktu": time.time(), "dipindai": hitungan["progres"]}
+            try: _tulis_atomik(_nama(folder_hasil, id_shard, "progres"), json.dumps(progres).encode())
+            except OSError: pass
+    threading.Thread(target=detak, daemon=True, name=f"detak-{id_shard}").start()
+    try:
+        for item in shard["item"]:
+            if batal.is_set(): break
+            path = os.path.normpath(os.path.join(root, item["path"]))
+            progress_queue = buat_antrian_event()
+            thread = threading.Thread(target=scanner.pindai_folder, args=(path, progress_queue, batal), kwargs={"jumlah_worker": jumlah_worker, "paksa_pindai_ulang": paksa, "rekursif": item["rekursif"]}, daemon=True, name=f"shard-{id_shard}")
+            thread.start()
+            while True:
+                try: event = progress_queue.get(timeout=0.2)
+                except queue.Empty: continue
+                if isinstance(event, EventProgres): hitungan["progres"] += event.jumlah
+                elif isinstance(event, EventDeteksi): deteksi.append([os.path.relpath(event.path, root), event.sha256])
+                elif isinstance(event, EventError): error.append([event.jenis, os.path.relpath(event.path, root), event.pesan])
+                elif isinstance(event, EventStatistik): statistik.update({k: v for k, v in event.data.items() if isinstance(v, (int, float))})
+                elif isinstance(event, EventSelesai): hitungan["dipindai"] += event.dipindai; hitungan["terinfeksi"] += event.terinfeksi; break
+                elif isinstance(event, EventFatal): error.append(["FATAL", item["path"], event.pesan]); ringkasan["status"] = "gagal"; break
+                elif isinstance(event, EventDibatalkan): break
+            thread.join()
+    finally: selesai_detak.set()
+    if batal.is_set(): return None
+    ringkasan.update(selesai=time.time(), dipindai=hitungan["dipindai"], terinfeksi=hitungan["terinfeksi"], jumlah_error=len(error), statistik=dict(statistik))
+    ringkasan["detik"] = round(ringkasan["selesai"] - ringkasan["mulai"], 3)
+    baris = [json.dumps(ringkasan, ensure_ascii=False)] + [json.dumps({"jenis": "deteksi", "path": p, "sha256": h}, ensure_ascii=False) for p, h in deteksi]
+    baris += [json.dumps({"jenis": "error", "jenis_error": j, "path": p, "pesan": m}, ensure_ascii=False) for j, p, m in error]
+    _tulis_atomik(_nama(folder_hasil, id_shard, "hasil.gz"), ("\n".join(baris) + "\n").encode(), kompres=True)
+    try: os.remove(_nama(folder_hasil, id_shard, "progres"))
+    except FileNotFoundError: pass
+    return ringkasan
+
+def kerjakan(scanner, manifest, folder_hasil, root_lokal=None, jumlah_worker=None, id_shard=None, ambil_alih=False, paksa=False, laporan=None):
+    """
+    Loop worker satu node: mengklaim shard yang belum punya hasil (terberat dulu) dan mengerjakannya sampai habis.
+    id_shard: kerjakan shard itu saja, klaim lama diabaikan (menjalankan ulang straggler secara manual).
+    ambil_alih: shard yang workernya macet (detak berhenti) ikut diklaim. Mengembalikan [ringkasan per shard].
+    """
+    os.makedirs(folder_hasil, exist_ok=True); laporan = laporan or (lambda pesan: None); hasil = []
+    token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    if id_shard is not None:
+        if not 0 <= id_shard < len(manifest["shard"]): raise ValueError(f"Shard {id_shard} tidak ada di manifest (0..{len(manifest['shard']) - 1})")
+        _tulis_atomik(_nama(folder_hasil, id_shard, "klaim"), json.dumps({"token": token, "host": socket.gethostname(), "pid": os.getpid(), "waktu": time.time()}).encode())
+        urutan = [id_shard]
+    else: urutan = [s["id"] for s in sorted(manifest["shard"], key=lambda s: -_bobot(s["perkiraan_byte"], s["perkiraan_file"]))]
+    for i in urutan:
+        if id_shard is None and (os.path.exists(_nama(folder_hasil, i, "hasil.gz")) or not _klaim(folder_hasil, i, token, ambil_alih)): continue
+        laporan(f"Mengerjakan shard {i} ({len(manifest['shard'][i]['item'])} item, ~{manifest['shard'][i]['perkiraan_file']} file)...")
+        ringkasan = kerjakan_shard(scanner, manifest, i, folder_hasil, token, root_lokal, jumlah_worker, paksa)
+        if ringkasan is None: laporan(f"Shard {i} diambil alih worker lain, dilewati."); continue
+        laporan(f"Shard {i} {ringkasan['status']}: {ringkasan['dipindai']} file dalam {ringkasan['detik']:.1f} detik, {ringkasan['terinfeksi']} terinfeksi.")
+        hasil.append(ringkasan)
+    return hasil
+
+# ======================================================================
+# --- STATUS & STRAGGLER ---
+# ======================================================================
+def baca_hasil(path, ringkasan_saja=False):
+    """(ringkasan, [deteksi], [error]) dari satu file hasil; None jika tidak ada atau rusak."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            ringkasan = json.loads(f.readline())
+            if ringkasan_saja: return ringkasan, [], []
+            deteksi = []; error = []
+            for baris in f:
+                data = json.loads(baris); (deteksi if data.pop("jenis") == "deteksi" else error).append(data)
+            return ringkasan, deteksi, error
+    except (OSError, ValueError, EOFError): return None
+
+def _status_berjalan(folder_hasil, id_shard, sekarang):
+    """('berjalan'/'macet'/'belum', info klaim+progres) untuk shard tanpa hasil."""
+    klaim = _baca_json(_nama(folder_hasil, id_shard, "klaim"))
+    if klaim is None: return "belum", {}
+    progres = _baca_json(_nama(folder_hasil, id_shard, "progres")) or {}
+    if progres.get("token") != klaim.get("token"): progres = {} # Progres sisa worker lama
+    terakhir = progres.get("waktu") or klaim.get("waktu", 0)
+    return ("macet" if sekarang - terakhir > BATAS_DETAK_MACET else "berjalan"), {**klaim, **progres, "detak_terakhir": terakhir}
+
+def status_shard(manifest, folder_hasil, sekarang=None):
+    """
+    Status tiap shard: selesai/gagal (ada file hasil), berjalan, macet (detak berhenti > BATAS_DETAK_MACET), lambat
+    (straggler: berjalan lebih dari FAKTOR_LAMBAT x perkiraan durasinya menurut laju median shard yang sudah selesai,
+    atau perkiraan sisa waktunya melampaui batas itu), atau belum (belum diklaim).
+    """
+    sekarang = sekarang or time.time(); daftar = []; laju = []
+    for s in manifest["shard"]:
+        hasil = baca_hasil(_nama(folder_hasil, s["id"], "hasil.gz"), ringkasan_saja=True)
+        if hasil and hasil[0].get("id_manifest") == manifest["id"]:
+            r = hasil[0]; daftar.append({"shard": s["id"], "status": r["status"], "host": r["host"], "detik": r["detik"], "dipindai": r["dipindai"], "terinfeksi": r["terinfeksi"]})
+            if r["status"] == "selesai" and r["detik"] > 0: laju.append(_bobot(s["perkiraan_byte"], s["perkiraan_file"]) / r["detik"])
+            continue
+        status, info = _status_berjalan(folder_hasil, s["id"], sekarang)
+        entri = {"shard": s["id"], "status": status}
+        if info:
+            detik = sekarang - info.get("mulai", info.get("waktu", sekarang)); dipindai = info.get("dipindai", 0)
+            entri.update(host=info.get("host"), detik=round(detik, 1), dipindai=dipindai, progres=round(min(1.0, dipindai / s["perkiraan_file"]), 3) if s["perkiraan_file"] else None)
+        daftar.append(entri)
+    laju_median = statistics.median(laju) if laju else None
+    for entri in daftar:
+        if entri["status"] != "berjalan" or not laju_median: continue
+        s = manifest["shard"][entri["shard"]]; perkiraan = _bobot(s["perkiraan_byte"], s["perkiraan_file"]) / laju_median
+        entri["perkiraan_detik"] = round(perkiraan, 1)
+        sisa = entri["detik"] / entri["progres"] - entri["detik"] if entri.get("progres") else None
+        if entri["detik"] > FAKTOR_LAMBAT * perkiraan or (sisa is not None and entri["detik"] + sisa > FAKTOR_LAMBAT * perkiraan): entri["status"] = "lambat"
+    return daftar
+
+# ======================================================================
+# --- GABUNG HASIL ---
+# ======================================================================
+def gabung_hasil(manifest, folder_hasil, dengan_error=False):
+    """Satu laporan dari semua file hasil: total, deteksi (path absolut terhadap root manifest), error, per shard & peringatan."""
+    laporan = {"id_manifest": manifest["id"], "root": manifest["root"], "jumlah_shard": len(manifest["shard"]), "dipindai": 0, "terinfeksi": 0,
+               "jumlah_error": 0, "error_per_jenis": Counter(), "statistik": Counter(), "deteksi": [], "per_shard": [], "shard_kurang": [], "peringatan": []}
+    if dengan_error: laporan["error"] = []
+    sudah = set(); signature = set()
+    for s in manifest["shard"]:
+        hasil = baca_hasil(_nama(folder_hasil, s["id"], "hasil.gz"))
+        if hasil is None or hasil[0].get("id_manifest") != manifest["id"]: laporan["shard_kurang"].append(s["id"]); continue
+        ringkasan, deteksi, error = hasil
+        if ringkasan["status"] != "selesai": laporan["shard_kurang"].append(s["id"])
+        laporan["dipindai"] += ringkasan["dipindai"]; laporan["jumlah_error"] += len(error); laporan["statistik"].update(ringkasan.get("statistik", {}))
+        laporan["error_per_jenis"].update(e["jenis_error"] for e in error); signature.add((ringkasan.get("jumlah_signature"), ringkasan.get("versi_signature"), ringkasan.get("revisi_signature")))
+        for d in deteksi:
+            path = os.path.normpath(os.path.join(manifest["root"], d["path"]))
+            if path not in sudah: sudah.add(path); laporan["deteksi"].append({"path": path, "sha256": d["sha256"], "shard": s["id"], "host": ringkasan["host"]})
+        if dengan_error: laporan["error"] += [{**e, "path": os.path.normpath(os.path.join(manifest["root"], e["path"])), "shard": s["id"]} for e in error]
+        laporan["per_shard"].append({"shard": s["id"], "status": ringkasan["status"], "host": ringkasan["host"], "detik": ringkasan["detik"], "dipindai": ringkasan["dipindai"],
+                                     "file_per_detik": round(ringkasan["dipindai"] / ringkasan["detik"], 1) if ringkasan["detik"] else None})
+    laporan["terinfeksi"] = len(laporan["deteksi"])
+    if laporan["shard_kurang"]: laporan["peringatan"].append(f"{len(laporan['shard_kurang'])} shard belum selesai/gagal: {laporan['shard_kurang']}")
+    if len(signature) > 1: laporan["peringatan"].append(f"Node memakai database signature berbeda (jumlah, versi, revisi): {sorted(signature, key=str)}")
+    durasi = [p["detik"] for p in laporan["per_shard"] if p["status"] == "selesai"]
+    if len(durasi) > 1: laporan["detik_shard_median"] = round(statistics.median(durasi), 2); laporan["detik_shard_maks"] = max(durasi)
+    laporan["error_per_jenis"] = dict(laporan["error_per_jenis"]); laporan["statistik"] = dict(laporan["statistik"])
+    return laporan
+
+# ======================================================================
+# --- UJI LOKAL (proses sebagai pengganti node) ---
+# ======================================================================
+def _proses_node(db_path, manifest, folder_hasil, root_lokal, jumlah_worker):
+    from scanner_logic import Scanner # Di proses anak (spawn) modul diimpor ulang
+    kerjakan(Scanner(db_path), manifest, folder_hasil, root_lokal, jumlah_worker,
+             laporan=lambda pesan: print(f"[{multiprocessing.current_process().name}] {pesan}", flush=True))
+
+def jalankan_lokal(db_path, manifest, folder_hasil, jumlah_proses, jumlah_worker=1, root_lokal=None, laporan=None):
+    """
+    Menjalankan `jumlah_proses` proses worker (masing-masing seperti satu node) sampai semua shard diklaim & selesai,
+    sambil melaporkan straggler setiap INTERVAL_DETAK detik. Mengembalikan laporan gabung_hasil.
+    """
+    laporan = laporan or (lambda pesan: None); os.makedirs(folder_hasil, exist_ok=True); ctx = multiprocessing.get_context()
+    proses = [ctx.Process(target=_proses_node, args=(db_path, manifest, folder_hasil, root_lokal, jumlah_worker), name=f"node-{i}", daemon=True) for i in range(jumlah_proses)]
+    for p in proses: p.start()
+    try:
+        while hidup := [p.sentinel for p in proses if p.is_alive()]:
+            multiprocessing.connection.wait(hidup, INTERVAL_DETAK)
+            for entri in status_shard(manifest, folder_hasil):
+                if entri["status"] in ("lambat", "macet"): laporan(f"Shard {entri['shard']} {entri['status']}: {entri.get('detik')} detik, progres {entri.get('progres')}, perkiraan {entri.get('perkiraan_detik')} detik ({entri.get('host')}).")
+    finally:
+        for p in proses:
+            if p.is_alive(): p.terminate()
+    return gabung_hasil(manifest, folder_hasil)
@@ -0,0 +1,222 @@
+# File: event_pindai.py
+
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+
+# --- KONFIGURASI ---
+MAX_ANTRIAN_EVENT = 10_000 # Kapasitas progress_queue; pengirim menunggu (backpressure) jika penuh
+BATCH_PROGRES = 512 # EventProgres dikirim setelah sekian file...
+INTERVAL_PROGRES = 0.1 # ...atau setelah sekian detik, mana yang lebih dulu
+
+# ======================================================================
+# --- JENIS EVENT (Scanner/DB -> GUI/CLI) ---
+# ======================================================================
+# __str__ tiap event meniru format pesan teks lama agar tetap enak dibaca di log.
+
+@dataclass(frozen=True)
+class EventStatus:
+    pesan: str
+    def __str__(self): return f"STATUS: {self.pesan}"
+
+@dataclass(frozen=True)
+class EventTotal:
+    """Total file; final=False berarti masih perkiraan selama penjelajahan berjalan."""
+    total: int
+    final: bool = True
+    def __str__(self): return f"TOTAL_FILES{'' if self.final else '_PERKIRAAN'}:{self.total}"
+
+@dataclass(frozen=True)
+class EventProgres:
+    """Gabungan progres: `jumlah` file selesai sejak EventProgres sebelumnya."""
+    jumlah: int
+    def __str__(self): return f"PROGRESS:{self.jumlah}"
+
+@dataclass(frozen=True)
+class EventDeteksi:
+    """File cocok dengan signature. sha256: hash isi file (hex), dipakai ulang oleh karantina."""
+    path: str
+    sha256: str = ""
+    def __str__(self): return f"TERDETEKSI: {self.path}"
+
+@dataclass(frozen=True)
+class EventError:
+    """Error per file/folder yang tidak menghentikan pemindaian. jenis: 'HASH' atau 'PINDAI'."""
+    jenis: str
+    path: str
+    pesan: str
+    def __str__(self): return f"ERROR_{self.jenis}: {self.path} ({self.pesan})"
+
+@dataclass(frozen=True)
+class EventStatistik:
+    """Penghitung akhir pemindaian (prefilter, cache, dll)."""
+    data: dict = field(default_factory=dict)
+    def __str__(self): return "STATISTIK: " + ", ".join(f"{k}={v}" for k, v in self.data.items())
+
+@dataclass(frozen=True)
+class EventLaju:
+    """Mode hemat: laju target (setelah penyesuaian beban sistem) & laju tercapai sejak EventLaju sebelumnya."""
+    target_byte_per_detik: int
+    target_file_per_detik: float
+    byte_per_detik: int
+    file_per_detik: float
+    faktor: float = 1.0 # Pengali laju konfigurasi; < 1 berarti sedang mundur karena sistem sibuk
+    alasan: str = ""
+    def __str__(self):
+        mb = lambda n: f"{n / 1048576:.1f} MB/s" if n else "tanpa batas"
+        target_file = f"{self.target_file_per_detik:g} file/s" if self.target_file_per_detik else "tanpa batas"
+        return (f"LAJU: {mb(self.byte_per_detik) if self.byte_per_detik else '0.0 MB/s'}, {self.file_per_detik:g} file/s "
+                f"(batas {mb(self.target_byte_per_detik)}, {target_file}{f'; mundur: {self.alasan}' if self.alasan else ''})")
+
+@dataclass(frozen=True)
+class EventMetrik:
+    """Snapshot MetrikPindai di akhir pemindaian (detik per fase, file/byte, error per jenis, kedalaman antrian)."""
+    data: dict = field(default_factory=dict)
+    def __str__(self):
+        fase = ", ".join(f"{k}={v:.2f}s" for k, v in self.data.get("fase_detik", {}).items())
+        return f"METRIK: {fase}; file={self.data.get('file', 0)}, byte={self.data.get('byte', 0)}, error={self.data.get('error', {})}, antrian_maks={self.data.get('kedalaman_antrian_maks', 0)}"
+
+@dataclass(frozen=True)
+class EventFatal:
+    """Pemindaian berhenti karena error. Selalu event terakhir dari pemindaian."""
+    pesan: str
+    def __str__(self): return f"FATAL_ERROR: {self.pesan}"
+
+@dataclass(frozen=True)
+class EventSelesai:
+    """Pemindaian selesai normal. Selalu event terakhir dari pemindaian."""
+    dipindai: int
+    terinfeksi: int
+    pesan: str = ""
+    def __str__(self): return f"SELESAI: {self.pesan or f'Total Dipindai: {self.dipindai}, Terinfeksi: {self.terinfeksi}'}"
+
+@dataclass(frozen=True)
+class EventDibatalkan:
+    """Pemindaian dihentikan lewat cancel_event. Selalu event terakhir dari pemindaian."""
+    pesan: str = "Pemindaian dibatalkan oleh pengguna."
+    def __str__(self): return f"DIBATALKAN: {self.pesan}"
+
+@dataclass(frozen=True)
+class EventDB:
+    """Pesan dari operasi database. jenis: 'SUKSES', 'INFO' atau 'ERROR'."""
+    jenis: str
+    pesan: str
+    def __str__(self): return f"DB_{self.jenis}: {self.pesan}"
+
+@dataclass(frozen=True)
+class EventDBSelesaiTambah:
+    """Satu file selesai diproses oleh tambah_virus_action."""
+    def __str__(self): return "DB_SELESAI_TAMBAH_VIRUS"
+
+@dataclass(frozen=True)
+class EventDBDiperbarui:
+    """Isi tabel signatures berubah, tampilan database perlu dimuat ulang."""
+    def __str__(self): return "DB_UPDATED"
+
+@dataclass(frozen=True)
+class EventDBHalaman:
+    """Satu halaman isi tabel signatures untuk Treeview. generasi: nomor muat ulang saat diminta (halaman usang dibuang)."""
+    generasi: int
+    baris: tuple
+    kursor: object = None # None = tidak ada halaman berikutnya
+    error: str = None
+    def __str__(self): return f"DB_HALAMAN: {self.error or f'{len(self.baris)} entri'}"
+
+@dataclass(frozen=True)
+class EventKarantina:
+    """Pesan log dari operasi karantina (karantina/pulihkan/hapus)."""
+    pesan: str
+    def __str__(self): return f"KARANTINA: {self.pesan}"
+
+@dataclass(frozen=True)
+class EventKarantinaDaftar:
+    """Isi daftar karantina (terbaru dulu) untuk listbox. baris: (id, path_asli, ukuran, waktu, sha256); total: jumlah seluruh entri."""
+    baris: tuple
+    total: int = 0
+    error: str = None
+    def __str__(self): return f"KARANTINA_DAFTAR: {self.error or f'{len(self.baris)} dari {self.total} entri'}"
+
+@dataclass(frozen=True)
+class EventKarantinaSelesai:
+    """Satu permintaan karantina selesai; path_berhasil dibuang dari daftar file terinfeksi."""
+    path_berhasil: tuple = ()
+    def __str__(self): return f"KARANTINA_SELESAI: {len(self.path_berhasil)} file"
+
+@dataclass(frozen=True)
+class EventCheckpoint:
+    """Checkpoint pemindaian terhenti terbaru (dict Scanner.ambil_checkpoint) atau None, untuk tombol lanjutkan GUI."""
+    checkpoint: dict = None
+    def __str__(self): return f"CHECKPOINT: {self.checkpoint['folder'] if self.checkpoint else 'tidak ada'}"
+
+EVENT_AKHIR = (EventSelesai, EventDibatalkan, EventFatal)
+
+def ke_dict(event):
+    """Event -> dict siap-JSON, mis. EventDeteksi -> {"event": "deteksi", "path": ...}."""
+    return {"event": type(event).__name__.removeprefix("Event").lower(), **asdict(event)}
+
+_JENIS_EVENT = {nama.removeprefix("Event").lower(): kelas for nama, kelas in list(globals().items()) if nama.startswith("Event") and isinstance(kelas, type)}
+
+def dari_dict(data):
+    """Kebalikan ke_dict: {"event": "deteksi", "path": ...} -> EventDeteksi. ValueError jika jenisnya tidak dikenal."""
+    data = dict(data); kelas = _JENIS_EVENT.get(data.pop("event", None))
+    if kelas is None: raise ValueError(f"Jenis event tidak dikenal: {data}")
+    return kelas(**data)
+
+# ======================================================================
+# --- PENGIRIM EVENT (dipakai Scanner) ---
+# ======================================================================
+class PengirimEvent:
+    """
+    Membungkus progress_queue: progres per file digabung jadi satu EventProgres per batch
+    (BATCH_PROGRES file atau INTERVAL_PROGRES detik), event lain dikirim berurutan.
+    put() memblok jika antrian penuh, sehingga pemindai melambat mengikuti konsumen.
+    Aman dipakai dari beberapa thread (pemindai & penjelajah). metrik: MetrikPindai opsional yang mencatat
+    lama put() & kedalaman antrian.
+    berhenti: threading.Event opsional yang diset saat event akhir (EVENT_AKHIR) dikirim; setelah itu event lain
+    dibuang (kirim/progres mengembalikan False) sehingga event akhir selalu yang terakhir, dan put() yang sedang
+    menunggu antrian penuh ikut berhenti agar pengirim lain tidak tertahan selamanya.
+    """
+    def __init__(self, antrian, batch_progres=BATCH_PROGRES, interval=INTERVAL_PROGRES, metrik=None, berhenti=None):
+        self.antrian = antrian; self.batch_progres = batch_progres; self.interval = interval; self.metrik = metrik; self.berhenti = berhenti
+        self._tertunda = 0; self._waktu_kirim = time.monotonic(); self._kunci = threading.Lock()
+
+    def progres(self, jumlah=1):
+        """Mencatat `jumlah` file selesai; dikirim jika batch penuh atau interval terlewati."""
+        with self._kunci:
+            self._tertunda += jumlah
+            if self._tertunda >= self.batch_progres or time.monotonic() - self._waktu_kirim >= self.interval: return self._kirim_progres()
+            return True
+
+    def kirim(self, event):
+        """Mengirim event; progres yang tertunda dikirim dulu agar urutan tetap benar. False jika event dibuang (sudah berhenti)."""
+        akhir = isinstance(event, EVENT_AKHIR)
+        if akhir and self.berhenti is not None: self.berhenti.set() # Di luar kunci: pengirim yang sedang menunggu put() melepas kunci
+        with self._kunci:
+            return self._kirim_progres(akhir) and self._put(event, akhir)
+
+    def flush(self):
+        with self._kunci: return self._kirim_progres()
+
+    def _put(self, event, wajib=False):
+        """wajib (event akhir & progres sebelumnya): tunggu sampai masuk; selain itu menyerah saat `berhenti` diset."""
+        t0 = time.perf_counter_ns() if self.metrik else 0
+        if wajib or self.berhenti is None: self.antrian.put(event)
+        else:
+            while True:
+                if self.berhenti.is_set(): return False
+                try: self.antrian.put(event, timeout=0.1); break
+                except queue.Full: continue
+        if self.metrik: self.metrik.antrian(self.antrian.qsize(), time.perf_counter_ns() - t0)
+        return True
+
+    def _kirim_progres(self, wajib=False):
+        if self._tertunda:
+            if not self._put(EventProgres(self._tertunda), wajib): return False
+            self._tertunda = 0
+        self._waktu_kirim = time.monotonic()
+        return True
+
+def buat_antrian_event(maxsize=MAX_ANTRIAN_EVENT):
+    """Antrian terbatas untuk event pemindaian (backpressure ke pemindai)."""
+    return queue.Queue(maxsize=maxsize)
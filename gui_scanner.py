@@ -1,5 +1,4 @@
 import os
-import shutil
 import threading
 import queue
 import sqlite3 # Masih diperlukan untuk error handling
@@ -11,17 +10,27 @@ from ttkbootstrap.constants import *
 # --- IMPOR BARU ---
 import ctypes
 import sys
+import time
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 # --- IMPOR BARU DARI MODUL LOKAL ---
-from scanner_logic import Scanner  # <- Impor kelas Scanner dari file lain
+from scanner_logic import EKSTENSI_DELTA, Scanner  # <- Impor kelas Scanner dari file lain
+from karantina import Karantina    # <- Penyimpanan karantina berbasis SHA256 + tabel indeks
+from pembatas import LAJU_BYTE_HEMAT, PembatasLaju # <- Mode hemat (batas laju I/O & prioritas rendah)
+from aturan_pindai import FILE_ATURAN, AturanPindai, baca_aturan, simpan_aturan # <- Aturan pengecualian penjelajahan
+from tampilan import DaftarVirtual, LogBerbuffer # <- Log berbuffer cincin & daftar terinfeksi virtual
+from event_pindai import (EventCheckpoint, EventDB, EventDBDiperbarui, EventDBHalaman, EventDBSelesaiTambah, EventDeteksi, EventDibatalkan, EventError,  # <- Event Scanner/DB -> GUI
+                          EventFatal, EventKarantina, EventKarantinaDaftar, EventKarantinaSelesai, EventLaju, EventProgres, EventSelesai, EventStatistik, EventStatus, EventTotal, buat_antrian_event)
 from utils import is_admin         # <- Impor fungsi is_admin dari file lain
 # ------------------------------------
 
 # --- KONFIGURASI ---
 DATABASE_FILE = "antivirus.db"
 KARANTINA_DIR = "karantina/"
+FILE_LOG_PINDAI = "log_pindai.log" # Log pindai lengkap (berputar); widget log hanya menyimpan baris terbaru
 MAX_DB_WORKERS = 5
+ANGGARAN_ANTRIAN_MS = 30 # Waktu maksimal per tick untuk memproses event, sisanya dilanjutkan di tick berikutnya
+AMBANG_MUAT_HALAMAN = 0.9 # Halaman berikutnya dimuat saat Treeview digulir melewati 90% isi yang sudah dimuat
 
 # ======================================================================
 # --- KELAS APLIKASI GUI (Tampilan) ---
@@ -33,9 +42,12 @@ class AntivirusApp(ttk.Window):
         self.geometry("800x700")
         self.grid_rowconfigure(0, weight=1); self.grid_columnconfigure(0, weight=1)
 
-        self.scanner = Scanner(DATABASE_FILE)
-        self.scan_thread = None; self.progress_queue = queue.Queue(); self.cancel_event = threading.Event()
+        self.scanner = Scanner(DATABASE_FILE); self.karantina = Karantina(DATABASE_FILE, KARANTINA_DIR)
+        self.sha256_terdeteksi = {} # path -> sha256 dari EventDeteksi, dipakai ulang saat karantina
+        self.entri_karantina = [] # (id, path_asli) per baris listbox_karantina
+        self.scan_thread = None; self.checkpoint_terakhir = None; self.total_final = False; self.jumlah_progres = 0; self.progress_queue = buat_antrian_event(); self.cancel_event = threading.Event()
         self.db_executor = ThreadPoolExecutor(max_workers=MAX_DB_WORKERS)
+        self.db_generasi = 0; self.db_kursor = None; self.db_memuat = False; self.db_awalan = None; self.db_kolom_cari = "md5" # Status Treeview berhalaman
 
         self.buat_widget()
         self.proses_antrian()
@@ -43,13 +55,17 @@ class AntivirusApp(ttk.Window):
 
         if is_admin(): self.title(self.title() + " [ADMINISTRATOR]"); self.log(f"Berjalan dengan Hak Akses Administrator.")
         else: self.log("Berjalan dengan Hak Akses Pengguna Standar.")
-        self.log(f"Database SQLite terinisialisasi di '{DATABASE_FILE}'"); self.log("Silakan pilih folder dan klik 'MULAI PINDAI'.")
-        self.muat_daftar_karantina(); self.muat_tampilan_database()
+        self.log(f"Database SQLite terinisialisasi di '{DATABASE_FILE}'")
+        try: self.aturan = baca_aturan(FILE_ATURAN)
+        except ValueError as e: self.aturan = AturanPindai(); self.log(f"{e} Aturan default dipakai.")
+        self.log(self.aturan.uraian()); self.log("Silakan pilih folder dan klik 'MULAI PINDAI'.")
+        self.db_executor.submit(self._impor_karantina_lama_action); self.muat_tampilan_database(); self.perbarui_tombol_lanjut()
 
     def on_closing(self):
         print("Menutup aplikasi dan mematikan executor...")
         # Shutdown non-blocking agar UI cepat tertutup
         self.db_executor.shutdown(wait=False, cancel_futures=True)
+        if hasattr(self, 'log_pindai'): self.log_pindai.tutup()
         self.destroy()
 
     def buat_widget(self):
@@ -65,13 +81,18 @@ class AntivirusApp(ttk.Window):
         ttk.Label(frame_input, text="Folder:").grid(row=0, column=0, padx=5)
         self.entry_path_folder = ttk.Entry(frame_input, width=70); self.entry_path_folder.grid(row=0, column=1, padx=5, sticky=EW)
         self.tombol_pilih = ttk.Button(frame_input, text="Pilih Folder...", command=self.pilih_folder, style="info.TButton"); self.tombol_pilih.grid(row=0, column=2, padx=5)
-        self.tombol_pindai = ttk.Button(tab, text="MULAI PINDAI", command=self.mulai_pindai_thread, style="danger.TButton"); self.tombol_pindai.grid(row=1, column=0, padx=0, pady=5, sticky=EW, ipady=5)
+        self.var_pindai_ulang = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_input, text="Pindai ulang penuh (abaikan cache hash)", variable=self.var_pindai_ulang).grid(row=1, column=1, padx=5, pady=(5,0), sticky=W)
+        self.var_mode_hemat = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_input, text=f"Mode hemat (maks {LAJU_BYTE_HEMAT >> 20} MB/s, prioritas rendah, mundur saat sistem sibuk)", variable=self.var_mode_hemat).grid(row=2, column=1, padx=5, pady=(5,0), sticky=W)
+        ttk.Button(frame_input, text="Aturan Pengecualian...", command=self.buka_dialog_aturan, style="secondary.outline.TButton").grid(row=3, column=1, padx=5, pady=(5,0), sticky=W)
+        self.frame_tombol_pindai = ttk.Frame(tab); self.frame_tombol_pindai.grid(row=1, column=0, padx=0, pady=5, sticky=EW); self.frame_tombol_pindai.grid_columnconfigure(0, weight=2); self.frame_tombol_pindai.grid_columnconfigure(1, weight=1)
+        self.tombol_pindai = ttk.Button(self.frame_tombol_pindai, text="MULAI PINDAI", command=self.mulai_pindai_thread, style="danger.TButton"); self.tombol_pindai.grid(row=0, column=0, padx=0, sticky=EW, ipady=5)
+        self.tombol_lanjut = ttk.Button(self.frame_tombol_pindai, text="Lanjutkan Pindai Terakhir", command=self.lanjutkan_pindai_terakhir, style="danger.outline.TButton", state=DISABLED); self.tombol_lanjut.grid(row=0, column=1, padx=(5,0), sticky=EW, ipady=5)
         self.tombol_batal = ttk.Button(tab, text="Batalkan Pemindaian", command=self.batalkan_pemindaian, style="danger.outline.TButton"); self.tombol_batal.grid(row=2, column=0, padx=0, pady=5, sticky=EW, ipady=5); self.tombol_batal.grid_remove()
         self.progressbar = ttk.Progressbar(tab, mode='determinate'); self.progressbar.grid(row=3, column=0, padx=0, pady=10, sticky=EW)
         ttk.Label(tab, text="File Terinfeksi (Ctrl/Shift-klik untuk Multi-Pilih):").grid(row=4, column=0, pady=(10,0), sticky=W)
-        frame_listbox = ttk.Frame(tab); frame_listbox.grid(row=5, column=0, padx=0, pady=5, sticky=NSEW); frame_listbox.grid_rowconfigure(0, weight=1); frame_listbox.grid_columnconfigure(0, weight=1)
-        scrollbar_y = ttk.Scrollbar(frame_listbox, orient=VERTICAL)
-        self.listbox_terinfeksi = tk.Listbox(frame_listbox, yscrollcommand=scrollbar_y.set, height=10, selectmode=EXTENDED); scrollbar_y.config(command=self.listbox_terinfeksi.yview); scrollbar_y.grid(row=0, column=1, sticky=NS); self.listbox_terinfeksi.grid(row=0, column=0, sticky=NSEW)
+        self.listbox_terinfeksi = DaftarVirtual(tab, height=10); self.listbox_terinfeksi.grid(row=5, column=0, padx=0, pady=5, sticky=NSEW) # Hanya baris terlihat yang dibuat di Tk
         frame_tombol_aksi = ttk.Frame(tab); frame_tombol_aksi.grid(row=6, column=0, padx=0, pady=0, sticky=EW); frame_tombol_aksi.grid_columnconfigure((0, 1), weight=1)
         self.tombol_karantina = ttk.Button(frame_tombol_aksi, text="Karantina Terpilih", command=self.karantina_file_terpilih, style="warning.outline.TButton"); self.tombol_karantina.grid(row=0, column=0, padx=0, pady=5, sticky=EW, ipady=5)
         self.tombol_karantina_semua = ttk.Button(frame_tombol_aksi, text="Karantina Semua", command=self.karantina_semua, style="warning.TButton"); self.tombol_karantina_semua.grid(row=0, column=1, padx=(5,0), pady=5, sticky=EW, ipady=5)
@@ -79,6 +100,7 @@ class AntivirusApp(ttk.Window):
         frame_log = ttk.Frame(tab); frame_log.grid(row=9, column=0, padx=0, pady=5, sticky=NSEW); frame_log.grid_rowconfigure(0, weight=1); frame_log.grid_columnconfigure(0, weight=1)
         log_scrollbar = ttk.Scrollbar(frame_log, orient=VERTICAL)
         self.area_teks_log = ttk.Text(frame_log, wrap=WORD, state=DISABLED, height=10, yscrollcommand=log_scrollbar.set); log_scrollbar.config(command=self.area_teks_log.yview); log_scrollbar.grid(row=0, column=1, sticky=NS); self.area_teks_log.grid(row=0, column=0, sticky=NSEW)
+        self.log_pindai = LogBerbuffer(self.area_teks_log, FILE_LOG_PINDAI)
 
     def buat_tab_karantina(self, tab):
         # ... (Kode tab karantina tidak berubah) ...
@@ -101,14 +123,22 @@ class AntivirusApp(ttk.Window):
         ttk.Label(tab, text="Tambah Tanda Tangan (Hash) Virus Secara Manual").grid(row=0, column=0, pady=(10,5), padx=10, sticky=W)
         self.tombol_tambah_virus = ttk.Button(tab, text="Pilih File(s) untuk Ditambah ke Database", command=self.tambah_virus_file, style="info.TButton"); self.tombol_tambah_virus.grid(row=1, column=0, padx=10, pady=5, sticky=EW, ipady=5)
 
-        # Baris 2: Label Treeview
-        ttk.Label(tab, text="Isi Database Tanda Tangan Virus (Pilih baris untuk dihapus):").grid(row=2, column=0, pady=(15,0), padx=10, sticky=W) # Tambah instruksi
+        # Baris 2: Label Treeview & pencarian awalan hash
+        frame_cari = ttk.Frame(tab); frame_cari.grid(row=2, column=0, pady=(15,0), padx=10, sticky=EW); frame_cari.grid_columnconfigure(0, weight=1)
+        ttk.Label(frame_cari, text="Isi Database Tanda Tangan Virus (Pilih baris untuk dihapus):").grid(row=0, column=0, sticky=W) # Tambah instruksi
+        self.var_kolom_cari = tk.StringVar(value="MD5"); self.var_awalan_cari = tk.StringVar()
+        ttk.Combobox(frame_cari, textvariable=self.var_kolom_cari, values=("MD5", "SHA256"), state="readonly", width=8).grid(row=0, column=1, padx=(5,0))
+        entry_cari = ttk.Entry(frame_cari, textvariable=self.var_awalan_cari, width=24); entry_cari.grid(row=0, column=2, padx=5); entry_cari.bind("<Return>", lambda e: self.cari_hash())
+        ttk.Button(frame_cari, text="Cari Awalan", command=self.cari_hash, style="secondary.outline.TButton").grid(row=0, column=3)
 
         # Baris 3: Treeview
         frame_tree = ttk.Frame(tab); frame_tree.grid(row=3, column=0, padx=10, pady=5, sticky=NSEW); frame_tree.grid_rowconfigure(0, weight=1); frame_tree.grid_columnconfigure(0, weight=1)
         tree_scroll_y = ttk.Scrollbar(frame_tree, orient=VERTICAL); tree_scroll_x = ttk.Scrollbar(frame_tree, orient=HORIZONTAL)
         kolom = ('id', 'md5', 'sha256', 'timestamp')
-        self.db_treeview = ttk.Treeview(frame_tree, columns=kolom, show='headings', height=7, yscrollcommand=tree_scroll_y.set, xscrollcommand=tree_scroll_x.set); tree_scroll_y.config(command=self.db_treeview.yview); tree_scroll_x.config(command=self.db_treeview.xview)
+        def gulir_db(awal, akhir): # Isi Treeview dimuat per halaman saat digulir mendekati baris terakhir yang sudah ada
+            tree_scroll_y.set(awal, akhir)
+            if float(akhir) >= AMBANG_MUAT_HALAMAN: self.muat_halaman_database()
+        self.db_treeview = ttk.Treeview(frame_tree, columns=kolom, show='headings', height=7, yscrollcommand=gulir_db, xscrollcommand=tree_scroll_x.set); tree_scroll_y.config(command=self.db_treeview.yview); tree_scroll_x.config(command=self.db_treeview.xview)
         self.db_treeview.heading('id', text='ID'); self.db_treeview.heading('md5', text='MD5 Hash'); self.db_treeview.heading('sha256', text='SHA256 Hash'); self.db_treeview.heading('timestamp', text='Ditambahkan Pada')
         self.db_treeview.column('id', width=50, stretch=False, anchor=CENTER); self.db_treeview.column('md5', width=250, stretch=True); self.db_treeview.column('sha256', width=400, stretch=True); self.db_treeview.column('timestamp', width=150, stretch=False)
         self.db_treeview.grid(row=0, column=0, sticky=NSEW); tree_scroll_y.grid(row=0, column=1, sticky=NS); tree_scroll_x.grid(row=1, column=0, sticky=EW)
@@ -118,14 +148,18 @@ class AntivirusApp(ttk.Window):
         frame_db_actions.grid(row=4, column=0, padx=10, pady=(5,10), sticky=EW)
         frame_db_actions.grid_columnconfigure(0, weight=1) # Tombol Refresh
         frame_db_actions.grid_columnconfigure(1, weight=1) # Tombol Delete
+        frame_db_actions.grid_columnconfigure(2, weight=1) # Tombol Impor Feed
 
-        tombol_refresh_db = ttk.Button(frame_db_actions, text="Refresh Tampilan Database", command=self.muat_tampilan_database, style="secondary.TButton")
+        tombol_refresh_db = ttk.Button(frame_db_actions, text="Refresh Tampilan Database", command=self.reset_pencarian_database, style="secondary.TButton")
         tombol_refresh_db.grid(row=0, column=0, padx=(0,5), sticky=EW, ipady=5)
 
         tombol_hapus_hash = ttk.Button(frame_db_actions, text="Hapus Hash Terpilih",
                                       command=self.delete_selected_hash, # Fungsi handler baru
                                       style="danger.outline.TButton")
         tombol_hapus_hash.grid(row=0, column=1, padx=(5,0), sticky=EW, ipady=5)
+
+        self.tombol_impor_feed = ttk.Button(frame_db_actions, text="Impor Feed Hash...", command=self.impor_feed_hash, style="info.outline.TButton")
+        self.tombol_impor_feed.grid(row=0, column=2, padx=(5,0), sticky=EW, ipady=5)
         # --- AKHIR BAGIAN YANG HILANG ---
 
         # Baris 5 & 6: Log Database
@@ -133,24 +167,27 @@ class AntivirusApp(ttk.Window):
         frame_log_db = ttk.Frame(tab); frame_log_db.grid(row=6, column=0, padx=10, pady=5, sticky=NSEW); frame_log_db.grid_rowconfigure(0, weight=1); frame_log_db.grid_columnconfigure(0, weight=1)
         log_db_scrollbar = ttk.Scrollbar(frame_log_db, orient=VERTICAL)
         self.area_teks_log_db = ttk.Text(frame_log_db, wrap=WORD, state=DISABLED, height=5, yscrollcommand=log_db_scrollbar.set); log_db_scrollbar.config(command=self.area_teks_log_db.yview); log_db_scrollbar.grid(row=0, column=1, sticky=NS); self.area_teks_log_db.grid(row=0, column=0, sticky=NSEW)
+        self.log_database = LogBerbuffer(self.area_teks_log_db)
 
 
     # --- FUNGSI EVENT HANDLER & LOGIKA ---
 
     def log(self, pesan):
-        # ... (Sama seperti v2.9) ...
-        if hasattr(self, 'area_teks_log'):
-            try: waktu = datetime.now().strftime("[%H:%M:%S]"); pesan_log = f"{waktu} {pesan}"; self.area_teks_log.config(state=NORMAL); self.area_teks_log.insert(END, pesan_log + "\n"); self.area_teks_log.config(state=DISABLED); self.area_teks_log.see(END)
-            except Exception as e: print(f"Gagal mencatat log Pindai: {e}")
+        """Hanya menambah ke buffer; widget log (dan FILE_LOG_PINDAI) diperbarui per batch di segarkan_tampilan."""
+        if hasattr(self, 'log_pindai'): self.log_pindai.tulis(pesan)
         else: print(f"Log Pindai (menunggu GUI): {pesan}")
 
     def log_db(self, pesan):
-        # ... (Sama seperti v2.9) ...
-        if hasattr(self, 'area_teks_log_db'):
-            try: waktu = datetime.now().strftime("[%H:%M:%S]"); pesan_log = f"{waktu} {pesan}"; self.area_teks_log_db.config(state=NORMAL); self.area_teks_log_db.insert(END, pesan_log + "\n"); self.area_teks_log_db.config(state=DISABLED); self.area_teks_log_db.see(END)
-            except Exception as e: print(f"Gagal mencatat log DB: {e}")
+        if hasattr(self, 'log_database'): self.log_database.tulis(pesan)
         else: print(f"Log DB (menunggu GUI): {pesan}")
 
+    def segarkan_tampilan(self):
+        """Sekali per tick: menyisipkan log yang tertunda & menggambar ulang daftar terinfeksi."""
+        for nama in ('log_pindai', 'log_database', 'listbox_terinfeksi'):
+            if hasattr(self, nama):
+                try: getattr(self, nama).segarkan()
+                except Exception as e: print(f"Gagal memperbarui {nama}: {e}")
+
     def pilih_folder(self):
         # ... (Sama seperti v2.9) ...
         folder_dipilih = filedialog.askdirectory();
@@ -158,19 +195,72 @@ class AntivirusApp(ttk.Window):
             if hasattr(self, 'entry_path_folder'): self.entry_path_folder.delete(0, END); self.entry_path_folder.insert(0, folder_dipilih)
             self.log(f"Folder dipilih: {folder_dipilih}")
 
-    def mulai_pindai_thread(self):
+    def perbarui_tombol_lanjut(self):
+        """Membaca checkpoint terbaru di db_executor; hasilnya datang sebagai EventCheckpoint (tampilkan_tombol_lanjut)."""
+        self.db_executor.submit(lambda: self.progress_queue.put(EventCheckpoint(self.scanner.ambil_checkpoint())))
+
+    def tampilkan_tombol_lanjut(self, event):
+        """Tombol lanjutkan aktif jika ada pemindaian terhenti (checkpoint) di database; teksnya menyebut folder & kemajuannya."""
+        if not hasattr(self, 'tombol_lanjut'): return
+        self.checkpoint_terakhir = event.checkpoint
+        if self.checkpoint_terakhir: self.tombol_lanjut.config(state=NORMAL, text=f"Lanjutkan: {os.path.basename(self.checkpoint_terakhir['folder']) or self.checkpoint_terakhir['folder']} ({self.checkpoint_terakhir['dipindai']} file)")
+        else: self.tombol_lanjut.config(state=DISABLED, text="Lanjutkan Pindai Terakhir")
+
+    def lanjutkan_pindai_terakhir(self):
+        if not self.checkpoint_terakhir: self.perbarui_tombol_lanjut(); return
+        folder = self.checkpoint_terakhir['folder']
+        self.entry_path_folder.delete(0, END); self.entry_path_folder.insert(0, folder)
+        self.mulai_pindai_thread(lanjutkan=True)
+
+    def mulai_pindai_thread(self, lanjutkan=False):
         # ... (Sama seperti v2.9) ...
         path_folder = self.entry_path_folder.get();
         if not path_folder or not os.path.isdir(path_folder): self.log(f"Path folder tidak valid: {path_folder}"); return
-        self.log("\n" + "="*50 + f"\n--- MEMULAI PEMINDAIAN DI: {path_folder} ---")
-        if hasattr(self, 'listbox_terinfeksi'): self.listbox_terinfeksi.delete(0, END);
-        self.cancel_event.clear(); self.progressbar.config(value=0, maximum=100)
+        self.log("\n" + "="*50 + f"\n--- {'MELANJUTKAN' if lanjutkan else 'MEMULAI'} PEMINDAIAN DI: {path_folder} ---")
+        if hasattr(self, 'listbox_terinfeksi'): self.listbox_terinfeksi.kosongkan()
+        self.sha256_terdeteksi.clear()
+        self.cancel_event.clear(); self.progressbar.config(mode='indeterminate', value=0, maximum=100); self.progressbar.start(15) # Total belum diketahui
+        self.total_final = False; self.jumlah_progres = 0
         if hasattr(self, 'tombol_pilih'): self.tombol_pilih.config(state=DISABLED)
         if hasattr(self, 'tombol_karantina'): self.tombol_karantina.config(state=DISABLED)
         if hasattr(self, 'tombol_karantina_semua'): self.tombol_karantina_semua.config(state=DISABLED)
         if hasattr(self, 'tombol_tambah_virus'): self.tombol_tambah_virus.config(state=DISABLED)
-        self.tombol_pindai.grid_remove(); self.tombol_batal.grid()
-        self.scan_thread = threading.Thread(target=self.scanner.pindai_folder, args=(path_folder, self.progress_queue, self.cancel_event), daemon=True); self.scan_thread.start()
+        self.frame_tombol_pindai.grid_remove(); self.tombol_batal.grid()
+        pembatas = PembatasLaju(path=path_folder) if self.var_mode_hemat.get() else None
+        self.scan_thread = threading.Thread(target=self.scanner.pindai_folder, args=(path_folder, self.progress_queue, self.cancel_event), kwargs={"paksa_pindai_ulang": self.var_pindai_ulang.get(), "pembatas": pembatas, "checkpoint": True, "lanjutkan": lanjutkan, "aturan": self.aturan}, daemon=True); self.scan_thread.start()
+
+    def buka_dialog_aturan(self):
+        """Dialog aturan pengecualian (glob & path satu per baris, ukuran maks, opsi filesystem); disimpan ke FILE_ATURAN."""
+        a = self.aturan; dialog = ttk.Toplevel(self); dialog.title("Aturan Pengecualian Pindai"); dialog.transient(self); dialog.grab_set(); dialog.grid_columnconfigure(0, weight=1)
+        kotak = {}
+        isian = (("kecuali", "Kecualikan file/folder (glob nama seperti *.iso atau node_modules; dengan '/' = path relatif):", a.kecuali),
+                 ("sertakan", "Hanya pindai file yang cocok (glob; kosong = semua file):", a.sertakan), ("kecuali_path", "Lewati path (file/folder beserta isinya):", a.kecuali_path))
+        for i, (kunci, judul, isi) in enumerate(isian):
+            ttk.Label(dialog, text=judul).grid(row=i * 2, column=0, padx=10, pady=(10,0), sticky=W)
+            kotak[kunci] = tk.Text(dialog, height=4, width=70); kotak[kunci].grid(row=i * 2 + 1, column=0, padx=10, sticky=EW); kotak[kunci].insert("1.0", "\n".join(isi))
+        def tambah_path():
+            folder = filedialog.askdirectory(parent=dialog, title="Pilih folder yang dilewati")
+            if folder: kotak["kecuali_path"].insert(END, ("\n" if kotak["kecuali_path"].get("1.0", "end-1c").strip() else "") + folder)
+        ttk.Button(dialog, text="Tambah Folder...", command=tambah_path, style="info.outline.TButton").grid(row=6, column=0, padx=10, pady=(5,0), sticky=W)
+        frame_opsi = ttk.Frame(dialog); frame_opsi.grid(row=7, column=0, padx=10, pady=(10,0), sticky=EW)
+        ttk.Label(frame_opsi, text="Ukuran file maks (MB, kosong = tanpa batas):").grid(row=0, column=0, sticky=W)
+        entry_ukuran = ttk.Entry(frame_opsi, width=10); entry_ukuran.grid(row=0, column=1, padx=5, sticky=W)
+        if a.ukuran_maks: entry_ukuran.insert(0, f"{a.ukuran_maks / 1048576:g}")
+        var_fs = tk.BooleanVar(value=a.satu_filesystem); var_khusus = tk.BooleanVar(value=a.lewati_khusus); var_semu = tk.BooleanVar(value=a.lewati_semu)
+        ttk.Checkbutton(frame_opsi, text="Tetap di satu filesystem (jangan masuk ke mount lain)", variable=var_fs).grid(row=1, column=0, columnspan=2, pady=(5,0), sticky=W)
+        ttk.Checkbutton(frame_opsi, text="Lewati file khusus (FIFO, socket, device, symlink rusak)", variable=var_khusus).grid(row=2, column=0, columnspan=2, pady=(5,0), sticky=W)
+        ttk.Checkbutton(frame_opsi, text="Lewati filesystem semu (/proc, /sys, ...)", variable=var_semu).grid(row=3, column=0, columnspan=2, pady=(5,0), sticky=W)
+        def simpan():
+            baris = lambda kunci: [b.strip() for b in kotak[kunci].get("1.0", END).splitlines() if b.strip()]
+            try: ukuran = float(entry_ukuran.get().strip() or 0)
+            except ValueError: messagebox.showerror("Ukuran Tidak Valid", "Ukuran file maks harus berupa angka (MB).", parent=dialog); return
+            aturan = AturanPindai(baris("kecuali"), baris("sertakan"), baris("kecuali_path"), int(ukuran * 1048576), var_fs.get(), var_khusus.get(), var_semu.get())
+            try: simpan_aturan(aturan, FILE_ATURAN)
+            except OSError as e: messagebox.showerror("Gagal Menyimpan", f"Aturan tidak bisa disimpan ke {FILE_ATURAN}: {e}", parent=dialog); return
+            self.aturan = aturan; self.log(f"{aturan.uraian()} (disimpan ke {FILE_ATURAN})"); dialog.destroy()
+        frame_aksi = ttk.Frame(dialog); frame_aksi.grid(row=8, column=0, padx=10, pady=10, sticky=EW); frame_aksi.grid_columnconfigure((0, 1), weight=1)
+        ttk.Button(frame_aksi, text="Simpan", command=simpan, style="success.TButton").grid(row=0, column=0, padx=(0,5), sticky=EW)
+        ttk.Button(frame_aksi, text="Batal", command=dialog.destroy, style="secondary.outline.TButton").grid(row=0, column=1, padx=(5,0), sticky=EW)
 
     def batalkan_pemindaian(self):
         # ... (Sama seperti v2.9) ...
@@ -179,13 +269,14 @@ class AntivirusApp(ttk.Window):
     def selesaikan_pemindaian(self, pesan_log=""):
         # ... (Sama seperti v2.9) ...
         if pesan_log: self.log(pesan_log); self.log("="*50 + "\n")
-        self.progressbar.config(value=0)
+        self.progressbar.stop(); self.progressbar.config(mode='determinate', value=0)
         if hasattr(self, 'tombol_pilih'): self.tombol_pilih.config(state=NORMAL)
-        listbox_ada = hasattr(self, 'listbox_terinfeksi') and self.listbox_terinfeksi.size() > 0
+        listbox_ada = hasattr(self, 'listbox_terinfeksi') and len(self.listbox_terinfeksi) > 0
         if hasattr(self, 'tombol_karantina'): self.tombol_karantina.config(state=NORMAL if listbox_ada else DISABLED)
         if hasattr(self, 'tombol_karantina_semua'): self.tombol_karantina_semua.config(state=NORMAL if listbox_ada else DISABLED)
         if hasattr(self, 'tombol_tambah_virus'): self.tombol_tambah_virus.config(state=NORMAL)
-        self.tombol_batal.grid_remove(); self.tombol_batal.config(state=NORMAL, text="Batalkan Pemindaian"); self.tombol_pindai.grid()
+        self.tombol_batal.grid_remove(); self.tombol_batal.config(state=NORMAL, text="Batalkan Pemindaian"); self.frame_tombol_pindai.grid()
+        self.perbarui_tombol_lanjut()
 
     def tambah_virus_file(self):
         # ... (Sama seperti v2.9) ...
@@ -202,14 +293,38 @@ class AntivirusApp(ttk.Window):
     def tambah_virus_action(self, file_path):
         # ... (Sama seperti v2.9) ...
         try:
-            hash_md5, hash_sha256 = self.scanner._hitung_hashes(file_path)
-            if hash_sha256 is None: self.progress_queue.put(f"DB_ERROR: Gagal menghash '{os.path.basename(file_path)}'. {hash_md5}"); return
-            sukses, pesan = self.scanner.tambah_hash(hash_md5, hash_sha256)
+            hash_md5, hash_sha256, ukuran, hash_awal = self.scanner.hitung_signature_file(file_path)
+            if hash_sha256 is None: self.progress_queue.put(EventDB("ERROR", f"Gagal menghash '{os.path.basename(file_path)}'. {hash_md5}")); return
+            sukses, pesan = self.scanner.tambah_hash(hash_md5, hash_sha256, ukuran, hash_awal)
             nama_file = os.path.basename(file_path)
-            if sukses: self.progress_queue.put(f"DB_SUKSES: Hash untuk '{nama_file}' ditambahkan."); self.progress_queue.put("DB_UPDATED")
-            else: self.progress_queue.put(f"DB_INFO: Hash untuk '{nama_file}' sudah ada ({pesan})")
-        except Exception as e: self.progress_queue.put(f"DB_ERROR: Gagal proses '{os.path.basename(file_path)}': {e}")
-        finally: self.progress_queue.put("DB_SELESAI_TAMBAH_VIRUS")
+            if sukses: self.progress_queue.put(EventDB("SUKSES", f"Hash untuk '{nama_file}' ditambahkan.")); self.progress_queue.put(EventDBDiperbarui())
+            else: self.progress_queue.put(EventDB("INFO", f"Hash untuk '{nama_file}' sudah ada ({pesan})"))
+        except Exception as e: self.progress_queue.put(EventDB("ERROR", f"Gagal proses '{os.path.basename(file_path)}': {e}"))
+        finally: self.progress_queue.put(EventDBSelesaiTambah())
+
+    def impor_feed_hash(self):
+        """Impor massal file feed (teks/CSV/JSONL) atau penerapan delta berversi di db_executor, progres dikirim lewat progress_queue."""
+        file_path = filedialog.askopenfilename(title="Pilih file feed hash atau delta", filetypes=[("Feed hash", "*.txt *.csv *.jsonl *.ndjson"), ("Delta signature", f"*{EKSTENSI_DELTA}"), ("Semua file", "*.*")])
+        if not file_path: return
+        self.tombol_impor_feed.config(state=DISABLED); self.log_db(f"Memulai impor massal dari '{os.path.basename(file_path)}'...")
+        self.db_executor.submit(self.impor_feed_action, file_path)
+
+    def impor_feed_action(self, file_path):
+        laporan = lambda st: self.progress_queue.put(EventDB("INFO", f"Impor: {st['dibaca']} baris dibaca, {st['ditambahkan']} baru ({st['baris_per_detik']:.0f} baris/s)"))
+        try:
+            if file_path.lower().endswith(EKSTENSI_DELTA): self.terapkan_delta_action(file_path); return
+            sukses, hasil = self.scanner.impor_massal(file_path, laporan=laporan)
+            if sukses: self.progress_queue.put(EventDB("SUKSES", f"Impor selesai: {hasil['ditambahkan']} baru, {hasil['duplikat']} duplikat, {hasil['tidak_valid']} tidak valid dalam {hasil['detik']} detik.")); self.progress_queue.put(EventDBDiperbarui())
+            else: self.progress_queue.put(EventDB("ERROR", hasil))
+        finally: self.progress_queue.put(EventDBSelesaiTambah())
+
+    def terapkan_delta_action(self, file_path):
+        sukses, hasil = self.scanner.terapkan_delta(file_path)
+        if not sukses: self.progress_queue.put(EventDB("ERROR", hasil))
+        elif not hasil["diterapkan"]: self.progress_queue.put(EventDB("INFO", f"Delta versi {hasil['versi']} sudah diterapkan (database di versi {hasil['versi_db']})."))
+        else:
+            self.progress_queue.put(EventDB("SUKSES", f"Delta versi {hasil['versi']} diterapkan: {hasil['ditambahkan']} baru, {hasil['dihapus']} dihapus, {hasil['dilengkapi']} dilengkapi, {hasil['duplikat']} duplikat, {hasil['tidak_ada']} hapus tidak ditemukan."))
+            self.progress_queue.put(EventDBDiperbarui())
 
     # --- FUNGSI BARU UNTUK MENGHAPUS HASH ---
     def delete_selected_hash(self):
@@ -259,142 +374,199 @@ class AntivirusApp(ttk.Window):
         for sig_id in ids_to_delete:
             sukses, pesan = self.scanner.delete_hash_by_id(sig_id)
             if sukses:
-                self.progress_queue.put(f"DB_INFO: ID {sig_id}: {pesan}") # Kirim ke queue
+                self.progress_queue.put(EventDB("INFO", f"ID {sig_id}: {pesan}")) # Kirim ke queue
                 sukses_count += 1
             else:
-                self.progress_queue.put(f"DB_ERROR: ID {sig_id}: {pesan}") # Kirim ke queue
+                self.progress_queue.put(EventDB("ERROR", f"ID {sig_id}: {pesan}")) # Kirim ke queue
                 gagal_count += 1
 
-        self.progress_queue.put(f"DB_INFO: Proses penghapusan selesai: {sukses_count} berhasil, {gagal_count} gagal.")
-        self.progress_queue.put("DB_UPDATED") # Kirim sinyal untuk refresh treeview
+        self.progress_queue.put(EventDB("INFO", f"Proses penghapusan selesai: {sukses_count} berhasil, {gagal_count} gagal."))
+        self.progress_queue.put(EventDBDiperbarui()) # Kirim sinyal untuk refresh treeview
     # --- AKHIR FUNGSI BARU ---
 
     def proses_antrian(self):
-        # ... (Sama seperti v2.9) ...
+        """Menguras event dari progress_queue per batch dengan batas waktu per tick agar UI tetap responsif."""
+        batas_waktu = time.perf_counter() + ANGGARAN_ANTRIAN_MS / 1000; masih_ada = True
         try:
-            while True:
-                pesan = self.progress_queue.get_nowait()
-                prefix_pindai = ("TOTAL_FILES:", "PROGRESS:", "TERDETEKSI:", "STATUS:", "ERROR:", "FATAL_ERROR:", "ERROR_HITUNG:", "ERROR_PINDAI:", "ERROR_HASH:")
-                prefix_db = ("DB_SUKSES:", "DB_INFO:", "DB_ERROR:")
-                if pesan.startswith(prefix_pindai):
-                    self.log(pesan)
-                    if pesan.startswith("TOTAL_FILES:"): total = int(pesan.split(":")[1]); self.progressbar.config(maximum=total if total > 0 else 100)
-                    elif pesan.startswith("PROGRESS:"): self.progressbar.step(int(pesan.split(":")[1]))
-                    elif pesan.startswith("TERDETEKSI:"):
-                         if hasattr(self, 'listbox_terinfeksi'): self.listbox_terinfeksi.insert(END, pesan.replace("TERDETEKSI: ", ""))
-                elif pesan.startswith("SELESAI:"): self.selesaikan_pemindaian(pesan)
-                elif pesan.startswith("DIBATALKAN:"): self.selesaikan_pemindaian(pesan)
-                elif pesan.startswith(prefix_db): self.log_db(pesan.split(":", 1)[1].strip())
-                elif pesan == "DB_SELESAI_TAMBAH_VIRUS":
-                     if hasattr(self, 'tombol_tambah_virus'): self.tombol_tambah_virus.config(state=NORMAL)
-                elif pesan == "DB_UPDATED": self.muat_tampilan_database()
-                else: self.log(f"Pesan Antrian Tdk Dikenal: {pesan}")
-        except queue.Empty: pass
-        finally: self.after(100, self.proses_antrian)
+            while time.perf_counter() < batas_waktu:
+                self.tangani_event(self.progress_queue.get_nowait())
+        except queue.Empty: masih_ada = False
+        finally:
+            self.segarkan_tampilan() # Log & daftar terinfeksi digambar sekali per tick, bukan per event
+            self.after(1 if masih_ada else 100, self.proses_antrian) # Antrian belum habis -> lanjut secepatnya
+
+    def tangani_event(self, event):
+        """Meneruskan satu event ke widget yang sesuai."""
+        if isinstance(event, EventProgres):
+            self.jumlah_progres += event.jumlah
+            if str(self.progressbar.cget('mode')) == 'determinate': self.progressbar.config(value=self.jumlah_progres)
+        elif isinstance(event, EventTotal):
+            self.atur_total_progress(event.total, final=event.final)
+            if event.final: self.log(str(event)) # Perkiraan tidak dicatat ke log, terlalu sering
+        elif isinstance(event, EventDeteksi):
+            self.log(str(event))
+            if hasattr(self, 'listbox_terinfeksi'): self.listbox_terinfeksi.tambah(event.path)
+            if event.sha256: self.sha256_terdeteksi[event.path] = event.sha256
+        elif isinstance(event, (EventStatus, EventError, EventStatistik, EventLaju)): self.log(str(event))
+        elif isinstance(event, EventFatal): self.log(str(event)); self.selesaikan_pemindaian() # pindai_folder selalu berhenti setelah EventFatal
+        elif isinstance(event, (EventSelesai, EventDibatalkan)): self.selesaikan_pemindaian(str(event))
+        elif isinstance(event, EventDB): self.log_db(event.pesan)
+        elif isinstance(event, EventDBSelesaiTambah):
+             if hasattr(self, 'tombol_tambah_virus'): self.tombol_tambah_virus.config(state=NORMAL)
+             if hasattr(self, 'tombol_impor_feed'): self.tombol_impor_feed.config(state=NORMAL)
+        elif isinstance(event, EventDBDiperbarui): self.muat_tampilan_database()
+        elif isinstance(event, EventDBHalaman): self.tampilkan_halaman_database(event)
+        elif isinstance(event, EventKarantina): self.log(event.pesan)
+        elif isinstance(event, EventKarantinaDaftar): self.tampilkan_daftar_karantina(event)
+        elif isinstance(event, EventKarantinaSelesai): self.selesaikan_karantina(event.path_berhasil)
+        elif isinstance(event, EventCheckpoint): self.tampilkan_tombol_lanjut(event)
+        else: self.log(f"Pesan Antrian Tdk Dikenal: {event}")
+
+    def atur_total_progress(self, total, final):
+        """Total file datang bertahap: perkiraan (bisa naik-turun) lalu angka final dari penjelajah."""
+        if self.total_final or total <= 0: return
+        if str(self.progressbar.cget('mode')) == 'indeterminate': self.progressbar.stop(); self.progressbar.config(mode='determinate')
+        # Maksimum tidak boleh di bawah nilai sekarang, ttk.Progressbar akan berputar balik ke 0
+        self.progressbar.config(maximum=max(total, self.jumlah_progres + 1), value=self.jumlah_progres); self.total_final = final
 
     def muat_tampilan_database(self):
-        # ... (Sama seperti v2.9) ...
+        """Mengosongkan Treeview lalu memuat halaman pertama (dengan filter awalan yang aktif) di db_executor."""
         if not hasattr(self, 'db_treeview'): self.after(200, self.muat_tampilan_database); return
         for item in self.db_treeview.get_children(): self.db_treeview.delete(item)
-        rows, error_msg = self.scanner.get_all_signatures()
-        if error_msg: self.log_db(f"ERROR: Gagal memuat data DB: {error_msg}"); self.db_treeview.insert('', END, values=("Error", error_msg, "", ""))
-        elif rows:
-            for row in rows: self.db_treeview.insert('', END, values=row)
-            self.log_db(f"Tampilan database diperbarui ({len(rows)} entri).")
-        else: self.log_db("Database tanda tangan virus masih kosong."); self.db_treeview.insert('', END, values=("Info", "Database Kosong", "", ""))
+        self.db_generasi += 1; self.db_kursor = None; self.db_memuat = False
+        self.muat_halaman_database(halaman_pertama=True)
+        if not self.db_awalan: self.db_executor.submit(self._hitung_signature_action)
+
+    def muat_halaman_database(self, halaman_pertama=False):
+        """Meminta halaman berikutnya (jika ada & belum sedang dimuat). Hasilnya datang sebagai EventDBHalaman."""
+        if self.db_memuat or (self.db_kursor is None and not halaman_pertama): return
+        self.db_memuat = True
+        self.db_executor.submit(self._ambil_halaman_action, self.db_generasi, self.db_kursor, self.db_awalan, self.db_kolom_cari)
+
+    def _ambil_halaman_action(self, generasi, kursor, awalan, kolom):
+        rows, berikutnya, error_msg = self.scanner.ambil_halaman_signature(kursor, awalan=awalan, kolom=kolom)
+        self.progress_queue.put(EventDBHalaman(generasi, tuple(rows), berikutnya, error_msg))
+
+    def _hitung_signature_action(self):
+        jumlah = self.scanner.hitung_signature()
+        if jumlah is not None: self.progress_queue.put(EventDB("INFO", f"Database berisi {jumlah:,} tanda tangan virus."))
+
+    def tampilkan_halaman_database(self, event):
+        if event.generasi != self.db_generasi: return # Dari sebelum refresh/pencarian baru
+        self.db_memuat = False; pertama = not self.db_treeview.get_children()
+        if event.error: self.log_db(f"ERROR: Gagal memuat data DB: {event.error}"); self.db_treeview.insert('', END, values=("Error", event.error, "", "")); self.db_kursor = None; return
+        for row in event.baris: self.db_treeview.insert('', END, values=row)
+        self.db_kursor = event.kursor
+        if pertama and not event.baris:
+            if self.db_awalan: self.log_db(f"Tidak ada hash {self.db_kolom_cari.upper()} berawalan '{self.db_awalan}'."); self.db_treeview.insert('', END, values=("Info", "Tidak ditemukan", "", ""))
+            else: self.log_db("Database tanda tangan virus masih kosong."); self.db_treeview.insert('', END, values=("Info", "Database Kosong", "", ""))
+        elif pertama: self.log_db(f"Tampilan database diperbarui ({'hasil pencarian' if self.db_awalan else 'terbaru dulu'}, halaman lain dimuat saat digulir).")
+
+    def cari_hash(self):
+        """Memfilter Treeview ke hash yang berawalan teks pencarian (kosong = tampilkan semua)."""
+        self.db_awalan = self.var_awalan_cari.get().strip().lower() or None; self.db_kolom_cari = self.var_kolom_cari.get().lower()
+        self.muat_tampilan_database()
+
+    def reset_pencarian_database(self):
+        self.var_awalan_cari.set(""); self.cari_hash()
 
     def muat_daftar_karantina(self):
-        # ... (Sama seperti v2.9) ...
-        if not hasattr(self, 'listbox_karantina'): self.after(200, self.muat_daftar_karantina); return
-        try:
-            self.listbox_karantina.delete(0, END)
-            if not os.path.exists(KARANTINA_DIR): os.makedirs(KARANTINA_DIR); self.log(f"Folder karantina '{KARANTINA_DIR}' dibuat."); self.listbox_karantina.insert(END, "(Karantina kosong)"); return
-            files = os.listdir(KARANTINA_DIR)
-            if not files: self.listbox_karantina.insert(END, "(Karantina kosong)"); self.log("Folder karantina kosong.")
-            else:
-                for f in sorted(files): self.listbox_karantina.insert(END, f)
-                self.log(f"Berhasil memuat {len(files)} file dari karantina.")
-        except Exception as e: self.log(f"ERROR: Gagal memuat daftar karantina: {e}"); self.listbox_karantina.insert(END, f"Error: {e}")
+        """Membaca daftar karantina dari tabel indeks di db_executor; hasilnya datang sebagai EventKarantinaDaftar."""
+        self.db_executor.submit(self._muat_karantina_action)
+
+    def _muat_karantina_action(self):
+        rows, total, error_msg = self.karantina.daftar()
+        self.progress_queue.put(EventKarantinaDaftar(tuple(rows), total, error_msg))
+
+    def _impor_karantina_lama_action(self):
+        if tertunda := self.karantina.selesaikan_tertunda(): self.progress_queue.put(EventKarantina(f"{tertunda} karantina yang terhenti di tengah (aplikasi tertutup) dituntaskan."))
+        jumlah = self.karantina.impor_file_lama()
+        if jumlah: self.progress_queue.put(EventKarantina(f"{jumlah} file dari folder karantina lama dipindahkan ke penyimpanan berbasis hash."))
+        self._muat_karantina_action()
+
+    def tampilkan_daftar_karantina(self, event):
+        if not hasattr(self, 'listbox_karantina'): return
+        self.listbox_karantina.delete(0, END); self.entri_karantina = []
+        if event.error: self.log(f"ERROR: Gagal memuat daftar karantina: {event.error}"); self.listbox_karantina.insert(END, f"Error: {event.error}"); return
+        if not event.baris: self.listbox_karantina.insert(END, "(Karantina kosong)"); self.log("Karantina kosong."); return
+        self.entri_karantina = [(id_entri, path_asli) for id_entri, path_asli, *_ in event.baris]
+        self.listbox_karantina.insert(END, *(f"{os.path.basename(path_asli)}  —  {path_asli}  ({ukuran:,} byte, {datetime.fromtimestamp(waktu):%Y-%m-%d %H:%M})"
+                                             for _, path_asli, ukuran, waktu, _ in event.baris))
+        self.log(f"Berhasil memuat {len(event.baris)} entri karantina" + (f" (terbaru dari {event.total})." if event.total > len(event.baris) else "."))
+
+    def _entri_karantina_terpilih(self, pesan_kosong):
+        terpilih = [self.entri_karantina[i] for i in self.listbox_karantina.curselection() if i < len(self.entri_karantina)]
+        if not terpilih: messagebox.showwarning("Tidak Ada Pilihan", pesan_kosong)
+        return terpilih
 
     def pulihkan_file_terpilih(self):
-        # ... (Sama seperti v2.9) ...
-        indeks_terpilih = self.listbox_karantina.curselection();
-        if not indeks_terpilih: messagebox.showwarning("Tidak Ada Pilihan", "Pilih file dari daftar karantina untuk dipulihkan."); return
+        terpilih = self._entri_karantina_terpilih("Pilih file dari daftar karantina untuk dipulihkan.")
+        if not terpilih: return
         folder_tujuan = filedialog.askdirectory(title="Pilih folder tujuan untuk memulihkan file");
         if not folder_tujuan: return
-        sukses = 0; gagal = 0
-        for indeks in sorted(indeks_terpilih, reverse=True):
-            try:
-                nama_file = self.listbox_karantina.get(indeks); path_sumber = os.path.join(KARANTINA_DIR, nama_file); path_tujuan = os.path.join(folder_tujuan, nama_file)
-                if os.path.exists(path_tujuan):
-                    konfirmasi_timpa = messagebox.askyesno("Konfirmasi Timpa", f"File '{nama_file}' sudah ada di tujuan.\nTimpa file tersebut?");
-                    if not konfirmasi_timpa: self.log(f"INFO PULIH: Pemulihan '{nama_file}' dibatalkan."); continue
-                shutil.move(path_sumber, path_tujuan); self.log(f"BERHASIL PULIH: File '{nama_file}' dipulihkan ke '{folder_tujuan}'."); self.listbox_karantina.delete(indeks); sukses += 1
-            except Exception as e: self.log(f"GAGAL PULIH: Gagal memulihkan '{nama_file}'. Error: {e}"); gagal += 1
-        self.log(f"Pemulihan selesai: {sukses} berhasil, {gagal} gagal.")
+        sudah_ada = [os.path.basename(p) for _, p in terpilih if os.path.exists(os.path.join(folder_tujuan, os.path.basename(p)))]
+        timpa = False
+        if sudah_ada:
+            timpa = messagebox.askyesno("Konfirmasi Timpa", f"{len(sudah_ada)} file sudah ada di tujuan:\n{chr(10).join(sudah_ada[:10])}\nTimpa file tersebut?")
+            if not timpa: self.log(f"INFO PULIH: {len(sudah_ada)} file yang sudah ada di tujuan dilewati.")
+        self.db_executor.submit(self._pulihkan_action, [id_entri for id_entri, _ in terpilih], folder_tujuan, timpa)
+
+    def _pulihkan_action(self, ids, folder_tujuan, timpa):
+        hasil = self.karantina.pulihkan(ids, folder_tujuan, timpa)
+        for id_entri, sukses, pesan in hasil: self.progress_queue.put(EventKarantina(f"{'BERHASIL' if sukses else 'GAGAL'} PULIH (ID {id_entri}): {pesan}"))
+        self.progress_queue.put(EventKarantina(f"Pemulihan selesai: {sum(1 for h in hasil if h[1])} berhasil, {sum(1 for h in hasil if not h[1])} gagal."))
+        self._muat_karantina_action()
 
     def hapus_permanen_terpilih(self):
-        # ... (Sama seperti v2.9) ...
-        indeks_terpilih = self.listbox_karantina.curselection();
-        if not indeks_terpilih: messagebox.showwarning("Tidak Ada Pilihan", "Pilih file dari daftar karantina untuk dihapus."); return
-        konfirmasi = messagebox.askyesno("Konfirmasi Hapus Permanen", f"Anda yakin ingin menghapus {len(indeks_terpilih)} file ini secara permanen?\n\nTindakan ini tidak bisa dibatalkan.", icon='warning');
+        terpilih = self._entri_karantina_terpilih("Pilih file dari daftar karantina untuk dihapus.")
+        if not terpilih: return
+        konfirmasi = messagebox.askyesno("Konfirmasi Hapus Permanen", f"Anda yakin ingin menghapus {len(terpilih)} file ini secara permanen?\n\nTindakan ini tidak bisa dibatalkan.", icon='warning');
         if not konfirmasi: return
-        sukses = 0; gagal = 0
-        for indeks in sorted(indeks_terpilih, reverse=True):
-            try:
-                nama_file = self.listbox_karantina.get(indeks); path_file = os.path.join(KARANTINA_DIR, nama_file); os.remove(path_file)
-                self.log(f"BERHASIL HAPUS: File '{nama_file}' telah dihapus permanen."); self.listbox_karantina.delete(indeks); sukses += 1
-            except Exception as e: self.log(f"GAGAL HAPUS: Gagal menghapus '{nama_file}'. Error: {e}"); gagal += 1
-        self.log(f"Penghapusan selesai: {sukses} berhasil, {gagal} gagal.")
+        self.db_executor.submit(self._hapus_karantina_action, [id_entri for id_entri, _ in terpilih])
+
+    def _hapus_karantina_action(self, ids):
+        hasil = self.karantina.hapus(ids)
+        for id_entri, sukses, pesan in hasil: self.progress_queue.put(EventKarantina(f"{'BERHASIL' if sukses else 'GAGAL'} HAPUS (ID {id_entri}): {pesan}"))
+        self.progress_queue.put(EventKarantina(f"Penghapusan selesai: {sum(1 for h in hasil if h[1])} berhasil, {sum(1 for h in hasil if not h[1])} gagal."))
+        self._muat_karantina_action()
 
     def karantina_file_terpilih(self):
-        # ... (Sama seperti v2.9) ...
-        indeks_terpilih = self.listbox_terinfeksi.curselection();
-        if not indeks_terpilih: messagebox.showwarning("Tidak Ada Pilihan", "Pilih file dari daftar infeksi terlebih dahulu."); return
-        if not self.pastikan_folder_karantina(): return
-        sukses = 0; gagal = 0; file_dipindah = []
-        for indeks in sorted(indeks_terpilih, reverse=True):
-            try:
-                path_file_terinfeksi = self.listbox_terinfeksi.get(indeks); nama_file_asli = os.path.basename(path_file_terinfeksi); path_tujuan = os.path.join(KARANTINA_DIR, nama_file_asli)
-                counter = 1; nama_tanpa_ext, ext = os.path.splitext(nama_file_asli)
-                while os.path.exists(path_tujuan): nama_file_baru = f"{nama_tanpa_ext} ({counter}){ext}"; path_tujuan = os.path.join(KARANTINA_DIR, nama_file_baru); counter += 1
-                nama_file_final = os.path.basename(path_tujuan)
-                shutil.move(path_file_terinfeksi, path_tujuan); log_msg = f"BERHASIL (Terpilih): File '{nama_file_asli}' telah dikarantina"; log_msg += f" sebagai '{nama_file_final}'." if nama_file_final != nama_file_asli else "."; self.log(log_msg)
-                file_dipindah.append(indeks); sukses += 1
-            except Exception as e: self.log(f"GAGAL (Terpilih): Gagal karantina '{path_file_terinfeksi}'. Error: {e}"); gagal += 1
-        for indeks in sorted(file_dipindah, reverse=True):
-            if hasattr(self, 'listbox_terinfeksi'): self.listbox_terinfeksi.delete(indeks)
-        self.log(f"Karantina terpilih selesai: {sukses} berhasil, {gagal} gagal.");
-        if sukses > 0: self.muat_daftar_karantina()
+        terpilih = self.listbox_terinfeksi.ambil_terpilih();
+        if not terpilih: messagebox.showwarning("Tidak Ada Pilihan", "Pilih file dari daftar infeksi terlebih dahulu."); return
+        self.mulai_karantina(terpilih, "Terpilih")
 
     def karantina_semua(self):
-        # ... (Sama seperti v2.9) ...
-        daftar_path = list(self.listbox_terinfeksi.get(0, END));
+        daftar_path = self.listbox_terinfeksi.semua();
         if not daftar_path: messagebox.showinfo("Listbox Kosong", "Tidak ada file terdeteksi untuk dikarantina."); return
-        jumlah = len(daftar_path); konfirmasi = messagebox.askyesno("Konfirmasi Karantina Semua", f"Anda yakin ingin mengarantina semua {jumlah} file yang terdeteksi?")
+        konfirmasi = messagebox.askyesno("Konfirmasi Karantina Semua", f"Anda yakin ingin mengarantina semua {len(daftar_path)} file yang terdeteksi?")
         if not konfirmasi: return
-        if not self.pastikan_folder_karantina(): return
-        self.log(f"Memulai karantina total {jumlah} file..."); sukses = 0; gagal = 0; file_dipindah = []
-        for indeks in range(jumlah - 1, -1, -1):
-            try:
-                path_file_terinfeksi = daftar_path[indeks]; nama_file_asli = os.path.basename(path_file_terinfeksi); path_tujuan = os.path.join(KARANTINA_DIR, nama_file_asli)
-                counter = 1; nama_tanpa_ext, ext = os.path.splitext(nama_file_asli)
-                while os.path.exists(path_tujuan): nama_file_baru = f"{nama_tanpa_ext} ({counter}){ext}"; path_tujuan = os.path.join(KARANTINA_DIR, nama_file_baru); counter += 1
-                nama_file_final = os.path.basename(path_tujuan)
-                shutil.move(path_file_terinfeksi, path_tujuan); log_msg = f"BERHASIL (Semua): File '{nama_file_asli}' telah dikarantina"; log_msg += f" sebagai '{nama_file_final}'." if nama_file_final != nama_file_asli else "."; self.log(log_msg)
-                file_dipindah.append(indeks); sukses += 1
-            except Exception as e: self.log(f"GAGAL (Semua): Gagal karantina '{path_file_terinfeksi}'. Error: {e}"); gagal += 1
-        for indeks in sorted(file_dipindah, reverse=True):
-             if hasattr(self, 'listbox_terinfeksi'): self.listbox_terinfeksi.delete(indeks)
-        self.log(f"Karantina total selesai: {sukses} berhasil, {gagal} gagal.")
-        if sukses > 0: self.muat_daftar_karantina()
-
-    def pastikan_folder_karantina(self):
-        # ... (Sama seperti v2.9) ...
+        self.mulai_karantina(daftar_path, "Semua")
+
+    def mulai_karantina(self, daftar_path, label):
+        """Memindahkan file ke karantina di latar belakang (pool thread milik Karantina), UI tetap responsif."""
+        self.log(f"Memulai karantina {len(daftar_path)} file...")
+        for nama in ('tombol_karantina', 'tombol_karantina_semua'):
+            if hasattr(self, nama): getattr(self, nama).config(state=DISABLED)
+        self.db_executor.submit(self._karantina_action, [(p, self.sha256_terdeteksi.get(p)) for p in daftar_path], label)
+
+    def _karantina_action(self, daftar, label):
+        def laporan(path, sukses, pesan):
+            if sukses: self.progress_queue.put(EventKarantina(f"BERHASIL ({label}): File '{os.path.basename(path)}' telah dikarantina." + (f" Catatan: {pesan}." if pesan else "")))
+            else: self.progress_queue.put(EventKarantina(f"GAGAL ({label}): Gagal karantina '{path}'. Error: {pesan}"))
+        berhasil = []
         try:
-            if not os.path.exists(KARANTINA_DIR): os.makedirs(KARANTINA_DIR); self.log(f"Folder '{KARANTINA_DIR}' dibuat.")
-            return True
-        except Exception as e: messagebox.showerror("Error Folder", f"Gagal membuat folder karantina: {e}"); return False
+            sukses, gagal, berhasil = self.karantina.karantina_banyak(daftar, laporan)
+            self.progress_queue.put(EventKarantina(f"Karantina {label.lower()} selesai: {sukses} berhasil, {gagal} gagal."))
+        finally:
+            self.progress_queue.put(EventKarantinaSelesai(tuple(berhasil)))
+            self._muat_karantina_action()
+
+    def selesaikan_karantina(self, path_berhasil):
+        """Membuang file yang sudah dikarantina dari daftar terinfeksi & mengaktifkan lagi tombol karantina."""
+        if path_berhasil and hasattr(self, 'listbox_terinfeksi'): self.listbox_terinfeksi.buang(path_berhasil)
+        if not (self.scan_thread and self.scan_thread.is_alive()):
+            for nama in ('tombol_karantina', 'tombol_karantina_semua'):
+                if hasattr(self, nama): getattr(self, nama).config(state=NORMAL)
 
 # ======================================================================
 # --- Titik Masuk Program ---
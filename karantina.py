@@ -0,0 +1,231 @@
+# File: karantina.py
+# Penyimpanan karantina berbasis isi: tiap payload disimpan SEKALI di <folder>/objek/<2 hex>/<sha256>,
+# asal-usul tiap file dicatat di tabel 'karantina' (database yang sama dengan signatures).
+# Daftar, pulihkan & hapus memakai query berindeks, bukan membaca ulang isi folder.
+# Baris dicatat 'tertunda' SEBELUM file dipindah (lihat _pindahkan), jadi payload tidak pernah tersimpan tanpa path asli.
+
+import errno
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+# --- KONFIGURASI ---
+MAX_KARANTINA_WORKERS = 4 # Jumlah thread pemindah file (rename/salin berjalan paralel, tidak memblok GUI)
+BATAS_DAFTAR_KARANTINA = 5000 # Entri terbaru yang ditampilkan per pemanggilan daftar()
+
+class Karantina:
+    def __init__(self, db_path, folder):
+        self.db_path = db_path; self.folder = folder; self.folder_objek = os.path.join(folder, "objek")
+        self.folder_tertunda = os.path.join(self.folder_objek, "tertunda") # Payload yang sedang dipindah, sebelum tahu alamat isinya
+        self._kunci_objek = threading.Lock() # Penempatan objek (cek ada -> rename/hapus) antar thread pemindah
+        self._init_db()
+
+    def _create_connection(self):
+        """Koneksi BARU ke database (satu per thread)."""
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA synchronous = NORMAL")
+            return conn
+        except Exception as e:
+            print(f"FATAL DB ERROR (karantina): {e}")
+            return None
+
+    def _init_db(self):
+        conn = self._create_connection()
+        if not conn: return
+        try:
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS karantina (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        sha256 BLOB NOT NULL,
+                        path_asli TEXT NOT NULL,
+                        ukuran INTEGER NOT NULL,
+                        waktu INTEGER NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_karantina_sha256 ON karantina (sha256)") # Hitung referensi objek
+                # sementara: path payload di folder_tertunda selama pemindahan; NULL = entri selesai (objek di path_objek(sha256))
+                if "sementara" not in {row[1] for row in conn.execute("PRAGMA table_info(karantina)")}: conn.execute("ALTER TABLE karantina ADD COLUMN sementara TEXT")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_karantina_tertunda ON karantina (id) WHERE sementara IS NOT NULL")
+        except Exception as e: print(f"Error saat inisialisasi tabel karantina: {e}")
+        finally: conn.close()
+
+    def path_objek(self, sha256_hex):
+        return os.path.join(self.folder_objek, sha256_hex[:2], sha256_hex)
+
+    @staticmethod
+    def _hitung_sha256(path, salin_ke=None):
+        """sha256 hex isi file; dengan salin_ke isinya sekaligus disalin ke sana (satu kali baca)."""
+        h = hashlib.sha256()
+        with open(path, "rb") as f, (open(salin_ke, "xb") if salin_ke else nullcontext()) as keluar:
+            while blok := f.read(1 << 20):
+                h.update(blok)
+                if keluar: keluar.write(blok)
+        return h.hexdigest()
+
+    def _pindahkan(self, path, sha256_hex):
+        """
+        Mengarantina satu file: (1) baris tertunda dicatat, (2) file dipindah ke folder_tertunda, (3) sha256 dicatat,
+        (4) payload ditempatkan di path_objek (atau dibuang jika isinya sudah ada), (5) baris ditandai selesai.
+        Gagal di tengah: file dikembalikan ke path asli & barisnya dibuang; proses mati di tengah: selesaikan_tertunda.
+        Alamat objek selalu dari isi yang benar-benar dipindah (di-hash di folder_tertunda); sha256_hex hasil pindai
+        hanya dibandingkan. Mengembalikan (True, keterangan atau None) atau (False, pesan error).
+        """
+        conn = self._create_connection()
+        if not conn: return False, "Gagal terhubung ke DB"
+        path = os.path.abspath(path); id_entri = None; sementara = os.path.join(self.folder_tertunda, f"{os.getpid()}.{threading.get_ident()}.{time.time_ns()}")
+        try:
+            st = os.stat(path); os.makedirs(self.folder_tertunda, exist_ok=True)
+            with conn: id_entri = conn.execute("INSERT INTO karantina (sha256, path_asli, ukuran, waktu, sementara) VALUES (X'', ?, ?, ?, ?)", (path, st.st_size, int(time.time()), sementara)).lastrowid
+            try: os.replace(path, sementara); sha256_isi = self._hitung_sha256(sementara) # Satu sistem file: rename atomik, lalu hash isi yang dipindah
+            except OSError as e:
+                if e.errno != errno.EXDEV: raise
+                sha256_isi = self._hitung_sha256(path, salin_ke=sementara); os.remove(path) # Beda sistem file: salin sambil hash, sumber dihapus setelah salinan utuh
+            self._tempatkan(conn, id_entri, sementara, sha256_isi)
+            return True, (f"isi berubah sejak dipindai, disimpan dengan sha256 {sha256_isi}" if sha256_hex and sha256_hex.lower() != sha256_isi else None)
+        except Exception as e:
+            return False, str(e) + (self._batalkan(conn, id_entri, path, sementara) if id_entri is not None else "")
+        finally: conn.close()
+
+    def _tempatkan(self, conn, id_entri, sementara, sha256_hex):
+        """Langkah (3)-(5) _pindahkan untuk payload yang sudah ada di `sementara`."""
+        digest = bytes.fromhex(sha256_hex); tujuan = self.path_objek(sha256_hex)
+        with conn: conn.execute("UPDATE karantina SET sha256 = ? WHERE id = ?", (digest, id_entri))
+        with self._kunci_objek:
+            if os.path.exists(tujuan): os.remove(sementara) # Payload yang sama sudah tersimpan, cukup tambah catatan
+            else: os.makedirs(os.path.dirname(tujuan), exist_ok=True); os.replace(sementara, tujuan)
+        with conn: conn.execute("UPDATE karantina SET sementara = NULL WHERE id = ?", (id_entri,))
+
+    def _batalkan(self, conn, id_entri, path, sementara):
+        """Mengembalikan payload ke path asli & membuang baris tertundanya. Mengembalikan keterangan tambahan untuk pesan error."""
+        try:
+            if os.path.exists(sementara):
+                if os.path.exists(path): os.remove(sementara) # Salinan beda sistem file yang belum sempat menggantikan sumber
+                else: shutil.move(sementara, path)
+            elif not os.path.exists(path): # Payload sudah ditempatkan: disalin balik, objek dibuang jika tidak dipakai entri lain
+                digest = conn.execute("SELECT sha256 FROM karantina WHERE id = ?", (id_entri,)).fetchone()[0]
+                shutil.copyfile(self.path_objek(digest.hex()), path)
+                with self._kunci_objek, conn:
+                    conn.execute("DELETE FROM karantina WHERE id = ? AND sementara IS NOT NULL", (id_entri,))
+                    if self._objek_tak_terpakai(conn, digest): os.remove(self.path_objek(digest.hex()))
+                return "; file dikembalikan ke lokasi asal."
+            with conn: conn.execute("DELETE FROM karantina WHERE id = ? AND sementara IS NOT NULL", (id_entri,))
+            return "; file dikembalikan ke lokasi asal."
+        except Exception as e: return f"; file belum bisa dikembalikan ({e}), diselesaikan saat karantina dibuka berikutnya."
+
+    def selesaikan_tertunda(self):
+        """
+        Menuntaskan entri tertunda yang ditinggal proses yang mati di tengah _pindahkan: payload yang masih di
+        folder_tertunda ditempatkan, payload yang sudah ditempatkan ditandai selesai, entri yang filenya masih di
+        path asli dibuang. Mengembalikan jumlah entri yang dituntaskan sebagai karantina.
+        """
+        conn = self._create_connection()
+        if not conn: return 0
+        jumlah = 0
+        try:
+            for id_entri, digest, path_asli, sementara in conn.execute("SELECT id, sha256, path_asli, sementara FROM karantina WHERE sementara IS NOT NULL").fetchall():
+                try:
+                    if os.path.exists(sementara) and not os.path.exists(path_asli): self._tempatkan(conn, id_entri, sementara, self._hitung_sha256(sementara)); jumlah += 1
+                    elif digest and not os.path.exists(sementara) and os.path.exists(self.path_objek(digest.hex())):
+                        with conn: conn.execute("UPDATE karantina SET sementara = NULL WHERE id = ?", (id_entri,))
+                        jumlah += 1
+                    else:
+                        if os.path.exists(sementara): os.remove(sementara) # Sumber masih utuh di path asli
+                        with conn: conn.execute("DELETE FROM karantina WHERE id = ?", (id_entri,))
+                except Exception as e: print(f"Gagal menuntaskan karantina tertunda ID {id_entri}: {e}")
+        except sqlite3.Error as e: print(f"Error SQL saat membaca karantina tertunda: {e}")
+        finally: conn.close()
+        return jumlah
+
+    def karantina_banyak(self, daftar, laporan=None):
+        """
+        Mengarantina banyak file sekaligus di MAX_KARANTINA_WORKERS thread. daftar: [(path, sha256 hex atau None)],
+        sha256 hasil pindai hanya dibandingkan dengan isi yang dipindah (None = tidak dibandingkan). Tiap file dicatat di
+        tabel bersama pemindahannya; file yang gagal dicatat dihitung gagal. laporan(path, sukses, pesan) dipanggil per file
+        (pesan sukses tidak kosong jika isinya berubah sejak dipindai).
+        Mengembalikan (jumlah sukses, jumlah gagal, [path yang berhasil]).
+        """
+        berhasil = []; gagal = 0
+        with ThreadPoolExecutor(max_workers=MAX_KARANTINA_WORKERS) as executor:
+            for (path, _), (sukses, pesan) in zip(daftar, executor.map(lambda item: self._pindahkan(*item), daftar)):
+                if sukses: berhasil.append(path)
+                else: gagal += 1
+                if laporan: laporan(path, sukses, pesan or "")
+        return len(berhasil), gagal, berhasil
+
+    def daftar(self, batas=BATAS_DAFTAR_KARANTINA):
+        """Entri karantina terbaru dulu: (rows [(id, path_asli, ukuran, waktu, sha256 hex)], jumlah total, error)."""
+        conn = self._create_connection()
+        if not conn: return [], 0, "Gagal terhubung ke DB"
+        try:
+            rows = conn.execute("SELECT id, path_asli, ukuran, waktu, lower(hex(sha256)) FROM karantina WHERE sementara IS NULL ORDER BY id DESC LIMIT ?", (batas,)).fetchall()
+            return rows, conn.execute("SELECT COUNT(*) FROM karantina WHERE sementara IS NULL").fetchone()[0], None
+        except Exception as e: return [], 0, f"Error SQL saat membaca karantina: {e}"
+        finally: conn.close()
+
+    def _ambil_entri(self, conn, ids):
+        hasil = []
+        for i in range(0, len(ids), 500): # Di bawah batas jumlah parameter SQLite
+            potongan = ids[i:i + 500]
+            hasil += conn.execute(f"SELECT id, sha256, path_asli FROM karantina WHERE sementara IS NULL AND id IN ({','.join('?' * len(potongan))})", potongan).fetchall()
+        return hasil
+
+    def _objek_tak_terpakai(self, conn, digest):
+        return conn.execute("SELECT 1 FROM karantina WHERE sha256 = ? LIMIT 1", (digest,)).fetchone() is None
+
+    def pulihkan(self, ids, folder_tujuan=None, timpa=False):
+        """
+        Memulihkan entri ke folder_tujuan/<nama asli> (None = ke path asli). Objek dipindah jika tidak dipakai entri
+        lain, selain itu disalin. Mengembalikan [(id, sukses, pesan)].
+        """
+        conn = self._create_connection()
+        if not conn: return [(i, False, "Gagal terhubung ke DB") for i in ids]
+        hasil = []
+        try:
+            for id_entri, digest, path_asli in self._ambil_entri(conn, list(ids)):
+                tujuan = os.path.join(folder_tujuan, os.path.basename(path_asli)) if folder_tujuan else path_asli
+                try:
+                    if os.path.exists(tujuan) and not timpa: hasil.append((id_entri, False, f"'{tujuan}' sudah ada.")); continue
+                    os.makedirs(os.path.dirname(tujuan) or ".", exist_ok=True)
+                    sumber = self.path_objek(digest.hex())
+                    with conn:
+                        conn.execute("DELETE FROM karantina WHERE id = ?", (id_entri,))
+                        if self._objek_tak_terpakai(conn, digest): shutil.move(sumber, tujuan)
+                        else: shutil.copyfile(sumber, tujuan)
+                    hasil.append((id_entri, True, f"Dipulihkan ke '{tujuan}'."))
+                except Exception as e: hasil.append((id_entri, False, str(e)))
+        except sqlite3.Error as e: hasil.append((None, False, f"Error SQL saat memulihkan: {e}"))
+        finally: conn.close()
+        return hasil
+
+    def hapus(self, ids):
+        """Menghapus entri secara permanen; objek ikut dihapus jika tidak dipakai entri lain. Mengembalikan [(id, sukses, pesan)]."""
+        conn = self._create_connection()
+        if not conn: return [(i, False, "Gagal terhubung ke DB") for i in ids]
+        hasil = []
+        try:
+            for id_entri, digest, path_asli in self._ambil_entri(conn, list(ids)):
+                try:
+                    with conn:
+                        conn.execute("DELETE FROM karantina WHERE id = ?", (id_entri,))
+                        if self._objek_tak_terpakai(conn, digest):
+                            try: os.remove(self.path_objek(digest.hex()))
+                            except FileNotFoundError: pass
+                    hasil.append((id_entri, True, f"'{os.path.basename(path_asli)}' dihapus permanen."))
+                except Exception as e: hasil.append((id_entri, False, str(e)))
+        except sqlite3.Error as e: hasil.append((None, False, f"Error SQL saat menghapus: {e}"))
+        finally: conn.close()
+        return hasil
+
+    def impor_file_lama(self):
+        """Memindahkan file lepas dari format folder lama (langsung di <folder>/) ke penyimpanan objek. Mengembalikan jumlahnya.
+        Dipanggil saat karantina dibuka, setelah selesaikan_tertunda."""
+        try: lama = [(entry.path, None) for entry in os.scandir(self.folder) if entry.is_file(follow_symlinks=False)]
+        except FileNotFoundError: return 0
+        return self.karantina_banyak(lama)[0] if lama else 0
@@ -0,0 +1,161 @@
+# File: metrik.py
+# Instrumentasi per fase pemindaian (jelajah, buka, baca, hash, cek_hash, antrian event) & penghitung file/byte/error.
+# Bisa dibaca kapan saja lewat snapshot(), diekspor sebagai file teks Prometheus (textfile collector node_exporter),
+# dan opsional diprofilkan per pemindaian dengan cProfile atau tracemalloc.
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# --- KONFIGURASI ---
+INTERVAL_TULIS_METRIK = 5.0 # Detik antar penulisan ulang file Prometheus selama pemindaian
+JUMLAH_BARIS_PROFIL = 40 # Baris teratas laporan teks cProfile/tracemalloc
+AWALAN_PROMETHEUS = "kss_pindai"
+
+FASE = ("jelajah", "buka", "baca", "hash", "cek_hash", "antrian")
+PENGHITUNG = ("file", "byte", "direktori", "retry_lock")
+_KUNCI = FASE + PENGHITUNG
+
+class MetrikPindai:
+    """
+    Timer & penghitung satu pemindaian. Tiap thread menulis ke dict miliknya sendiri (tanpa kunci di jalur panas),
+    snapshot() menjumlahkannya. Waktu fase dalam nanodetik kumulatif semua thread, jadi bisa melebihi waktu dinding.
+    Fase 'baca' dan 'hash' hanya terpisah di mesin baca buffer/lama; di mmap halaman dibaca saat di-hash (masuk 'hash').
+    profil: None, "cprofile" atau "tracemalloc"; laporannya ditulis ke path_profil saat selesai()
+    (cProfile: akhiran .prof = data biner untuk pstats/snakeviz, selain itu ringkasan teks).
+    """
+    def __init__(self, path_prometheus=None, profil=None, path_profil=None):
+        if profil not in (None, "cprofile", "tracemalloc"): raise ValueError(f"Profil tidak dikenal: {profil}")
+        self.path_prometheus = path_prometheus; self.profil = profil
+        self.path_profil = path_profil or (f"profil_pindai_{time.strftime('%Y%m%d_%H%M%S')}.{'prof' if profil == 'cprofile' else 'txt'}" if profil else None)
+        self._lokal = threading.local(); self._per_thread = []; self._dari_proses = {}
+        self._error = Counter(); self._kunci = threading.Lock(); self._profiler = []
+        self.kedalaman_antrian = 0; self.kedalaman_antrian_maks = 0
+        self._mulai = time.monotonic(); self._selesai = None; self._waktu_tulis = self._mulai
+
+    # --- JALUR PANAS ---
+
+    def _data(self):
+        data = getattr(self._lokal, "data", None)
+        if data is None:
+            data = self._lokal.data = dict.fromkeys(_KUNCI, 0) # Kunci tetap: snapshot dari thread lain tidak pernah melihat dict berubah ukuran
+            with self._kunci: self._per_thread.append(data)
+        return data
+
+    def waktu(self, fase, ns):
+        self._data()[fase] += ns
+
+    def tambah(self, nama, n=1):
+        self._data()[nama] += n
+
+    def error(self, jenis):
+        with self._kunci: self._error[jenis] += 1
+
+    def antrian(self, kedalaman, ns):
+        """Dicatat per put() ke progress_queue: kedalaman antrian saat itu & lama menunggu (backpressure dari GUI/CLI)."""
+        self._data()["antrian"] += ns; self.kedalaman_antrian = kedalaman
+        if kedalaman > self.kedalaman_antrian_maks: self.kedalaman_antrian_maks = kedalaman
+
+    # --- SIKLUS PEMINDAIAN ---
+
+    def mulai(self):
+        """Dipanggil di thread pemindai saat pemindaian dimulai."""
+        self._mulai = self._waktu_tulis = time.monotonic(); self._selesai = None
+        if self.profil == "tracemalloc" and not tracemalloc.is_tracing(): tracemalloc.start()
+        self.siapkan_thread()
+
+    def siapkan_thread(self):
+        """Initializer tiap thread pemindaian: cProfile hanya melihat thread tempat ia diaktifkan."""
+        if self.profil == "cprofile":
+            profiler = cProfile.Profile(); profiler.enable()
+            with self._kunci: self._profiler.append(profiler)
+
+    def tulis_berkala(self):
+        """Menulis file Prometheus jika INTERVAL_TULIS_METRIK terlewati (murah dipanggil per file)."""
+        if self.path_prometheus and time.monotonic() - self._waktu_tulis >= INTERVAL_TULIS_METRIK: self.tulis_prometheus()
+
+    def selesai(self):
+        """Dipanggil saat pemindaian berakhir: menulis file Prometheus & laporan profil. Mengembalikan pesan (atau None)."""
+        if self._selesai is not None: return None # Sudah dipanggil (mis. sekali lagi di blok finally pemindai)
+        self._selesai = time.monotonic(); pesan = []
+        if self.path_prometheus: self.tulis_prometheus(); pesan.append(f"metrik ditulis ke {self.path_prometheus}")
+        try:
+            if self.profil == "cprofile" and self._profiler: self._tulis_cprofile(); pesan.append(f"profil cProfile ditulis ke {self.path_profil}")
+            elif self.profil == "tracemalloc" and tracemalloc.is_tracing(): self._tulis_tracemalloc(); pesan.append(f"profil tracemalloc ditulis ke {self.path_profil}")
+        except OSError as e: pesan.append(f"profil gagal ditulis: {e}")
+        return "Metrik: " + ", ".join(pesan) + "." if pesan else None
+
+    def _tulis_cprofile(self):
+        with self._kunci: profiler = self._profiler[:]; self._profiler.clear()
+        for p in profiler: p.disable()
+        if self.path_profil.endswith(".prof"):
+            stats = pstats.Stats(*profiler); stats.dump_stats(self.path_profil); return
+        keluaran = io.StringIO(); stats = pstats.Stats(*profiler, stream=keluaran)
+        stats.sort_stats("cumulative").print_stats(JUMLAH_BARIS_PROFIL)
+        with open(self.path_profil, "w", encoding="utf-8") as f: f.write(keluaran.getvalue())
+
+    def _tulis_tracemalloc(self):
+        snapshot = tracemalloc.take_snapshot(); sekarang, puncak = tracemalloc.get_traced_memory(); tracemalloc.stop()
+        with open(self.path_profil, "w", encoding="utf-8") as f:
+            f.write(f"Memori terlacak: {sekarang / 1048576:.1f} MB, puncak {puncak / 1048576:.1f} MB\n\n")
+            for stat in snapshot.statistics("lineno")[:JUMLAH_BARIS_PROFIL]: f.write(f"{stat}\n")
+
+    # --- MODE MULTI-PROSES ---
+
+    def data_mentah(self):
+        """Total kumulatif proses ini (dikirim worker ke proses induk bersama batch hasil)."""
+        return self._jumlahkan(self._per_thread), dict(self._error)
+
+    def gabung_proses(self, id_proses, data):
+        """Menyimpan total kumulatif terbaru dari satu proses worker (menggantikan kiriman sebelumnya)."""
+        with self._kunci: self._dari_proses[id_proses] = data
+
+    # --- SNAPSHOT & EKSPOR ---
+
+    @staticmethod
+    def _jumlahkan(daftar):
+        total = dict.fromkeys(_KUNCI, 0)
+        for data in list(daftar):
+            for k in _KUNCI: total[k] += data.get(k, 0)
+        return total
+
+    def snapshot(self):
+        """dict siap-JSON: detik per fase, penghitung, error per jenis, kedalaman antrian & laju rata-rata."""
+        with self._kunci: dari_proses = list(self._dari_proses.values()); error = Counter(self._error)
+        total = self._jumlahkan(self._per_thread + [d for d, _ in dari_proses])
+        for _, e in dari_proses: error.update(e)
+        detik = max((self._selesai or time.monotonic()) - self._mulai, 1e-9)
+        return {"detik": round(detik, 3), "fase_detik": {f: round(total[f] / 1e9, 4) for f in FASE},
+                **{k: total[k] for k in PENGHITUNG}, "error": dict(error),
+                "kedalaman_antrian": self.kedalaman_antrian, "kedalaman_antrian_maks": self.kedalaman_antrian_maks,
+                "file_per_detik": round(total["file"] / detik, 1), "mb_per_detik": round(total["byte"] / 1048576 / detik, 2)}
+
+    def teks_prometheus(self, snapshot=None):
+        s = snapshot or self.snapshot(); a = AWALAN_PROMETHEUS; baris = []
+        def metrik(nama, jenis, bantuan, nilai):
+            baris.extend((f"# HELP {a}_{nama} {bantuan}", f"# TYPE {a}_{nama} {jenis}"))
+            for label, v in (nilai.items() if isinstance(nilai, dict) else [("", nilai)]): baris.append(f"{a}_{nama}{label} {v}")
+        metrik("fase_detik_total", "counter", "Detik kumulatif (semua thread) per fase pemindaian.", {f'{{fase="{f}"}}': v for f, v in s["fase_detik"].items()})
+        metrik("file_total", "counter", "File yang diproses.", s["file"])
+        metrik("byte_total", "counter", "Byte yang dibaca untuk hashing.", s["byte"])
+        metrik("direktori_total", "counter", "Direktori yang dijelajahi.", s["direktori"])
+        metrik("error_total", "counter", "Error per jenis.", {f'{{jenis="{j}"}}': n for j, n in sorted(s["error"].items())} or {'{jenis="none"}': 0})
+        metrik("retry_lock_total", "counter", "Percobaan ulang karena database terkunci.", s["retry_lock"])
+        metrik("kedalaman_antrian", "gauge", "Isi progress_queue saat put terakhir.", s["kedalaman_antrian"])
+        metrik("kedalaman_antrian_maks", "gauge", "Isi progress_queue tertinggi selama pemindaian.", s["kedalaman_antrian_maks"])
+        metrik("durasi_detik", "gauge", "Lama pemindaian sejauh ini.", s["detik"])
+        return "\n".join(baris) + "\n"
+
+    def tulis_prometheus(self, path=None):
+        """Menulis teks Prometheus secara atomik (file sementara lalu rename) agar kolektor tidak membaca file setengah jadi."""
+        path = path or self.path_prometheus; self._waktu_tulis = time.monotonic()
+        sementara = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(sementara, "w", encoding="utf-8") as f: f.write(self.teks_prometheus())
+            os.replace(sementara, path)
+        except OSError as e: print(f"Gagal menulis metrik Prometheus ke {path}: {e}")
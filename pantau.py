@@ -0,0 +1,315 @@
+# File: pantau.py
+# Mode pantau (real-time, khusus Linux): berlangganan inotify (atau fanotify jika root) untuk folder terpilih,
+# lalu hanya file yang berubah yang dilewatkan ke jalur pemeriksaan Scanner (prefilter -> cache -> hash -> indeks).
+# Event berurutan untuk path yang sama digabung (debounce) sebelum diperiksa.
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from event_pindai import EventDeteksi, EventError, EventFatal, EventSelesai, EventStatistik, EventStatus, PengirimEvent
+from scanner_logic import LEWATI_HASH_AWAL, MAX_SCAN_WORKERS
+
+# --- KONFIGURASI ---
+JEDA_DEBOUNCE = 0.5 # Detik tanpa event baru sebelum file diperiksa (penulisan beruntun digabung jadi satu pemeriksaan)
+TUNDA_MAKSIMUM = 5.0 # File yang terus ditulis tetap diperiksa setelah sekian detik sejak event pertamanya
+MAX_TERTUNDA_PANTAU = 100_000 # Batas path unik yang menunggu; lebih dari ini diperlakukan seperti antrian kernel meluap
+INTERVAL_PANTAU = 0.1 # Detik maksimum satu putaran menunggu event (juga latensi cek cancel_event)
+INTERVAL_TULIS_CACHE = JEDA_DEBOUNCE # Detik antar penulisan batch hasil hash baru ke scan_cache (satu transaksi per putaran debounce)
+INTERVAL_CEK_SIGNATURE = 2.0 # Detik antar pengecekan tabel signatures; indeks ditambal dari riwayat delta atau dimuat ulang jika diubah proses lain
+UKURAN_BACA_EVENT = 64 * 1024 # Buffer read() untuk event kernel
+
+# Konstanta <sys/inotify.h> dan <sys/fanotify.h>
+IN_CLOSE_WRITE, IN_MOVED_TO, IN_CREATE, IN_Q_OVERFLOW, IN_IGNORED, IN_ISDIR = 0x8, 0x80, 0x100, 0x4000, 0x8000, 0x40000000
+IN_ONLYDIR, IN_DONT_FOLLOW, IN_EXCL_UNLINK = 0x01000000, 0x02000000, 0x04000000
+IN_NONBLOCK, IN_CLOEXEC = os.O_NONBLOCK, 0o2000000
+MASK_INOTIFY = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK # IN_IGNORED selalu dikirim kernel
+FAN_CLASS_NOTIF, FAN_CLOSE_WRITE, FAN_Q_OVERFLOW, FAN_CLOEXEC, FAN_NONBLOCK, FAN_MARK_ADD, FAN_MARK_MOUNT, FAN_NOFD = 0x0, 0x8, 0x4000, 0x1, 0x2, 0x1, 0x10, -1
+AT_FDCWD = -100
+_EVENT_INOTIFY = struct.Struct("iIII") # wd, mask, cookie, len (diikuti nama sepanjang len, diakhiri \0)
+_EVENT_FANOTIFY = struct.Struct("IBBHQii") # event_len, vers, reserved, metadata_len, mask, fd, pid
+
+_libc = None
+
+def _muat_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        _libc.fanotify_mark.argtypes = (ctypes.c_int, ctypes.c_uint, ctypes.c_uint64, ctypes.c_int, ctypes.c_char_p)
+    return _libc
+
+def _cek(hasil, keterangan):
+    if hasil < 0:
+        kode = ctypes.get_errno(); raise OSError(kode, f"{keterangan}: {os.strerror(kode)}")
+    return hasil
+
+class _Inotify:
+    """Satu watch per direktori (inotify tidak rekursif); folder baru dipasangi watch saat muncul."""
+    nama = "inotify"
+
+    def __init__(self):
+        self.libc = _muat_libc(); self.fd = _cek(self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC), "inotify_init1")
+        self.folder = {} # wd -> path direktori
+
+    def pasang(self, path):
+        """Memasang watch pada satu direktori. OSError (mis. ENOSPC: max_user_watches habis) diteruskan."""
+        wd = _cek(self.libc.inotify_add_watch(self.fd, os.fsencode(path), MASK_INOTIFY), path)
+        self.folder[wd] = path # Direktori yang dipindah dalam pohon mendapat wd yang sama: path-nya diperbarui
+        return wd
+
+    def baca(self):
+        """Menghasilkan (jenis, path) dengan jenis 'file', 'folder' (folder baru), 'luap' atau 'hilang' (folder tidak dipantau lagi)."""
+        try: data = os.read(self.fd, UKURAN_BACA_EVENT)
+        except BlockingIOError: return
+        o = 0
+        while o < len(data):
+            wd, mask, _, panjang = _EVENT_INOTIFY.unpack_from(data, o); o += _EVENT_INOTIFY.size
+            nama = data[o:o + panjang].rstrip(b"\0"); o += panjang
+            if mask & IN_Q_OVERFLOW: yield "luap", None; continue
+            folder = self.folder.get(wd)
+            if folder is None: continue
+            if mask & IN_IGNORED: del self.folder[wd]; yield "hilang", folder; continue
+            if not nama: continue
+            path = os.path.join(folder, os.fsdecode(nama))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO): yield "folder", path
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO): yield "file", path
+
+    def tutup(self): os.close(self.fd)
+
+class _Fanotify:
+    """
+    Satu mark per mount (FAN_MARK_MOUNT): pemasangan tidak bergantung ukuran pohon, path didapat dari fd event.
+    Perlu CAP_SYS_ADMIN. Hanya FAN_CLOSE_WRITE yang tersedia di mode ini: file yang ditulis di luar folder
+    terpantau lalu di-rename ke dalamnya tidak terlihat.
+    """
+    nama = "fanotify"
+
+    def __init__(self, daftar_root):
+        self.libc = _muat_libc()
+        self.fd = _cek(self.libc.fanotify_init(FAN_CLASS_NOTIF | FAN_CLOEXEC | FAN_NONBLOCK, os.O_RDONLY | os.O_LARGEFILE), "fanotify_init")
+        self.awalan = tuple(os.path.join(r, "") for r in daftar_root); self.folder = {}
+
+    def pasang(self, path):
+        _cek(self.libc.fanotify_mark(self.fd, FAN_MARK_ADD | FAN_MARK_MOUNT, FAN_CLOSE_WRITE, AT_FDCWD, os.fsencode(path)), path)
+        self.folder[path] = path
+
+    def baca(self):
+        try: data = os.read(self.fd, UKURAN_BACA_EVENT)
+        except BlockingIOError: return
+        o = 0
+        while o + _EVENT_FANOTIFY.size <= len(data):
+            panjang, _, _, _, mask, fd, _ = _EVENT_FANOTIFY.unpack_from(data, o); o += panjang
+            if fd == FAN_NOFD:
+                if mask & FAN_Q_OVERFLOW: yield "luap", None
+                continue
+            try: path = os.readlink(f"/proc/self/fd/{fd}")
+            except OSError: continue
+            finally: os.close(fd)
+            if path.startswith(self.awalan): yield "file", path # Mark mount melihat seluruh sistem file, saring ke folder terpantau
+
+    def tutup(self): os.close(self.fd)
+
+class Pemantau:
+    """
+    Memantau daftar_root sampai cancel_event disetel. Path yang berubah dikumpulkan di `tertunda`
+    (path -> [waktu event pertama, waktu event terakhir]) dan diperiksa di pool `jumlah_worker` thread
+    setelah JEDA_DEBOUNCE detik tenang. Pembaca event tidak pernah menunggu worker: jika pool penuh,
+    path tetap menunggu di `tertunda` (event lanjutan untuk path yang sama tidak menambah antrian).
+    Saat antrian kernel meluap, seluruh pohon ditandai ulang; scan_cache membuat file yang tidak berubah tidak di-hash ulang.
+    Hasil hash baru dikumpulkan worker dan ditulis ke scan_cache oleh putaran utama per INTERVAL_TULIS_CACHE & saat berhenti.
+    """
+    def __init__(self, scanner, daftar_root, progress_queue, cancel_event, backend="inotify", jumlah_worker=None):
+        self.scanner = scanner; self.daftar_root = [os.path.abspath(r) for r in daftar_root]; self.cancel_event = cancel_event
+        self.backend = backend; self.jumlah_worker = max(1, jumlah_worker or MAX_SCAN_WORKERS)
+        self.pengirim = PengirimEvent(progress_queue); self.sumber = None
+        self.tertunda = {}; self._kunci = threading.Lock(); self._slot = threading.Semaphore(self.jumlah_worker * 2)
+        self._lokal = threading.local() # Koneksi DB per thread worker, ditutup otomatis saat thread pool berhenti
+        self.diabaikan = {os.path.abspath(scanner.db_path + akhiran) for akhiran in ("", "-wal", "-shm", "-journal", "-indeks")}
+        self._ulang_diminta = self._ulang_berjalan = False
+        self._cache_simpan = {} # (dev, ino) -> baris scan_cache baru, ditulis per batch oleh putaran utama
+        self.statistik = dict.fromkeys(("jumlah_watch", "event", "file_diperiksa", "file_dari_cache", "file_lewati_prefilter", "terinfeksi", "meluap"), 0)
+
+    # --- PEMASANGAN WATCH ---
+
+    def _buka_sumber(self):
+        if self.backend == "fanotify":
+            try: return _Fanotify(self.daftar_root)
+            except OSError as e: self.pengirim.kirim(EventStatus(f"fanotify tidak tersedia ({e}), memakai inotify."))
+        return _Inotify()
+
+    def _pasang_pohon(self, root, tandai_file):
+        """Memasang watch di root dan seluruh subfoldernya (DFS, symlink folder tidak diikuti). tandai_file: file yang
+        sudah ada ikut diperiksa (folder yang baru muncul bisa sudah berisi file sebelum watch-nya terpasang)."""
+        stack = [root]; jumlah = 0
+        while stack and not self.cancel_event.is_set():
+            folder = stack.pop()
+            try: self.sumber.pasang(folder); jumlah += 1
+            except OSError as e:
+                if e.errno == errno.ENOSPC: self.pengirim.kirim(EventError("PANTAU", folder, "Batas inotify max_user_watches tercapai")); return jumlah
+                if e.errno != errno.ENOENT: self.pengirim.kirim(EventError("PANTAU", folder, str(e)))
+                continue
+            if self.sumber.nama == "fanotify": return jumlah # Satu mark mencakup seluruh mount
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False): stack.append(entry.path)
+                            elif tandai_file: self._tandai(entry.path)
+                        except OSError: pass
+            except OSError as e:
+                if e.errno != errno.ENOENT: self.pengirim.kirim(EventError("PANTAU", folder, f"Gagal akses folder - {e}"))
+        return jumlah
+
+    def pasang(self):
+        """Membuka inotify/fanotify dan memasang watch di semua root. Mengembalikan (jumlah watch, detik)."""
+        mulai = time.perf_counter(); self.sumber = self._buka_sumber()
+        for root in self.daftar_root: self.statistik["jumlah_watch"] += self._pasang_pohon(root, False)
+        if self.sumber.nama == "fanotify" and not self.statistik["jumlah_watch"]: # Mis. sistem file tanpa dukungan mark mount
+            self.sumber.tutup(); self.sumber = _Inotify(); self.pengirim.kirim(EventStatus("Mark fanotify gagal dipasang, memakai inotify."))
+            for root in self.daftar_root: self.statistik["jumlah_watch"] += self._pasang_pohon(root, False)
+        return self.statistik["jumlah_watch"], time.perf_counter() - mulai
+
+    # --- DEBOUNCE ---
+
+    def _tandai(self, path, tunggu=False):
+        """Mencatat event untuk path. Jika `tertunda` penuh: pembaca event membuang path & meminta pemindaian ulang,
+        thread pemindaian ulang (tunggu=True) menunggu sampai ada tempat."""
+        if path in self.diabaikan: return
+        while True:
+            sekarang = time.monotonic()
+            with self._kunci:
+                waktu = self.tertunda.get(path)
+                if waktu: waktu[1] = sekarang; return
+                if len(self.tertunda) < MAX_TERTUNDA_PANTAU: self.tertunda[path] = [sekarang, sekarang]; return
+            if not tunggu: self._tandai_semua(); return
+            if self.cancel_event.wait(INTERVAL_PANTAU): return
+
+    def _tandai_semua(self):
+        """Event hilang (antrian kernel/tertunda meluap): semua file di pohon ditandai ulang di thread sendiri agar pembaca
+        event tetap jalan. Permintaan yang datang selagi berjalan digabung jadi satu putaran ulang berikutnya."""
+        with self._kunci:
+            self.statistik["meluap"] += 1
+            if self._ulang_diminta: return
+            self._ulang_diminta = True; berjalan = self._ulang_berjalan; self._ulang_berjalan = True
+        if berjalan: return
+        def jalan():
+            while True:
+                with self._kunci:
+                    if not self._ulang_diminta or self.cancel_event.is_set(): self._ulang_berjalan = False; return
+                    self._ulang_diminta = False
+                for root in self.daftar_root:
+                    for folder, _, files in os.walk(root):
+                        if self.cancel_event.is_set(): break
+                        for nama in files: self._tandai(os.path.join(folder, nama), tunggu=True)
+        self.pengirim.kirim(EventStatus("Event terlewat (antrian meluap), seluruh folder terpantau diperiksa ulang."))
+        threading.Thread(target=jalan, daemon=True, name="pantau-ulang").start()
+
+    def _ambil_siap(self):
+        """Path yang sudah tenang JEDA_DEBOUNCE detik (atau menunggu lebih dari TUNDA_MAKSIMUM), sebanyak slot pool yang kosong."""
+        sekarang = time.monotonic(); siap = []
+        with self._kunci:
+            for path, (pertama, terakhir) in self.tertunda.items():
+                if sekarang - terakhir < JEDA_DEBOUNCE and sekarang - pertama < TUNDA_MAKSIMUM: continue
+                if not self._slot.acquire(blocking=False): break
+                siap.append(path)
+            for path in siap: del self.tertunda[path]
+        return siap
+
+    # --- PEMERIKSAAN FILE ---
+
+    def _koneksi(self):
+        conn = getattr(self._lokal, "conn", None)
+        if conn is None: conn = self._lokal.conn = self.scanner._create_connection()
+        return conn
+
+    def _catat(self, nama):
+        with self._kunci: self.statistik[nama] += 1
+
+    def _periksa(self, path):
+        """Tahapan yang sama dengan pindai_folder (ukuran -> cache -> blok awal -> hash penuh) untuk satu file."""
+        try:
+            scanner = self.scanner; conn = self._koneksi(); indeks = scanner._indeks # Gagal dimuat: dicoba lagi di putaran utama, bukan per file
+            try: st = os.stat(path)
+            except FileNotFoundError: return # Sudah dihapus/dipindah lagi sebelum sempat diperiksa
+            except OSError as e: self.pengirim.kirim(EventError("HASH", path, str(e))); return
+            if not stat.S_ISREG(st.st_mode): return
+            self._catat("file_diperiksa")
+            if indeks and not indeks.lolos_ukuran(st.st_size): self._catat("file_lewati_prefilter"); return
+            hasil = scanner._cari_cache(conn, st)
+            if hasil: self._catat("file_dari_cache")
+            else:
+                hasil = scanner._hitung_bertahap(path, st.st_size, indeks) if indeks and indeks.perlu_hash_awal(st.st_size) else scanner._hitung_hashes(path)
+                if hasil is LEWATI_HASH_AWAL: self._catat("file_lewati_prefilter"); return
+                if hasil[1] is not None:
+                    with self._kunci: self._cache_simpan[(st.st_dev, st.st_ino)] = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns, *hasil, time.time_ns())
+            hash_md5, hash_sha256 = hasil
+            if hash_sha256 is None: self.pengirim.kirim(EventError("HASH", path, hash_md5))
+            elif scanner._check_hash(conn, hash_md5, hash_sha256):
+                self._catat("terinfeksi")
+                self.pengirim.kirim(EventDeteksi(path, hash_sha256))
+        except Exception as e: self.pengirim.kirim(EventError("HASH", path, f"Gagal memeriksa file - {e}"))
+        finally:
+            self.pengirim.progres(); self._slot.release()
+            try: os.write(self._bangun_tulis, b"\0")
+            except BlockingIOError: pass # Pipe penuh: putaran utama memang sudah akan bangun
+
+    def _tulis_cache_tertunda(self):
+        """Menulis hasil hash yang terkumpul sejak putaran sebelumnya dalam satu transaksi (thread putaran utama)."""
+        with self._kunci: simpan = list(self._cache_simpan.values()); self._cache_simpan.clear()
+        if simpan and (conn := self._koneksi()): self.scanner._tulis_cache(conn, simpan, [])
+
+    # --- PUTARAN UTAMA ---
+
+    def jalankan(self):
+        """Berjalan sampai cancel_event disetel; event terakhir EventSelesai atau EventFatal."""
+        if not sys.platform.startswith("linux"): self.pengirim.kirim(EventFatal("Mode pantau hanya tersedia di Linux (inotify/fanotify).")); return
+        for root in self.daftar_root:
+            if not os.path.isdir(root): self.pengirim.kirim(EventFatal(f"Folder tidak ditemukan: {root}")); return
+        if self.scanner._muat_indeks() is None: self.pengirim.kirim(EventStatus("Indeks signature gagal dimuat, cek hash lewat query DB."))
+        try: jumlah_watch, detik = self.pasang()
+        except OSError as e: self.pengirim.kirim(EventFatal(f"Gagal memulai pemantauan: {e}")); return
+        self.statistik["detik_pasang_watch"] = round(detik, 3)
+        self.pengirim.kirim(EventStatus(f"Memantau {len(self.daftar_root)} folder lewat {self.sumber.nama}: {jumlah_watch} watch dipasang dalam {detik:.2f} detik."))
+        self._bangun_baca, self._bangun_tulis = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC) # Worker yang selesai membangunkan putaran utama
+        executor = ThreadPoolExecutor(max_workers=self.jumlah_worker, thread_name_prefix="pantau")
+        poller = select.poll(); poller.register(self.sumber.fd, select.POLLIN); poller.register(self._bangun_baca, select.POLLIN)
+        waktu_cek = waktu_cache = time.monotonic()
+        try:
+            while not self.cancel_event.is_set():
+                if time.monotonic() - waktu_cek >= INTERVAL_CEK_SIGNATURE:
+                    waktu_cek = time.monotonic()
+                    if self.scanner._indeks is None: cara = "dimuat ulang" if self.scanner._muat_indeks(self._koneksi()) is not None else None
+                    else: cara = self.scanner.sinkronkan_indeks(self._koneksi())
+                    if cara: self.pengirim.kirim(EventStatus(f"Tabel signatures berubah, indeks {cara}."))
+                if time.monotonic() - waktu_cache >= INTERVAL_TULIS_CACHE: waktu_cache = time.monotonic(); self._tulis_cache_tertunda()
+                siap = dict(poller.poll(INTERVAL_PANTAU * 1000))
+                if self._bangun_baca in siap:
+                    try: os.read(self._bangun_baca, UKURAN_BACA_EVENT)
+                    except BlockingIOError: pass
+                if self.sumber.fd in siap:
+                    for jenis, path in self.sumber.baca():
+                        self.statistik["event"] += 1
+                        if jenis == "file": self._tandai(path)
+                        elif jenis == "folder": self.statistik["jumlah_watch"] += self._pasang_pohon(path, True)
+                        elif jenis == "luap": self._tandai_semua()
+                        elif jenis == "hilang" and path in self.daftar_root: self.pengirim.kirim(EventError("PANTAU", path, "Folder terpantau dihapus atau dipindah"))
+                for path in self._ambil_siap(): executor.submit(self._periksa, path)
+            self.pengirim.kirim(EventStatistik(dict(self.statistik)))
+            self.pengirim.kirim(EventSelesai(self.statistik["file_diperiksa"], self.statistik["terinfeksi"], "Pemantauan dihentikan."))
+        except Exception as e: self.pengirim.kirim(EventFatal(f"Gagal saat memantau: {e}"))
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True); self._tulis_cache_tertunda() # Hasil worker terakhir tetap disimpan
+            self.sumber.tutup(); os.close(self._bangun_baca); os.close(self._bangun_tulis)
+
+def pantau_folder(scanner, daftar_root, progress_queue, cancel_event, backend="inotify", jumlah_worker=None):
+    """Memantau daftar_root secara real-time (lihat Pemantau). Dipanggil di thread sendiri seperti Scanner.pindai_folder."""
+    Pemantau(scanner, daftar_root, progress_queue, cancel_event, backend, jumlah_worker).jalankan()
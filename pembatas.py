@@ -0,0 +1,156 @@
+# File: pembatas.py
+# Mode hemat untuk server produksi: batas laju baca (byte/s) & file/s dengan token bucket, prioritas CPU/I/O
+# thread pemindai diturunkan (nice/ioprio), dan laju otomatis diturunkan saat beban sistem atau antrian disk tinggi.
+
+import ctypes
+import ctypes.util
+import os
+import platform
+import threading
+import time
+
+# --- KONFIGURASI ---
+LAJU_BYTE_HEMAT = 20 << 20 # Batas baca mode hemat (byte/detik, 20 MiB/s)
+LAJU_FILE_HEMAT = 500 # Batas file/detik mode hemat
+NICE_HEMAT = 10 # Nilai nice thread pemindai (0 = tidak diubah)
+IOPRIO_IDLE = True # Linux: kelas I/O "idle" (hanya membaca saat disk tidak dipakai proses lain)
+AMBANG_BEBAN = 1.0 # Load average 1 menit per CPU di atas ini = sistem sibuk
+AMBANG_ANTRIAN_DISK = 2.0 # Rata-rata permintaan I/O dalam antrian disk (dari /proc/diskstats) di atas ini = disk sibuk
+INTERVAL_ADAPTASI = 1.0 # Detik antar pengecekan beban sistem
+FAKTOR_MUNDUR = 0.5 # Laju dikali faktor ini tiap interval selama sistem sibuk...
+FAKTOR_PULIH = 1.25 # ...dan dinaikkan kembali dengan faktor ini saat sistem longgar (maksimum laju yang dikonfigurasi)
+FAKTOR_MINIMUM = 0.05 # Laju tidak pernah turun di bawah 5% dari konfigurasi
+INTERVAL_LAPOR_LAJU = 2.0 # Detik antar EventLaju selama pemindaian
+
+_SYSCALL_IOPRIO_SET = {"x86_64": 251, "amd64": 251, "aarch64": 30, "arm64": 30, "i386": 289, "i686": 289}
+IOPRIO_WHO_PROCESS, IOPRIO_KELAS_IDLE, IOPRIO_KELAS_SHIFT = 1, 3, 13
+
+def turunkan_prioritas(nice=NICE_HEMAT, io_idle=IOPRIO_IDLE):
+    """
+    Menurunkan prioritas CPU & I/O THREAD pemanggil (di Linux nice/ioprio berlaku per thread, GUI tidak ikut melambat).
+    Tidak bisa dinaikkan kembali tanpa hak root, jadi hanya dipanggil di thread milik pemindaian. Gagal = diabaikan.
+    """
+    tid = threading.get_native_id() if hasattr(threading, "get_native_id") else 0
+    if nice and hasattr(os, "setpriority"):
+        try: os.setpriority(os.PRIO_PROCESS, tid, min(19, os.getpriority(os.PRIO_PROCESS, tid) + nice))
+        except OSError: pass
+    nomor = _SYSCALL_IOPRIO_SET.get(platform.machine().lower())
+    if io_idle and nomor and os.name == "posix":
+        try: ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True).syscall(nomor, IOPRIO_WHO_PROCESS, tid, IOPRIO_KELAS_IDLE << IOPRIO_KELAS_SHIFT)
+        except (OSError, AttributeError): pass
+
+def _perangkat_blok(path):
+    """Nama disk (mis. 'sda') tempat path berada, untuk membaca /proc/diskstats. None jika tidak diketahui (overlay, Windows)."""
+    try:
+        st = os.stat(path)
+        target = os.path.realpath(f"/sys/dev/block/{os.major(st.st_dev)}:{os.minor(st.st_dev)}")
+    except (OSError, AttributeError): return None
+    if not os.path.exists(target): return None
+    return os.path.basename(os.path.dirname(target)) if os.path.exists(os.path.join(target, "partition")) else os.path.basename(target)
+
+def _baca_diskstats():
+    """{nama disk: total milidetik tertimbang I/O dalam antrian} untuk disk fisik."""
+    hasil = {}
+    try:
+        with open("/proc/diskstats") as f:
+            for baris in f:
+                kolom = baris.split()
+                if len(kolom) >= 14 and not kolom[2].startswith(("loop", "ram", "zram")): hasil[kolom[2]] = int(kolom[13])
+    except OSError: pass
+    return hasil
+
+class EmberToken:
+    """
+    Token bucket dengan utang: ambil(n) langsung mengurangi token (boleh negatif untuk blok besar) lalu tidur
+    sampai utangnya terbayar, sehingga laju rata-rata = laju tanpa harus memecah blok. Aman dipakai banyak thread.
+    """
+    def __init__(self, laju, kapasitas=None):
+        self.laju = float(laju); self.kapasitas = float(kapasitas or laju) # Default: ledakan maksimal 1 detik
+        self.token = self.kapasitas; self._waktu = time.monotonic(); self._kunci = threading.Lock()
+
+    def ambil(self, n, batal=None):
+        """Memakai n token; mengembalikan detik menunggu. batal (threading.Event) memotong penantian."""
+        with self._kunci:
+            sekarang = time.monotonic()
+            self.token = min(self.kapasitas, self.token + (sekarang - self._waktu) * self.laju); self._waktu = sekarang
+            self.token -= n; tunggu = -self.token / self.laju if self.token < 0 else 0.0
+        if tunggu > 0:
+            if batal is not None: batal.wait(tunggu)
+            else: time.sleep(tunggu)
+        return tunggu
+
+class PembatasLaju:
+    """
+    Batas laju satu pemindaian: byte/detik (dipanggil per blok baca) dan file/detik (per file). 0/None = tanpa batas.
+    Setiap INTERVAL_ADAPTASI detik laju efektif = laju konfigurasi x faktor, dengan faktor turun (FAKTOR_MUNDUR) saat
+    load average atau antrian disk tinggi dan naik lagi (FAKTOR_PULIH) saat longgar.
+    """
+    def __init__(self, byte_per_detik=LAJU_BYTE_HEMAT, file_per_detik=LAJU_FILE_HEMAT, prioritas_rendah=True, adaptif=True, path=None, batal=None):
+        self.byte_per_detik = byte_per_detik or 0; self.file_per_detik = file_per_detik or 0
+        self.prioritas_rendah = prioritas_rendah; self.adaptif = adaptif; self.batal = batal
+        self._ember_byte = EmberToken(self.byte_per_detik) if self.byte_per_detik else None
+        self._ember_file = EmberToken(self.file_per_detik) if self.file_per_detik else None
+        self.faktor = 1.0; self.alasan = ""; self._disk = _perangkat_blok(path) if path else None
+        self._kunci = threading.Lock(); self._waktu_mulai = self._waktu_adaptasi = self._waktu_lapor = time.monotonic(); self._diskstats = _baca_diskstats()
+        self.byte = self.file = 0; self.detik_tunggu = 0.0; self._byte_lapor = self._file_lapor = 0
+
+    def konfigurasi(self, bagi=1):
+        """Argumen untuk membuat PembatasLaju setara di proses lain; laju dibagi `bagi` (jumlah proses worker)."""
+        return {"byte_per_detik": self.byte_per_detik / bagi, "file_per_detik": self.file_per_detik / bagi,
+                "prioritas_rendah": self.prioritas_rendah, "adaptif": self.adaptif}
+
+    def uraian(self):
+        mb = f"{self.byte_per_detik / 1048576:g} MB/s" if self.byte_per_detik else "tanpa batas MB/s"
+        fps = f"{self.file_per_detik:g} file/s" if self.file_per_detik else "tanpa batas file/s"
+        return f"Mode hemat: maks {mb}, {fps}{', prioritas CPU/I/O rendah' if self.prioritas_rendah else ''}{', menyesuaikan beban sistem' if self.adaptif else ''}."
+
+    def siapkan_thread(self):
+        """Initializer thread pemindai (ThreadPoolExecutor/penjelajah)."""
+        if self.prioritas_rendah: turunkan_prioritas()
+
+    def _ukur_beban(self, selang):
+        """(sibuk?, alasan) dari load average per CPU dan rata-rata antrian disk selama `selang` detik terakhir."""
+        alasan = []
+        try:
+            beban = os.getloadavg()[0] / (os.cpu_count() or 1)
+            if beban > AMBANG_BEBAN: alasan.append(f"beban CPU {beban:.2f}/inti")
+        except (OSError, AttributeError): pass
+        sekarang = _baca_diskstats(); selang_ms = max(selang, 1e-3) * 1000
+        antrian = {nama: (ms - self._diskstats.get(nama, ms)) / selang_ms for nama, ms in sekarang.items()}
+        self._diskstats = sekarang
+        kedalaman = antrian.get(self._disk) if self._disk in antrian else max(antrian.values(), default=0.0)
+        if kedalaman > AMBANG_ANTRIAN_DISK: alasan.append(f"antrian disk {kedalaman:.1f}")
+        return bool(alasan), ", ".join(alasan)
+
+    def _adaptasi(self):
+        with self._kunci:
+            sekarang = time.monotonic()
+            if not self.adaptif or sekarang - self._waktu_adaptasi < INTERVAL_ADAPTASI: return
+            sibuk, self.alasan = self._ukur_beban(sekarang - self._waktu_adaptasi); self._waktu_adaptasi = sekarang
+            self.faktor = max(FAKTOR_MINIMUM, self.faktor * FAKTOR_MUNDUR) if sibuk else min(1.0, self.faktor * FAKTOR_PULIH)
+            if self._ember_byte: self._ember_byte.laju = self.byte_per_detik * self.faktor
+            if self._ember_file: self._ember_file.laju = self.file_per_detik * self.faktor
+
+    def byte_dibaca(self, n):
+        """Dipanggil mesin baca per blok; menunggu jika laju byte terlampaui."""
+        self.byte += n # Penghitung kasar untuk laporan, tanpa kunci (cukup akurat untuk laju)
+        if self._ember_byte: self.detik_tunggu += self._ember_byte.ambil(n, self.batal)
+
+    def file_diproses(self):
+        """Dipanggil sekali per file sebelum diperiksa; menunggu jika laju file terlampaui."""
+        self.file += 1; self._adaptasi()
+        if self._ember_file: self.detik_tunggu += self._ember_file.ambil(1, self.batal)
+
+    def laporan(self, akhir=False):
+        """dict laju target & tercapai sejak laporan sebelumnya jika INTERVAL_LAPOR_LAJU terlewati, selain itu None.
+        akhir=True: selalu dikembalikan, laju tercapai = rata-rata seluruh pemindaian."""
+        sekarang = time.monotonic(); selang = sekarang - self._waktu_lapor
+        if not akhir and selang < INTERVAL_LAPOR_LAJU: return None
+        byte, file = self.byte, self.file
+        if akhir: selang = sekarang - self._waktu_mulai; self._byte_lapor = self._file_lapor = 0
+        selang = max(selang, 1e-9)
+        hasil = {"target_byte_per_detik": round(self.byte_per_detik * self.faktor), "target_file_per_detik": round(self.file_per_detik * self.faktor, 1),
+                 "byte_per_detik": round((byte - self._byte_lapor) / selang), "file_per_detik": round((file - self._file_lapor) / selang, 1),
+                 "faktor": round(self.faktor, 3), "alasan": self.alasan}
+        self._waktu_lapor = sekarang; self._byte_lapor = byte; self._file_lapor = file
+        return hasil
@@ -0,0 +1,123 @@
+# File: penyimpanan_indeks.py
+# Format file indeks signature (sidecar "<db>-indeks") yang dibaca lewat mmap oleh IndeksSignature.
+# Isi: beberapa array kunci biner berlebar tetap yang terurut (lookup dengan binary search),
+# opsional hitungan per kunci dan Bloom filter di depan array digest.
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+# --- KONFIGURASI ---
+BLOOM_BIT_PER_ENTRI = 10 # Bit Bloom filter per digest (~1% positif palsu dengan 4 hash); 0 = tanpa Bloom filter
+
+MAGIC = b"KSSIDX01"
+_KEPALA = struct.Struct("<8sQ") # MAGIC, offset header JSON (ditulis di akhir file)
+_HASH_BLOOM = struct.Struct("<4I") # 4 posisi bit diambil langsung dari 16 byte pertama digest (sudah acak merata)
+
+_UKURAN = struct.Struct(">Q")
+kunci_ukuran = _UKURAN.pack # Ukuran file -> kunci 8 byte big-endian (urutan byte = urutan angka)
+
+def kunci_hash_awal(ukuran, digest_awal):
+    """(ukuran, digest MD5 blok awal) -> kunci 24 byte."""
+    return _UKURAN.pack(ukuran) + digest_awal
+
+class LarikTerurut:
+    """Kunci biner berlebar tetap, terurut naik, di dalam buffer (bytes atau mmap); hitungan opsional per kunci."""
+    def __init__(self, buffer, offset, lebar, jumlah, hitungan=None, bloom=None, bit_bloom=0):
+        self.buffer = buffer; self.offset = offset; self.lebar = lebar; self.jumlah = jumlah
+        self.hitungan = hitungan; self.bloom = bloom; self.bit_bloom = bit_bloom
+
+    def __len__(self): return self.jumlah
+
+    def _posisi(self, kunci):
+        """Indeks kunci di array, atau -1."""
+        if self.bloom is not None:
+            for posisi in _HASH_BLOOM.unpack_from(kunci):
+                posisi %= self.bit_bloom
+                if not self.bloom[posisi >> 3] & (1 << (posisi & 7)): return -1
+        buffer = self.buffer; awal = self.offset; lebar = self.lebar; bawah = 0; atas = self.jumlah
+        while bawah < atas:
+            tengah = (bawah + atas) // 2; o = awal + tengah * lebar
+            if buffer[o:o + lebar] < kunci: bawah = tengah + 1
+            else: atas = tengah
+        o = awal + bawah * lebar
+        return bawah if bawah < self.jumlah and buffer[o:o + lebar] == kunci else -1
+
+    def __contains__(self, kunci): return self._posisi(kunci) >= 0
+
+    def hitung(self, kunci):
+        """Jumlah kemunculan kunci (0 jika tidak ada)."""
+        posisi = self._posisi(kunci)
+        if posisi < 0: return 0
+        return self.hitungan[posisi] if self.hitungan is not None else 1
+
+_LARIK_KOSONG = LarikTerurut(b"", 0, 1, 0)
+
+class BerkasIndeks:
+    """Hasil baca file indeks: revisi tabel signatures yang diwakilinya, metadata, dan LarikTerurut per bagian."""
+    def __init__(self, revisi, meta, bagian, buffer=None):
+        self.revisi = revisi; self.meta = meta; self.bagian = bagian; self._buffer = buffer # Menjaga mmap tetap hidup
+
+    def __getitem__(self, nama):
+        larik = self.bagian.get(nama)
+        return _LARIK_KOSONG if larik is None else larik
+
+def _rata_8(f):
+    sisa = -f.tell() % 8
+    if sisa: f.write(b"\0" * sisa)
+
+def tulis_indeks(f, revisi, bagian, meta=None):
+    """
+    Menulis file indeks ke f (biner, bisa di-seek). bagian: {nama: (lebar, jumlah, potongan, berhitung, pakai_bloom)}.
+    potongan = iterable list baris yang TERURUT naik: kunci bytes, atau (kunci, hitungan) jika berhitung.
+    jumlah hanya dipakai untuk ukuran Bloom filter.
+    """
+    f.write(_KEPALA.pack(MAGIC, 0))
+    kepala = {"revisi": revisi, "meta": meta or {}, "urutan_byte": sys.byteorder, "bagian": {}}
+    for nama, (lebar, jumlah, potongan, berhitung, pakai_bloom) in bagian.items():
+        _rata_8(f); info = {"lebar": lebar, "jumlah": 0, "kunci": f.tell(), "hitungan": None, "bloom": None}
+        hitungan = array("I") if berhitung else None
+        bit_bloom = max(64, jumlah * BLOOM_BIT_PER_ENTRI) if pakai_bloom and BLOOM_BIT_PER_ENTRI and lebar >= _HASH_BLOOM.size else 0
+        bloom = bytearray((bit_bloom + 7) // 8) if bit_bloom else None
+        for baris in potongan:
+            if berhitung: kunci = [k for k, _ in baris]; hitungan.extend(n for _, n in baris)
+            else: kunci = baris
+            data = b"".join(kunci)
+            if len(data) != lebar * len(kunci): raise ValueError(f"Ada kunci dengan panjang selain {lebar} byte di bagian {nama}")
+            if bloom is not None:
+                for k in kunci:
+                    for posisi in _HASH_BLOOM.unpack_from(k):
+                        posisi %= bit_bloom; bloom[posisi >> 3] |= 1 << (posisi & 7)
+            f.write(data); info["jumlah"] += len(kunci)
+        if hitungan is not None: _rata_8(f); info["hitungan"] = f.tell(); hitungan.tofile(f)
+        if bloom is not None: info["bloom"] = {"offset": f.tell(), "bit": bit_bloom}; f.write(bloom)
+        kepala["bagian"][nama] = info
+    _rata_8(f); offset_kepala = f.tell()
+    f.write(json.dumps(kepala).encode("utf-8"))
+    f.seek(0); f.write(_KEPALA.pack(MAGIC, offset_kepala)); f.seek(0, 2)
+
+def baca_indeks(buffer):
+    """Membaca file indeks dari buffer (bytes atau mmap) tanpa menyalin isinya. ValueError jika rusak/format lain."""
+    if len(buffer) < _KEPALA.size: raise ValueError("File indeks terlalu pendek")
+    magic, offset_kepala = _KEPALA.unpack_from(buffer)
+    if magic != MAGIC: raise ValueError("Bukan file indeks signature")
+    kepala = json.loads(bytes(buffer[offset_kepala:]).decode("utf-8"))
+    if kepala.get("urutan_byte") != sys.byteorder: raise ValueError("File indeks dibuat di mesin dengan urutan byte berbeda")
+    tampilan = memoryview(buffer); bagian = {}
+    for nama, info in kepala["bagian"].items():
+        n = info["jumlah"]
+        hitungan = tampilan[info["hitungan"]:info["hitungan"] + 4 * n].cast("I") if info["hitungan"] is not None else None
+        bloom = info["bloom"]
+        bagian[nama] = LarikTerurut(buffer, info["kunci"], info["lebar"], n, hitungan,
+                                    tampilan[bloom["offset"]:bloom["offset"] + (bloom["bit"] + 7) // 8] if bloom else None, bloom["bit"] if bloom else 0)
+    return BerkasIndeks(kepala["revisi"], kepala["meta"], bagian, buffer)
+
+def buka_indeks(path):
+    """Memetakan file indeks ke memori (hanya baca). None jika file tidak ada atau tidak valid."""
+    try:
+        with open(path, "rb") as f: buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError): return None # ValueError: file kosong
+    try: return baca_indeks(buffer)
+    except (ValueError, KeyError, TypeError, struct.error) as e: print(f"File indeks {path} diabaikan: {e}"); return None
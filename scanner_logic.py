@@ -1,12 +1,223 @@
 # File: scanner_logic.py
+# Bisa dijalankan tanpa GUI: python -m scanner_logic [--db FILE] scan PATH [--workers N | --proses N] [--hemat] [--metrik] [--kecuali GLOB]
+#                            python -m scanner_logic [--db FILE] scan [PATH] --lanjutkan
+#                            python -m scanner_logic [--db FILE] watch PATH... [--backend inotify|fanotify]
+#                            python -m scanner_logic [--db FILE] daemon [--socket PATH]  /  klien PATH... [--socket PATH]
+#                            python -m scanner_logic [--db FILE] distribusi manifest|kerjakan|status|gabung|lokal ...
+#                            python -m scanner_logic [--db FILE] import FEED [--format teks|csv|jsonl] [--versi N]
+#                            python -m scanner_logic [--db FILE] delta FILE.delta...
 
+import argparse
+import csv
 import hashlib
+import io
+import json
+import mmap
+import multiprocessing
 import os
+import queue
+import re
 import sqlite3
+import sys
 import threading # Diperlukan untuk Event di _check_hash
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from event_pindai import (EVENT_AKHIR, EventDeteksi, EventDibatalkan, EventError, EventFatal, EventLaju, EventMetrik, EventSelesai,
+                          EventStatistik, EventStatus, EventTotal, PengirimEvent, buat_antrian_event, ke_dict)
+from aturan_pindai import FILE_ATURAN, AturanPindai, baca_aturan, uraian_lewati
+from metrik import MetrikPindai
+from pembatas import LAJU_BYTE_HEMAT, LAJU_FILE_HEMAT, PembatasLaju
+from penyimpanan_indeks import BerkasIndeks, baca_indeks, buka_indeks, kunci_hash_awal, kunci_ukuran, tulis_indeks
 
 # --- KONFIGURASI (Bisa dipindahkan ke file config.py nanti) ---
 DATABASE_FILE = "antivirus.db"
+MAX_SCAN_WORKERS = min(8, os.cpu_count() or 1) # Jumlah thread hashing default (hashlib melepas GIL)
+MAX_CACHE_ENTRI = 1_000_000 # Batas baris tabel scan_cache, entri yang paling lama tidak terlihat dibuang duluan
+BATAS_ANTRIAN_JELAJAH = 256 # Jumlah batch direktori yang boleh dijelajahi mendahului hashing
+INTERVAL_PERKIRAAN = 0.5 # Detik antar pesan TOTAL_FILES_PERKIRAAN selama penjelajahan
+INTERVAL_CHECKPOINT = 5.0 # Detik antar penulisan checkpoint pemindaian (posisi & penghitung) ke database
+BATCH_TULIS_CACHE = 500 # Jumlah perubahan scan_cache yang dikumpulkan sebelum ditulis dalam satu transaksi
+UKURAN_BLOK_AWAL = 4096 # Byte awal file yang di-hash (MD5) untuk prefilter tahap 2
+BATCH_HASIL_PROSES = 256 # Mode multi-proses: jumlah file per batch hasil yang dikirim worker ke proses induk
+BATCH_IMPOR = 50_000 # Baris per transaksi saat impor massal; pembaca (pemindaian) tetap jalan berkat WAL
+UKURAN_HALAMAN_DB = 500 # Baris per halaman saat menelusuri tabel signatures (ambil_halaman_signature)
+EKSTENSI_DELTA = ".delta" # Ekstensi file delta signature (lihat Scanner._baca_delta)
+SIMPAN_RIWAYAT_DELTA = 64 # Jumlah delta terakhir yang perubahannya disimpan agar proses lain bisa menambal indeksnya tanpa muat ulang
+MESIN_BACA = "otomatis" # Cara membaca file untuk hashing: "otomatis", "buffer", "mmap" atau "lama" (loop read 4 KiB)
+UKURAN_BUFFER_BACA = 1 << 20 # Buffer readinto per thread (1 MiB)
+AMBANG_MMAP = 64 << 20 # Mode otomatis: file sebesar ini ke atas dibaca lewat mmap
+FADVISE_DONTNEED = True # Buang halaman file dari page cache setelah di-hash agar pemindaian tidak menggusur cache lain
+
+# Hasil pengganti (md5, sha256) untuk file yang disaring prefilter, pasti bersih tanpa hashing penuh
+LEWATI_UKURAN = ("LEWATI_UKURAN", None)
+LEWATI_HASH_AWAL = ("LEWATI_HASH_AWAL", None)
+
+# ======================================================================
+# --- MESIN BACA FILE UNTUK HASHING ---
+# ======================================================================
+_lokal_baca = threading.local() # Buffer readinto dipakai ulang per thread (hashing berjalan paralel)
+
+def _pilih_mesin_baca(ukuran):
+    if MESIN_BACA != "otomatis": return MESIN_BACA
+    return "mmap" if ukuran >= AMBANG_MMAP else "buffer"
+
+def _fadvise(fd, saran):
+    """posix_fadvise jika tersedia (Linux/BSD); hanya petunjuk, kegagalan diabaikan."""
+    if not hasattr(os, "posix_fadvise"): return
+    try: os.posix_fadvise(fd, 0, 0, saran)
+    except OSError: pass
+
+# Semua mesin menerima `batas`: fungsi opsional yang dipanggil dengan jumlah byte per blok (mode hemat, lihat pembatas.py),
+# dan `metrik`: MetrikPindai opsional untuk memisahkan waktu baca dari waktu hash
+def _baca_lama(f, ukuran, hashes, batas=None, metrik=None):
+    while True:
+        t0 = time.perf_counter_ns() if metrik else 0
+        chunk = f.read(4096)
+        if metrik: t1 = time.perf_counter_ns(); metrik.waktu("baca", t1 - t0)
+        if not chunk: return
+        if batas: batas(len(chunk))
+        for h in hashes: h.update(chunk)
+        if metrik: metrik.waktu("hash", time.perf_counter_ns() - t1)
+
+def _baca_buffer(f, ukuran, hashes, batas=None, metrik=None):
+    """readinto ke buffer yang sudah dialokasikan; tidak ada objek bytes baru per blok."""
+    buffer = getattr(_lokal_baca, "buffer", None)
+    if buffer is None: buffer = _lokal_baca.buffer = bytearray(UKURAN_BUFFER_BACA)
+    with memoryview(buffer) as mv:
+        while True:
+            t0 = time.perf_counter_ns() if metrik else 0
+            n = f.readinto(mv)
+            if metrik: t1 = time.perf_counter_ns(); metrik.waktu("baca", t1 - t0)
+            if not n: return
+            if batas: batas(n)
+            with mv[:n] as blok:
+                for h in hashes: h.update(blok)
+            if metrik: metrik.waktu("hash", time.perf_counter_ns() - t1)
+
+def _baca_mmap(f, ukuran, hashes, batas=None, metrik=None):
+    """Memetakan file ke memori lalu meng-hash per UKURAN_BUFFER_BACA (tanpa salinan ke user space)."""
+    if ukuran == 0: return
+    t0 = time.perf_counter_ns() if metrik else 0
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        if hasattr(m, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"): m.madvise(mmap.MADV_SEQUENTIAL)
+        with memoryview(m) as mv:
+            for awal in range(0, len(m), UKURAN_BUFFER_BACA):
+                with mv[awal:awal + UKURAN_BUFFER_BACA] as blok:
+                    if batas: batas(len(blok)) # Halaman dibaca dari disk saat disentuh hashing, jadi dibatasi sebelum update
+                    for h in hashes: h.update(blok)
+    if metrik: metrik.waktu("hash", time.perf_counter_ns() - t0) # Baca (page fault) tidak terpisah dari hash
+
+MESIN_BACA_TERSEDIA = {"lama": _baca_lama, "buffer": _baca_buffer, "mmap": _baca_mmap}
+
+# ======================================================================
+# --- INDEKS SIGNATURE DI MEMORI ---
+# ======================================================================
+class IndeksSignature:
+    """
+    Digest mentah (bytes) MD5 & SHA256 untuk lookup tanpa akses DB, plus ukuran file & hash blok awal per signature
+    untuk prefilter sebelum hashing penuh. Isi utama adalah BerkasIndeks (array terurut, biasanya mmap dari file
+    sidecar); perubahan setelah dimuat (tambah/hapus) dicatat di lapisan kecil di atasnya.
+    """
+    def __init__(self, dasar=None):
+        self.dasar = dasar or BerkasIndeks(0, {}, {})
+        self.md5_tambah = set(); self.md5_hapus = set(); self.sha256_tambah = set(); self.sha256_hapus = set()
+        self.delta = Counter() # (bagian, kunci) -> selisih hitungan terhadap dasar
+        self.jumlah_tanpa_ukuran = self.dasar.meta.get("jumlah_tanpa_ukuran", 0) # Signature tanpa ukuran; selama > 0 prefilter ukuran nonaktif
+        self.revisi = self.dasar.revisi # Revisi tabel signatures yang diwakili isi indeks (dasar + tambalan); lihat Scanner.sinkronkan_indeks
+
+    def __len__(self): return len(self.dasar["sha256"]) + len(self.sha256_tambah) - len(self.sha256_hapus)
+
+    def _ada(self, nama, digest, tambah, hapus):
+        return digest in tambah or (digest not in hapus and digest in self.dasar[nama])
+
+    def _hitung(self, nama, kunci):
+        return self.dasar[nama].hitung(kunci) + self.delta[(nama, kunci)]
+
+    def _ubah(self, digest_md5, digest_sha256, ukuran, digest_awal, delta):
+        for nama, digest, tambah, hapus in (("md5", digest_md5, self.md5_tambah, self.md5_hapus), ("sha256", digest_sha256, self.sha256_tambah, self.sha256_hapus)):
+            if delta > 0:
+                if digest in hapus: hapus.discard(digest)
+                elif digest not in self.dasar[nama]: tambah.add(digest)
+            elif digest in tambah: tambah.discard(digest)
+            elif digest in self.dasar[nama]: hapus.add(digest)
+        if ukuran is None: self.jumlah_tanpa_ukuran += delta; return
+        for kunci in (("ukuran", kunci_ukuran(ukuran)), ("hash_awal", kunci_hash_awal(ukuran, digest_awal)) if digest_awal else ("ukuran_tanpa_hash_awal", kunci_ukuran(ukuran))):
+            self.delta[kunci] += delta
+            if not self.delta[kunci]: del self.delta[kunci]
+
+    def tambah(self, digest_md5, digest_sha256, ukuran=None, digest_awal=None):
+        """Menambahkan satu signature (digest bytes, seperti tersimpan di tabel signatures)."""
+        self._ubah(digest_md5, digest_sha256, ukuran, digest_awal, 1)
+
+    def hapus(self, digest_md5, digest_sha256, ukuran=None, digest_awal=None):
+        """Membuang satu signature (digest bytes) dari indeks (jika ada)."""
+        self._ubah(digest_md5, digest_sha256, ukuran, digest_awal, -1)
+
+    def lolos_ukuran(self, ukuran):
+        """Tahap 1: False jika tidak ada signature dengan ukuran ini (file pasti bersih)."""
+        return self.jumlah_tanpa_ukuran > 0 or self._hitung("ukuran", kunci_ukuran(ukuran)) > 0
+
+    def perlu_hash_awal(self, ukuran):
+        """True jika tahap 2 (hash blok awal) bisa menyaring file berukuran ini."""
+        return self.jumlah_tanpa_ukuran == 0 and ukuran > UKURAN_BLOK_AWAL and self._hitung("ukuran_tanpa_hash_awal", kunci_ukuran(ukuran)) <= 0
+
+    def lolos_hash_awal(self, ukuran, hash_awal):
+        """Tahap 2: False jika hash blok awal tidak cocok dengan signature berukuran sama."""
+        try: return self._hitung("hash_awal", kunci_hash_awal(ukuran, bytes.fromhex(hash_awal))) > 0
+        except (ValueError, TypeError): return True # Ragu -> lanjut ke hash penuh
+
+    def cocok(self, hash_md5, hash_sha256):
+        """True jika SALAH SATU hash hex ada di indeks."""
+        try: return self._ada("md5", bytes.fromhex(hash_md5), self.md5_tambah, self.md5_hapus) or self._ada("sha256", bytes.fromhex(hash_sha256), self.sha256_tambah, self.sha256_hapus)
+        except (ValueError, TypeError): return False
+
+# ======================================================================
+# --- POSISI CHECKPOINT PEMINDAIAN ---
+# ======================================================================
+class PosisiCheckpoint:
+    """
+    Posisi pemindaian berurutan untuk tabel checkpoint_pindai (dipakai Scanner.pindai_folder mode thread): file atau
+    folder gagal terakhir yang selesai diproses, deteksi sejak tulisan terakhir, dan kapan checkpoint berikutnya ditulis.
+    """
+    def __init__(self, scanner, conn, folder_path):
+        self.scanner = scanner; self.conn = conn; self.folder = os.path.abspath(folder_path)
+        self.data = {"folder": self.folder, "mulai": time.time()}; self.deteksi_baru = []
+        self.terakhir = None; self.terakhir_folder = False; self.batas = time.monotonic() + INTERVAL_CHECKPOINT
+
+    def mulai(self, lanjutkan, pengirim):
+        """
+        lanjutkan: memuat checkpoint folder ini, mengirim ulang deteksi & progresnya, lalu mengembalikan dict-nya
+        (penghitung + 'lanjut_dari', kunci _kunci_posisi untuk _jelajahi_folder). Selain itu checkpoint lama dihapus, None.
+        """
+        lama = self.scanner._baca_checkpoint(self.conn, self.folder, deteksi=True) if lanjutkan else None
+        if not lama:
+            if lanjutkan: pengirim.kirim(EventStatus("Tidak ada checkpoint untuk folder ini, pemindaian dimulai dari awal."))
+            self.scanner._hapus_checkpoint(self.conn, self.folder); return None
+        self.data = lama; self.terakhir = lama["path_terakhir"]; self.terakhir_folder = lama["terakhir_folder"]
+        pengirim.kirim(EventStatus(f"Melanjutkan checkpoint {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(lama['diperbarui']))}: {lama['dipindai']} file sudah dipindai "
+                                   f"({lama['terinfeksi']} terinfeksi, {lama['jumlah_error']} error), lanjut setelah {self.terakhir}."))
+        for path, sha256 in lama["deteksi"]: pengirim.kirim(EventDeteksi(path, sha256)) # Daftar deteksi tetap lengkap
+        pengirim.progres(lama["dipindai"])
+        return dict(lama, lanjut_dari=self.scanner._kunci_posisi(self.folder, self.terakhir, self.terakhir_folder))
+
+    def catat(self, path, folder=False):
+        """Entri `path` selesai diproses (folder=True: folder yang gagal dibuka)."""
+        self.terakhir = path; self.terakhir_folder = folder
+
+    def deteksi(self, path, sha256): self.deteksi_baru.append((os.path.abspath(path), sha256))
+
+    def jatuh_tempo(self): return time.monotonic() >= self.batas
+
+    def simpan(self, dipindai, terinfeksi, jumlah_error):
+        """Menulis checkpoint jika sudah ada posisi; dipanggil berkala & sebelum event penutup batal/fatal. True jika tertulis."""
+        self.batas = time.monotonic() + INTERVAL_CHECKPOINT
+        if self.terakhir is None: return False
+        self.data.update(path_terakhir=os.path.abspath(self.terakhir), terakhir_folder=self.terakhir_folder, dipindai=dipindai, terinfeksi=terinfeksi, jumlah_error=jumlah_error)
+        return self.scanner._tulis_checkpoint(self.conn, self.data, self.deteksi_baru)
+
+    def hapus(self): self.scanner._hapus_checkpoint(self.conn, self.folder)
 
 # ======================================================================
 # --- KELAS LOGIKA PEMINDAI (Mesin) ---
@@ -14,57 +225,314 @@ DATABASE_FILE = "antivirus.db"
 class Scanner:
     def __init__(self, db_path=DATABASE_FILE): # Beri nilai default
         self.db_path = db_path
+        self._indeks = None # IndeksSignature, dimuat malas & dipakai bersama antar pemindaian
+        self._kunci_indeks = threading.Lock()
+        self.statistik_terakhir = {} # Penghitung prefilter/cache dari pemindaian terakhir
+        self.metrik = None # MetrikPindai pemindaian yang sedang/terakhir berjalan dengan metrik aktif (lihat snapshot_metrik)
         self._init_db()
 
     def _create_connection(self):
         """Menciptakan koneksi BARU ke database. Wajib untuk tiap thread."""
         try:
-            return sqlite3.connect(self.db_path, timeout=10)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA synchronous = NORMAL") # Aman untuk WAL, commit tidak perlu fsync tiap transaksi
+            return conn
         except Exception as e:
             print(f"FATAL DB ERROR: {e}")
             return None
 
     def _init_db(self):
-        """Membuat tabel 'signatures' dengan kolom md5 DAN sha256 jika belum ada."""
+        """Membuat tabel 'signatures' (md5, sha256, ukuran, hash_awal) jika belum ada & memigrasi skema lama."""
         conn = self._create_connection()
         if not conn: return
+        perlu_vacuum = False
         try:
+            # WAL: pemindaian tetap bisa membaca selama impor/penulisan berjalan (setelan permanen di file DB)
+            try: conn.execute("PRAGMA journal_mode = WAL")
+            except sqlite3.OperationalError as e: print(f"Gagal mengaktifkan mode WAL: {e}")
             with conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS signatures (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        md5 TEXT NOT NULL UNIQUE,
-                        sha256 TEXT NOT NULL UNIQUE,
-                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                        md5 BLOB NOT NULL UNIQUE,
+                        sha256 BLOB NOT NULL UNIQUE,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        ukuran INTEGER,
+                        hash_awal BLOB
+                    )
+                """)
+                # Migrasi DB lama: kolom prefilter ditambahkan kosong (NULL), diisi saat hash ditambah ulang atau terdeteksi
+                kolom = {row[1]: row[2].upper() for row in cursor.execute("PRAGMA table_info(signatures)")}
+                if "ukuran" not in kolom: cursor.execute("ALTER TABLE signatures ADD COLUMN ukuran INTEGER")
+                if "hash_awal" not in kolom: cursor.execute("ALTER TABLE signatures ADD COLUMN hash_awal BLOB")
+                if kolom["md5"] == "TEXT": self._migrasi_signature_blob(conn); perlu_vacuum = True
+                # Perbaikan: tambah_hash lama menulis hash_awal sebagai hex teks saat melengkapi baris tanpa ukuran
+                if cursor.execute("SELECT 1 FROM signatures WHERE typeof(hash_awal) = 'text' LIMIT 1").fetchone(): self._perbaiki_hash_awal_teks(conn)
+                # UNIQUE sudah membuat indeks; indeks eksplisit lama hanya duplikat
+                cursor.execute("DROP INDEX IF EXISTS idx_md5"); cursor.execute("DROP INDEX IF EXISTS idx_sha256")
+                # Revisi naik di setiap perubahan tabel signatures (oleh siapa pun); dipakai untuk tahu file indeks sidecar usang.
+                # Versi = nomor urut feed signature (delta terakhir yang diterapkan / snapshot yang diimpor), hanya diubah terapkan_delta & impor_massal
+                cursor.execute("CREATE TABLE IF NOT EXISTS meta_signature (id INTEGER PRIMARY KEY CHECK (id = 1), revisi INTEGER NOT NULL, versi INTEGER NOT NULL DEFAULT 0)")
+                cursor.execute("INSERT OR IGNORE INTO meta_signature (id, revisi) VALUES (1, 0)")
+                if "versi" not in {row[1] for row in cursor.execute("PRAGMA table_info(meta_signature)")}: cursor.execute("ALTER TABLE meta_signature ADD COLUMN versi INTEGER NOT NULL DEFAULT 0")
+                # Delta yang diterapkan: rentang revisi tabel yang dihasilkannya & perubahan efektifnya (baris yang benar-benar
+                # ditambah/dihapus), agar proses lain menambal indeks di memori alih-alih memuat ulang (SIMPAN_RIWAYAT_DELTA terakhir)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS riwayat_delta (
+                        versi INTEGER PRIMARY KEY,
+                        revisi_awal INTEGER NOT NULL,
+                        revisi_akhir INTEGER NOT NULL,
+                        ditambahkan INTEGER NOT NULL,
+                        dihapus INTEGER NOT NULL,
+                        diterapkan REAL NOT NULL
+                    )
+                """)
+                cursor.execute("CREATE TABLE IF NOT EXISTS perubahan_delta (versi INTEGER NOT NULL, tambah INTEGER NOT NULL, md5 BLOB NOT NULL, sha256 BLOB NOT NULL, ukuran INTEGER, hash_awal BLOB)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_perubahan_delta_versi ON perubahan_delta (versi)")
+                for aksi in ("INSERT", "UPDATE", "DELETE"):
+                    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS revisi_signature_{aksi.lower()} AFTER {aksi} ON signatures BEGIN UPDATE meta_signature SET revisi = revisi + 1 WHERE id = 1; END")
+                # Cache hasil hash per inode; valid selama ukuran, mtime_ns & ctime_ns tidak berubah
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS scan_cache (
+                        dev INTEGER NOT NULL,
+                        ino INTEGER NOT NULL,
+                        ukuran INTEGER NOT NULL,
+                        mtime_ns INTEGER NOT NULL,
+                        ctime_ns INTEGER NOT NULL,
+                        md5 TEXT NOT NULL,
+                        sha256 TEXT NOT NULL,
+                        terakhir_dilihat INTEGER NOT NULL,
+                        PRIMARY KEY (dev, ino)
+                    ) WITHOUT ROWID
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_cache_dilihat ON scan_cache (terakhir_dilihat)")
+                # Checkpoint pemindaian yang belum selesai (satu baris per folder) & deteksinya sejauh ini, untuk melanjutkan
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS checkpoint_pindai (
+                        folder TEXT PRIMARY KEY,
+                        path_terakhir TEXT NOT NULL,
+                        terakhir_folder INTEGER NOT NULL,
+                        dipindai INTEGER NOT NULL,
+                        terinfeksi INTEGER NOT NULL,
+                        jumlah_error INTEGER NOT NULL,
+                        mulai REAL NOT NULL,
+                        diperbarui REAL NOT NULL
                     )
                 """)
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_md5 ON signatures (md5)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_sha256 ON signatures (sha256)")
+                cursor.execute("CREATE TABLE IF NOT EXISTS checkpoint_deteksi (folder TEXT NOT NULL, path TEXT NOT NULL, sha256 TEXT NOT NULL, PRIMARY KEY (folder, path)) WITHOUT ROWID")
+            if perlu_vacuum: conn.execute("VACUUM") # Mengembalikan ruang bekas kolom teks ke sistem file
         except Exception as e:
             print(f"Error saat inisialisasi DB: {e}")
         finally:
             conn.close()
 
-    def _hitung_hashes(self, file_path):
-        """Menghitung MD5 dan SHA256 sekaligus agar efisien."""
-        md5_hash = hashlib.md5(); sha256_hash = hashlib.sha256()
+    @staticmethod
+    def _dari_hex(teks):
+        try: return bytes.fromhex(teks.strip()) if teks else None
+        except (ValueError, AttributeError): return None
+
+    @staticmethod
+    def _perbaiki_hash_awal_teks(conn):
+        """Mengubah hash_awal yang tersimpan sebagai hex teks ke BLOB 16 byte; yang rusak dikosongkan (prefilter tahap 2 dilewati untuk ukurannya)."""
+        conn.create_function("dari_hex", 1, Scanner._dari_hex, deterministic=True)
+        n = conn.execute("UPDATE signatures SET hash_awal = dari_hex(hash_awal) WHERE typeof(hash_awal) = 'text' AND length(dari_hex(hash_awal)) = 16").rowcount
+        n += conn.execute("UPDATE signatures SET hash_awal = NULL WHERE typeof(hash_awal) = 'text'").rowcount
+        print(f"Perbaikan hash_awal teks ke BLOB: {n} baris.")
+
+    @staticmethod
+    def _migrasi_signature_blob(conn):
+        """Migrasi skema lama (hash hex TEXT) ke digest BLOB 16/32 byte; id & timestamp dipertahankan, baris dengan hex rusak dibuang."""
+        conn.create_function("dari_hex", 1, Scanner._dari_hex, deterministic=True)
+        conn.execute("""
+            CREATE TABLE signatures_blob (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                md5 BLOB NOT NULL UNIQUE,
+                sha256 BLOB NOT NULL UNIQUE,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                ukuran INTEGER,
+                hash_awal BLOB
+            )
+        """)
+        conn.execute("""
+            INSERT OR IGNORE INTO signatures_blob (id, md5, sha256, timestamp, ukuran, hash_awal)
+            SELECT id, dari_hex(md5), dari_hex(sha256), timestamp, ukuran, dari_hex(hash_awal) FROM signatures
+            WHERE length(dari_hex(md5)) = 16 AND length(dari_hex(sha256)) = 32
+        """)
+        print(f"Migrasi signature ke BLOB: {conn.execute('SELECT COUNT(*) FROM signatures_blob').fetchone()[0]} baris.")
+        conn.execute("DROP TABLE signatures") # Ikut membuang idx_md5/idx_sha256
+        conn.execute("ALTER TABLE signatures_blob RENAME TO signatures")
+
+    def _hitung_hashes(self, file_path, mesin=None, pembatas=None):
+        """Menghitung MD5 dan SHA256 sekaligus agar efisien. mesin: kunci MESIN_BACA_TERSEDIA, default dipilih dari ukuran file.
+        pembatas: PembatasLaju (mode hemat) yang membatasi byte/detik per blok baca."""
+        md5_hash = hashlib.md5(); sha256_hash = hashlib.sha256(); metrik = self.metrik
         try:
-            with open(file_path, "rb") as f:
-                while chunk := f.read(4096):
-                    md5_hash.update(chunk); sha256_hash.update(chunk)
+            t0 = time.perf_counter_ns() if metrik else 0
+            with open(file_path, "rb", buffering=0) as f:
+                fd = f.fileno(); ukuran = os.fstat(fd).st_size
+                if metrik: metrik.waktu("buka", time.perf_counter_ns() - t0); metrik.tambah("byte", ukuran)
+                if hasattr(os, "POSIX_FADV_SEQUENTIAL"): _fadvise(fd, os.POSIX_FADV_SEQUENTIAL)
+                MESIN_BACA_TERSEDIA[mesin or _pilih_mesin_baca(ukuran)](f, ukuran, (md5_hash, sha256_hash), pembatas.byte_dibaca if pembatas else None, metrik)
+                if FADVISE_DONTNEED and hasattr(os, "POSIX_FADV_DONTNEED"): _fadvise(fd, os.POSIX_FADV_DONTNEED)
             return md5_hash.hexdigest(), sha256_hash.hexdigest()
-        except PermissionError: return "Error: Izin Ditolak", None
-        except Exception as e: return f"Error: {e}", None
+        except PermissionError:
+            if metrik: metrik.error("PermissionError")
+            return "Error: Izin Ditolak", None
+        except Exception as e:
+            if metrik: metrik.error(type(e).__name__)
+            return f"Error: {e}", None
+
+    def _hitung_hash_awal(self, file_path, pembatas=None):
+        """Menghitung MD5 dari UKURAN_BLOK_AWAL byte pertama file (prefilter tahap 2). None jika gagal."""
+        metrik = self.metrik; t0 = time.perf_counter_ns() if metrik else 0
+        try:
+            with open(file_path, "rb") as f: blok = f.read(UKURAN_BLOK_AWAL)
+        except OSError: return None
+        if metrik: metrik.waktu("baca", time.perf_counter_ns() - t0); metrik.tambah("byte", len(blok))
+        if pembatas: pembatas.byte_dibaca(len(blok))
+        return hashlib.md5(blok).hexdigest()
+
+    def _hitung_bertahap(self, file_path, ukuran, indeks, pembatas=None):
+        """Tahap 2 lalu 3: hash blok awal dulu, hash penuh hanya jika blok awal cocok dengan signature."""
+        hash_awal = self._hitung_hash_awal(file_path, pembatas)
+        if hash_awal is not None and not indeks.lolos_hash_awal(ukuran, hash_awal): return LEWATI_HASH_AWAL
+        return self._hitung_hashes(file_path, pembatas=pembatas)
+
+    def hitung_signature_file(self, file_path):
+        """Menghitung (md5, sha256, ukuran, hash_awal) untuk disimpan sebagai signature. sha256 None jika gagal."""
+        hash_md5, hash_sha256 = self._hitung_hashes(file_path)
+        if hash_sha256 is None: return hash_md5, None, None, None
+        try: ukuran = os.path.getsize(file_path)
+        except OSError: ukuran = None
+        return hash_md5, hash_sha256, ukuran, self._hitung_hash_awal(file_path)
+
+    def _path_indeks(self):
+        return f"{self.db_path}-indeks"
+
+    def _revisi_signature(self, conn):
+        return conn.execute("SELECT revisi FROM meta_signature WHERE id = 1").fetchone()[0]
+
+    def _versi_signature(self, conn):
+        return conn.execute("SELECT versi FROM meta_signature WHERE id = 1").fetchone()[0]
+
+    @staticmethod
+    def _bagian_indeks(conn):
+        """Spesifikasi bagian file indeks (lihat tulis_indeks) yang dibaca dari tabel signatures."""
+        def potongan(sql, ubah):
+            cursor = conn.execute(sql)
+            while baris := cursor.fetchmany(BATCH_IMPOR): yield ubah(baris)
+        n = conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+        digest = lambda baris: [r[0] for r in baris]
+        per_ukuran = lambda baris: [(kunci_ukuran(u), c) for u, c in baris]
+        return {
+            "md5": (16, n, potongan("SELECT md5 FROM signatures ORDER BY md5", digest), False, True),
+            "sha256": (32, n, potongan("SELECT sha256 FROM signatures ORDER BY sha256", digest), False, True),
+            "ukuran": (8, 0, potongan("SELECT ukuran, COUNT(*) FROM signatures WHERE ukuran IS NOT NULL GROUP BY ukuran ORDER BY ukuran", per_ukuran), True, False),
+            "hash_awal": (24, 0, potongan("SELECT ukuran, hash_awal, COUNT(*) FROM signatures WHERE ukuran IS NOT NULL AND hash_awal IS NOT NULL GROUP BY ukuran, hash_awal ORDER BY ukuran, hash_awal",
+                                          lambda baris: [(kunci_hash_awal(u, h), c) for u, h, c in baris]), True, False),
+            "ukuran_tanpa_hash_awal": (8, 0, potongan("SELECT ukuran, COUNT(*) FROM signatures WHERE ukuran IS NOT NULL AND hash_awal IS NULL GROUP BY ukuran ORDER BY ukuran", per_ukuran), True, False),
+        }
+
+    def _bangun_indeks(self, conn):
+        """Menulis ulang file indeks sidecar dari tabel signatures (satu snapshot baca), lalu memetakannya ke memori.
+        Jika file tidak bisa ditulis, indeks dibangun di memori saja."""
+        mulai_transaksi = not conn.in_transaction
+        if mulai_transaksi: conn.execute("BEGIN") # Snapshot konsisten: revisi & isi tabel dari saat yang sama
+        try:
+            revisi = self._revisi_signature(conn)
+            meta = {"jumlah_tanpa_ukuran": conn.execute("SELECT COUNT(*) FROM signatures WHERE ukuran IS NULL").fetchone()[0]}
+            path = self._path_indeks(); path_sementara = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(path_sementara, "wb") as f: tulis_indeks(f, revisi, self._bagian_indeks(conn), meta)
+                os.replace(path_sementara, path)
+                dasar = buka_indeks(path)
+                if dasar is not None: return dasar
+            except OSError as e:
+                print(f"File indeks tidak bisa ditulis ({e}), indeks dibangun di memori.")
+                try: os.remove(path_sementara)
+                except OSError: pass
+            f = io.BytesIO(); tulis_indeks(f, revisi, self._bagian_indeks(conn), meta)
+            return baca_indeks(f.getvalue())
+        finally:
+            if mulai_transaksi: conn.rollback()
+
+    def _siapkan_indeks(self, conn):
+        """BerkasIndeks yang sesuai revisi tabel signatures saat ini (file sidecar dipakai ulang jika masih cocok)."""
+        dasar = buka_indeks(self._path_indeks())
+        if dasar is not None and dasar.revisi == self._revisi_signature(conn): return dasar
+        return self._bangun_indeks(conn)
+
+    def _muat_indeks(self, conn=None):
+        """Memuat indeks signature (sekali, lalu dipakai ulang dan ditambal saat tabel berubah). None jika gagal."""
+        with self._kunci_indeks:
+            if self._indeks is not None: return self._indeks
+            conn_sendiri = conn is None
+            if conn_sendiri: conn = self._create_connection()
+            if not conn: return None
+            try:
+                for percobaan in range(2):
+                    try: self._indeks = IndeksSignature(self._siapkan_indeks(conn)); return self._indeks
+                    except sqlite3.OperationalError as e:
+                        if "locked" not in str(e) or percobaan > 0: raise
+                        if self.metrik: self.metrik.tambah("retry_lock")
+                        print("DB locked saat memuat indeks, mencoba lagi..."); threading.Event().wait(0.1)
+            except Exception as e: print(f"Gagal memuat indeks signature: {e}"); return None
+            finally:
+                if conn_sendiri: conn.close()
+
+    def invalidasi_indeks(self):
+        """Membuang indeks di memori; dimuat ulang pada pemakaian berikutnya."""
+        with self._kunci_indeks: self._indeks = None
+
+    def _perbarui_indeks(self, tambah=(), hapus=(), revisi=None):
+        """Menambal indeks yang sudah dimuat setelah tabel berubah (dipanggil SETELAH commit). Baris: (md5, sha256, ukuran, hash_awal).
+        revisi: (revisi sebelum, revisi sesudah) transaksinya; revisi indeks ikut maju jika sebelumnya memang sama."""
+        with self._kunci_indeks:
+            if self._indeks is None: return
+            for row in hapus: self._indeks.hapus(*row)
+            for row in tambah: self._indeks.tambah(*row)
+            if revisi and self._indeks.revisi == revisi[0]: self._indeks.revisi = revisi[1]
+
+    def sinkronkan_indeks(self, conn):
+        """
+        Menyusulkan indeks di memori ke tabel signatures terbaru, untuk pemakai berumur panjang (daemon, pantau, GUI) saat
+        tabel diubah proses lain. Jika semua perubahan sejak revisi indeks berasal dari delta yang masih tercatat di
+        riwayat_delta, perubahannya ditambal di tempat; selain itu indeks dimuat ulang penuh.
+        Mengembalikan None (indeks belum dimuat atau sudah terbaru), "ditambal" atau "dimuat ulang".
+        """
+        with self._kunci_indeks:
+            indeks = self._indeks
+            if indeks is None: return None
+            mulai_transaksi = not conn.in_transaction
+            if mulai_transaksi: conn.execute("BEGIN") # Snapshot konsisten: revisi, riwayat & perubahan dari saat yang sama
+            try:
+                revisi = self._revisi_signature(conn)
+                if revisi == indeks.revisi: return None
+                riwayat = conn.execute("SELECT versi, revisi_awal, revisi_akhir FROM riwayat_delta WHERE revisi_awal >= ? ORDER BY versi", (indeks.revisi,)).fetchall()
+                # Berantai: delta pertama mulai tepat di revisi indeks, tiap delta menyambung, delta terakhir berakhir di revisi sekarang
+                if riwayat and riwayat[0][1] == indeks.revisi and riwayat[-1][2] == revisi and all(a[2] == b[1] for a, b in zip(riwayat, riwayat[1:])):
+                    perubahan = conn.execute("SELECT tambah, md5, sha256, ukuran, hash_awal FROM perubahan_delta WHERE versi BETWEEN ? AND ? ORDER BY versi, tambah", (riwayat[0][0], riwayat[-1][0])).fetchall()
+                    for tambah, *baris in perubahan: (indeks.tambah if tambah else indeks.hapus)(*baris) # Per delta: hapus dulu, lalu tambah
+                    indeks.revisi = revisi; return "ditambal"
+            finally:
+                if mulai_transaksi: conn.rollback()
+        self.invalidasi_indeks(); self._muat_indeks(conn)
+        return "dimuat ulang"
 
     def _check_hash(self, conn, hash_md5, hash_sha256):
-        """Memeriksa apakah SALAH SATU hash ada di DB."""
+        """Memeriksa apakah SALAH SATU hash ada di indeks signature (fallback ke query DB jika indeks tidak dimuat).
+        Indeks dimuat pemanggil sekali di awal pemindaian; di sini tidak dimuat ulang, agar kegagalan memuat tidak diulang per file."""
+        indeks = self._indeks
+        if indeks is not None: return indeks.cocok(hash_md5, hash_sha256)
         try:
+            hash_md5 = bytes.fromhex(hash_md5); hash_sha256 = bytes.fromhex(hash_sha256)
             cursor = conn.cursor()
             cursor.execute("SELECT 1 FROM signatures WHERE md5 = ? OR sha256 = ?", (hash_md5, hash_sha256))
             return cursor.fetchone() is not None
         except sqlite3.OperationalError as e:
              if "locked" in str(e):
+                  if self.metrik: self.metrik.tambah("retry_lock")
                   print("DB locked saat cek hash, mencoba lagi...")
                   threading.Event().wait(0.1) # Tunggu 100ms
                   try:
@@ -74,25 +542,281 @@ class Scanner:
              else: print(f"Error saat _check_hash: {e}"); return False
         except Exception as e: print(f"Error saat _check_hash: {e}"); return False
 
-    def tambah_hash(self, hash_md5, hash_sha256):
-        """Menambahkan KEDUA hash ke DB."""
+    def tambah_hash(self, hash_md5, hash_sha256, ukuran=None, hash_awal=None):
+        """Menambahkan KEDUA hash ke DB, plus ukuran & hash blok awal untuk prefilter (opsional).
+        Jika hash sudah ada tapi belum punya ukuran (baris lama), ukuran & hash_awal-nya dilengkapi."""
+        try: baris_baru = (bytes.fromhex(hash_md5.strip()), bytes.fromhex(hash_sha256.strip()), ukuran, bytes.fromhex(hash_awal) if hash_awal else None)
+        except ValueError: return False, "Format hash tidak valid (harus heksadesimal)."
+        if len(baris_baru[0]) != 16 or len(baris_baru[1]) != 32: return False, "Panjang hash tidak valid (MD5 32 & SHA256 64 karakter hex)."
         conn = self._create_connection();
         if not conn: return False, "Gagal terhubung ke DB"
         try:
             with conn:
                 cursor = conn.cursor()
-                cursor.execute("INSERT OR IGNORE INTO signatures (md5, sha256) VALUES (?, ?)", (hash_md5.strip(), hash_sha256.strip()))
-                return conn.total_changes > 0, ("Hash berhasil ditambahkan." if conn.total_changes > 0 else "Hash (MD5 atau SHA256) sudah ada di database.")
+                cursor.execute("INSERT OR IGNORE INTO signatures (md5, sha256, ukuran, hash_awal) VALUES (?, ?, ?, ?)", baris_baru)
+                ditambahkan = conn.total_changes > 0; baris_lama = None
+                if not ditambahkan and ukuran is not None:
+                    baris_lama = cursor.execute("SELECT md5, sha256, ukuran, hash_awal FROM signatures WHERE md5 = ? AND sha256 = ? AND ukuran IS NULL", baris_baru[:2]).fetchone()
+                    if baris_lama: cursor.execute("UPDATE signatures SET ukuran = ?, hash_awal = ? WHERE md5 = ? AND sha256 = ?", (ukuran, baris_baru[3], *baris_baru[:2]))
+                revisi = self._revisi_signature(conn); revisi = (revisi - 1, revisi) # Tepat satu baris berubah (trigger +1)
+            if ditambahkan: self._perbarui_indeks(tambah=[baris_baru], revisi=revisi)
+            if baris_lama: self._perbarui_indeks(tambah=[baris_baru], hapus=[baris_lama], revisi=revisi); return False, "Hash sudah ada di database, data ukuran/prefilter dilengkapi."
+            return ditambahkan, ("Hash berhasil ditambahkan." if ditambahkan else "Hash (MD5 atau SHA256) sudah ada di database.")
         except Exception as e: return False, f"Error SQL: {e}"
         finally: conn.close()
 
+    @staticmethod
+    def _cocok_signature_lama(conn, hash_md5, hash_sha256):
+        """True jika deteksi ini cocok dengan signature lama tanpa ukuran (kandidat _lengkapi_signature)."""
+        try: return conn.execute("SELECT 1 FROM signatures WHERE (md5 = ? OR sha256 = ?) AND ukuran IS NULL LIMIT 1", (bytes.fromhex(hash_md5), bytes.fromhex(hash_sha256))).fetchone() is not None
+        except (sqlite3.Error, ValueError): return False
+
+    def _lengkapi_signature(self, conn, deteksi):
+        """Migrasi bertahap: mengisi ukuran & hash_awal signature lama dari file yang terdeteksi. deteksi: [(path, md5, sha256, ukuran)].
+        Semua baris diperbarui dalam satu transaksi. Mengembalikan (ok, pesan) untuk EventStatus; pesan None jika tidak ada yang dilengkapi."""
+        baris = [] # Hash blok awal dibaca dulu agar transaksi tidak menunggu I/O file
+        for file_path, hash_md5, hash_sha256, ukuran in deteksi:
+            hash_awal = self._hitung_hash_awal(file_path)
+            if hash_awal is not None: baris.append((bytes.fromhex(hash_md5), bytes.fromhex(hash_sha256), ukuran, bytes.fromhex(hash_awal)))
+        perubahan = []
+        try:
+            with conn:
+                for digest_md5, digest_sha256, ukuran, hash_awal in baris:
+                    for baris_lama in conn.execute("SELECT md5, sha256, ukuran, hash_awal FROM signatures WHERE (md5 = ? OR sha256 = ?) AND ukuran IS NULL", (digest_md5, digest_sha256)).fetchall():
+                        conn.execute("UPDATE signatures SET ukuran = ?, hash_awal = ? WHERE md5 = ?", (ukuran, hash_awal, baris_lama[0]))
+                        perubahan.append((baris_lama, (*baris_lama[:2], ukuran, hash_awal)))
+                revisi = self._revisi_signature(conn)
+        except sqlite3.Error as e: return False, f"Gagal melengkapi data ukuran signature lama: {e}"
+        if not perubahan: return True, None
+        self._perbarui_indeks(tambah=[b for _, b in perubahan], hapus=[b for b, _ in perubahan], revisi=(revisi - len(perubahan), revisi))
+        return True, f"{len(perubahan)} signature lama dilengkapi data ukuran dari file terdeteksi."
+
+    # --- IMPOR MASSAL ---
+
+    _POLA_MD5 = re.compile(r"[0-9a-f]{32}"); _POLA_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+    @staticmethod
+    def _baca_baris_impor(f, format_feed):
+        """Menghasilkan tuple mentah (md5, sha256, ukuran, hash_awal) dari feed teks/csv/jsonl; None untuk baris rusak."""
+        if format_feed == "jsonl":
+            for baris in f:
+                if not baris.strip(): continue
+                try: d = json.loads(baris); yield d.get("md5"), d.get("sha256"), d.get("ukuran"), d.get("hash_awal")
+                except (ValueError, AttributeError): yield None
+        elif format_feed == "csv":
+            pembaca = csv.reader(f); kolom = ["md5", "sha256", "ukuran", "hash_awal"]
+            for i, baris in enumerate(pembaca):
+                if not baris or baris[0].startswith("#"): continue
+                if i == 0 and "md5" in [x.strip().lower() for x in baris]: kolom = [x.strip().lower() for x in baris]; continue # Baris header
+                d = dict(zip(kolom, baris)); yield d.get("md5"), d.get("sha256"), d.get("ukuran"), d.get("hash_awal")
+        else: # teks: "md5 sha256 [ukuran [hash_awal]]" per baris, '#' untuk komentar
+            for baris in f:
+                bagian = baris.split("#", 1)[0].split()
+                if not bagian: continue
+                yield (tuple(bagian) + (None,) * 4)[:4] if len(bagian) >= 2 else None
+
+    def _validasi_baris_impor(self, mentah):
+        """Memvalidasi satu baris impor & mengubahnya ke bentuk tabel (digest bytes, ukuran int). None jika tidak valid."""
+        if not mentah: return None
+        hash_md5, hash_sha256, ukuran, hash_awal = mentah
+        hash_md5 = str(hash_md5 or "").strip().lower(); hash_sha256 = str(hash_sha256 or "").strip().lower()
+        if not self._POLA_MD5.fullmatch(hash_md5) or not self._POLA_SHA256.fullmatch(hash_sha256): return None
+        if ukuran in (None, ""): ukuran = None
+        else:
+            try: ukuran = int(ukuran)
+            except (TypeError, ValueError): return None
+            if ukuran < 0: return None
+        hash_awal = str(hash_awal).strip().lower() if hash_awal not in (None, "") else None
+        if hash_awal is not None and (ukuran is None or not self._POLA_MD5.fullmatch(hash_awal)): return None
+        return bytes.fromhex(hash_md5), bytes.fromhex(hash_sha256), ukuran, bytes.fromhex(hash_awal) if hash_awal else None
+
+    def impor_massal(self, sumber, format_feed=None, ukuran_batch=BATCH_IMPOR, laporan=None, versi=None):
+        """
+        Mengimpor daftar hash (file path atau objek file teks) secara streaming dalam batch.
+        format_feed: 'teks', 'csv' atau 'jsonl' (default ditebak dari ekstensi). Tiap batch = satu transaksi
+        executemany, jadi pemindaian tetap bisa membaca (WAL). laporan(statistik) dipanggil setiap batch.
+        versi: nomor versi feed dari snapshot ini; setelah impor selesai versi signature diset ke sini, sehingga
+        delta berikutnya (dasar = versi) bisa diterapkan. Mengembalikan (True/False, statistik atau pesan error).
+        """
+        if format_feed is None:
+            ekstensi = os.path.splitext(sumber if isinstance(sumber, str) else getattr(sumber, "name", ""))[1].lower()
+            format_feed = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(ekstensi, "teks")
+        conn = self._create_connection()
+        if not conn: return False, "Gagal terhubung ke DB"
+        statistik = {"dibaca": 0, "ditambahkan": 0, "duplikat": 0, "tidak_valid": 0, "detik": 0.0, "baris_per_detik": 0.0}
+        mulai = time.perf_counter()
+        f = open(sumber, encoding="utf-8", errors="replace", newline="") if isinstance(sumber, str) else sumber
+        try:
+            conn.execute("PRAGMA cache_size = -65536"); conn.execute("PRAGMA temp_store = MEMORY") # 64 MB cache halaman selama impor
+            batch = []
+            def tulis_batch():
+                with conn: ditambahkan = max(0, conn.executemany("INSERT OR IGNORE INTO signatures (md5, sha256, ukuran, hash_awal) VALUES (?, ?, ?, ?)", batch).rowcount) # rowcount tidak ikut menghitung trigger revisi
+                statistik["ditambahkan"] += ditambahkan; statistik["duplikat"] += len(batch) - ditambahkan; batch.clear()
+                statistik["detik"] = round(time.perf_counter() - mulai, 3); statistik["baris_per_detik"] = round(statistik["dibaca"] / max(statistik["detik"], 1e-9), 1)
+                if laporan: laporan(dict(statistik))
+            for mentah in self._baca_baris_impor(f, format_feed):
+                statistik["dibaca"] += 1
+                baris = self._validasi_baris_impor(mentah)
+                if baris is None: statistik["tidak_valid"] += 1; continue
+                batch.append(baris)
+                if len(batch) >= ukuran_batch: tulis_batch()
+            tulis_batch()
+            if versi is not None:
+                with conn: conn.execute("UPDATE meta_signature SET versi = ? WHERE id = 1", (versi,))
+                statistik["versi"] = versi
+            return True, statistik
+        except Exception as e: return False, f"Error saat impor (baris ke-{statistik['dibaca']}): {e}"
+        finally:
+            if statistik["ditambahkan"]: self.invalidasi_indeks() # Dimuat ulang penuh pada pemindaian berikutnya
+            if f is not sumber: f.close()
+            conn.close()
+
+    # --- DELTA SIGNATURE BERVERSI ---
+
+    _POLA_KEPALA_DELTA = re.compile(r"#\s*delta-signature\s+versi=(?P<versi>\d+)(?:\s+dasar=(?P<dasar>\d+))?")
+
+    def _baca_delta(self, f):
+        """
+        Membaca file delta: baris pertama '# delta-signature versi=N [dasar=M]' (dasar = versi yang wajib dimiliki DB,
+        default N-1), lalu per baris '+ md5 sha256 [ukuran [hash_awal]]' (tambah) atau '- hash [hash]' (hapus menurut
+        MD5 dan/atau SHA256); '#' untuk komentar. Mengembalikan (versi, dasar, tambah, hapus) dalam bentuk tabel.
+        ValueError jika ada baris tidak valid: delta ditolak utuh, tidak diterapkan sebagian.
+        """
+        versi = dasar = None; tambah = []; hapus = []
+        for nomor, baris in enumerate(f, 1):
+            if versi is None:
+                if not baris.strip(): continue
+                kepala = self._POLA_KEPALA_DELTA.fullmatch(baris.strip())
+                if not kepala: raise ValueError("Bukan file delta signature: baris pertama harus '# delta-signature versi=N [dasar=M]'.")
+                versi = int(kepala["versi"]); dasar = int(kepala["dasar"]) if kepala["dasar"] else versi - 1
+                if dasar >= versi: raise ValueError(f"Versi delta ({versi}) harus lebih besar dari versi dasarnya ({dasar}).")
+                continue
+            bagian = baris.split("#", 1)[0].split()
+            if not bagian: continue
+            aksi, bagian = bagian[0], [b.lower() for b in bagian[1:]]
+            if aksi == "+" and 2 <= len(bagian) <= 4:
+                hasil = self._validasi_baris_impor((tuple(bagian) + (None,) * 4)[:4])
+                if hasil: tambah.append(hasil); continue
+            elif aksi == "-" and 1 <= len(bagian) <= 2:
+                md5 = next((bytes.fromhex(b) for b in bagian if self._POLA_MD5.fullmatch(b)), None); sha256 = next((bytes.fromhex(b) for b in bagian if self._POLA_SHA256.fullmatch(b)), None)
+                if (md5 is not None) + (sha256 is not None) == len(bagian): hapus.append((md5, sha256)); continue
+            raise ValueError(f"Baris {nomor} file delta tidak valid: {baris.strip()[:80]}")
+        if versi is None: raise ValueError("File delta kosong (tanpa baris kepala versi).")
+        return versi, dasar, tambah, hapus
+
+    def terapkan_delta(self, sumber):
+        """
+        Menerapkan satu delta signature (file path atau objek file teks, lihat _baca_delta) dalam SATU transaksi: hapus
+        dulu, lalu tambah; versi signature naik ke versi delta dan perubahan efektifnya dicatat di riwayat_delta.
+        Delta yang versinya sudah dimiliki DB dilewati; delta yang dasarnya bukan versi DB saat ini ditolak tanpa
+        mengubah apa pun. Indeks di memori ditambal di tempat setelah commit (proses lain: sinkronkan_indeks).
+        Mengembalikan (True/False, statistik atau pesan error).
+        """
+        try:
+            f = open(sumber, encoding="utf-8", errors="replace") if isinstance(sumber, str) else sumber
+            try: versi, dasar, tambah, hapus = self._baca_delta(f)
+            finally:
+                if f is not sumber: f.close()
+        except OSError as e: return False, f"File delta tidak bisa dibaca: {e}"
+        except ValueError as e: return False, str(e)
+        conn = self._create_connection()
+        if not conn: return False, "Gagal terhubung ke DB"
+        statistik = {"versi": versi, "dasar": dasar, "diterapkan": False, "ditambahkan": 0, "dilengkapi": 0, "duplikat": 0, "dihapus": 0, "tidak_ada": 0}
+        mulai = time.perf_counter()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE") # Kunci tulis sejak awal: cek versi & penerapan tidak bisa diselingi penulis lain
+                versi_db = statistik["versi_db"] = self._versi_signature(conn)
+                if versi <= versi_db: return True, statistik
+                if dasar != versi_db: return False, f"Delta versi {versi} butuh database di versi {dasar}, database di versi {versi_db}; terapkan delta yang terlewat dulu."
+                revisi_awal = self._revisi_signature(conn); hasil_tambah = []; hasil_hapus = []
+                for md5, sha256 in hapus:
+                    rows = conn.execute("SELECT id, md5, sha256, ukuran, hash_awal FROM signatures WHERE md5 = ? OR sha256 = ?", (md5, sha256)).fetchall()
+                    if not rows: statistik["tidak_ada"] += 1; continue
+                    conn.executemany("DELETE FROM signatures WHERE id = ?", [(row[0],) for row in rows])
+                    hasil_hapus += [row[1:] for row in rows]
+                for baris in tambah:
+                    if conn.execute("INSERT OR IGNORE INTO signatures (md5, sha256, ukuran, hash_awal) VALUES (?, ?, ?, ?)", baris).rowcount > 0: hasil_tambah.append(baris); continue
+                    baris_lama = conn.execute("SELECT md5, sha256, ukuran, hash_awal FROM signatures WHERE md5 = ? AND sha256 = ? AND ukuran IS NULL", baris[:2]).fetchone() if baris[2] is not None else None
+                    if baris_lama is None: statistik["duplikat"] += 1; continue
+                    conn.execute("UPDATE signatures SET ukuran = ?, hash_awal = ? WHERE md5 = ? AND sha256 = ?", (baris[2], baris[3], *baris[:2]))
+                    hasil_hapus.append(baris_lama); hasil_tambah.append(baris); statistik["dilengkapi"] += 1
+                statistik["dihapus"] = len(hasil_hapus) - statistik["dilengkapi"]; statistik["ditambahkan"] = len(hasil_tambah) - statistik["dilengkapi"]
+                revisi_akhir = self._revisi_signature(conn)
+                conn.execute("UPDATE meta_signature SET versi = ? WHERE id = 1", (versi,))
+                conn.execute("INSERT INTO riwayat_delta (versi, revisi_awal, revisi_akhir, ditambahkan, dihapus, diterapkan) VALUES (?, ?, ?, ?, ?, ?)",
+                             (versi, revisi_awal, revisi_akhir, statistik["ditambahkan"], statistik["dihapus"], time.time()))
+                conn.executemany("INSERT INTO perubahan_delta (versi, tambah, md5, sha256, ukuran, hash_awal) VALUES (?, ?, ?, ?, ?, ?)",
+                                 [(versi, 0, *row) for row in hasil_hapus] + [(versi, 1, *row) for row in hasil_tambah])
+                batas = conn.execute("SELECT versi FROM riwayat_delta ORDER BY versi DESC LIMIT 1 OFFSET ?", (SIMPAN_RIWAYAT_DELTA,)).fetchone()
+                if batas: conn.execute("DELETE FROM riwayat_delta WHERE versi <= ?", batas); conn.execute("DELETE FROM perubahan_delta WHERE versi <= ?", batas)
+            self._perbarui_indeks(tambah=hasil_tambah, hapus=hasil_hapus, revisi=(revisi_awal, revisi_akhir))
+            statistik["diterapkan"] = True; statistik["versi_db"] = versi; statistik["detik"] = round(time.perf_counter() - mulai, 3)
+            return True, statistik
+        except sqlite3.Error as e: return False, f"Error SQL saat menerapkan delta versi {versi} (tidak ada yang diubah): {e}"
+        finally: conn.close()
+
+    def versi_signature(self):
+        """Versi feed signature di DB (delta terakhir yang diterapkan / snapshot yang diimpor dengan versi), None jika gagal."""
+        conn = self._create_connection()
+        if not conn: return None
+        try: return self._versi_signature(conn)
+        except sqlite3.Error as e: print(f"Error saat membaca versi signature: {e}"); return None
+        finally: conn.close()
+
+    @staticmethod
+    def _rentang_awalan(awalan):
+        """Awalan hex -> (batas bawah, batas atas eksklusif atau None) untuk range scan pada kolom digest. ValueError jika bukan hex."""
+        awalan = awalan.strip().lower()
+        if not awalan or len(awalan) > 64 or any(c not in "0123456789abcdef" for c in awalan): raise ValueError("Awalan harus 1-64 karakter heksadesimal.")
+        bawah = bytes.fromhex(awalan + "0" * (len(awalan) % 2))
+        atas = int.from_bytes(bytes.fromhex(awalan + "f" * (len(awalan) % 2)), "big") + 1
+        panjang = (len(awalan) + 1) // 2
+        return bawah, (atas.to_bytes(panjang, "big") if atas < 256 ** panjang else None) # None: awalan "ff..ff", tanpa batas atas
+
+    def ambil_halaman_signature(self, kursor=None, batas=UKURAN_HALAMAN_DB, awalan=None, kolom="md5"):
+        """
+        Satu halaman tabel signatures dengan keyset pagination (tanpa OFFSET, sama cepatnya di halaman mana pun).
+        Tanpa awalan: urut id menurun, kursor = id terakhir halaman sebelumnya. Dengan awalan hex: entri yang
+        `kolom`-nya ('md5'/'sha256') berawalan itu, urut menurut hash lewat indeks UNIQUE, kursor = digest terakhir.
+        Mengembalikan (rows, kursor_berikutnya, error); kursor_berikutnya None jika sudah halaman terakhir.
+        """
+        if kolom not in ("md5", "sha256"): return [], None, f"Kolom pencarian tidak dikenal: {kolom}"
+        if awalan:
+            try: bawah, atas = self._rentang_awalan(awalan)
+            except ValueError as e: return [], None, str(e)
+        conn = self._create_connection()
+        if not conn: return [], None, "Gagal terhubung ke DB"
+        try:
+            pilih = "SELECT id, lower(hex(md5)), lower(hex(sha256)), timestamp"
+            if not awalan:
+                syarat, parameter = ("WHERE id < ?", [kursor]) if kursor is not None else ("", [])
+                rows = conn.execute(f"{pilih}, id FROM signatures {syarat} ORDER BY id DESC LIMIT ?", (*parameter, batas + 1)).fetchall()
+            else:
+                syarat = [f"{kolom} >= ?"]; parameter = [bawah]
+                if atas is not None: syarat.append(f"{kolom} < ?"); parameter.append(atas)
+                if kursor is not None: syarat.append(f"{kolom} > ?"); parameter.append(kursor)
+                rows = conn.execute(f"{pilih}, {kolom} FROM signatures WHERE {' AND '.join(syarat)} ORDER BY {kolom} LIMIT ?", (*parameter, batas + 1)).fetchall()
+            berikutnya = rows[batas - 1][-1] if len(rows) > batas else None
+            return [row[:-1] for row in rows[:batas]], berikutnya, None
+        except Exception as e: return [], None, f"Error SQL saat mengambil data: {e}"
+        finally: conn.close()
+
+    def hitung_signature(self):
+        """Jumlah seluruh entri tabel signatures (None jika gagal)."""
+        conn = self._create_connection()
+        if not conn: return None
+        try: return conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+        except sqlite3.Error as e: print(f"Error saat menghitung signature: {e}"); return None
+        finally: conn.close()
+
     def get_all_signatures(self):
-        """Mengambil semua entri dari tabel signatures."""
+        """Mengambil semua entri dari tabel signatures. Untuk tabel besar pakai ambil_halaman_signature."""
         conn = self._create_connection();
         if not conn: return None, "Gagal terhubung ke DB"
         try:
             cursor = conn.cursor()
-            cursor.execute("SELECT id, md5, sha256, timestamp FROM signatures ORDER BY id DESC")
+            cursor.execute("SELECT id, lower(hex(md5)), lower(hex(sha256)), timestamp FROM signatures ORDER BY id DESC")
             return cursor.fetchall(), None
         except Exception as e: return None, f"Error SQL saat mengambil data: {e}"
         finally: conn.close()
@@ -104,56 +828,769 @@ class Scanner:
         try:
             with conn:
                 cursor = conn.cursor()
+                baris = cursor.execute("SELECT md5, sha256, ukuran, hash_awal FROM signatures WHERE id = ?", (signature_id,)).fetchone()
                 cursor.execute("DELETE FROM signatures WHERE id = ?", (signature_id,))
-                # Cek apakah ada baris yang benar-benar dihapus
-                if conn.total_changes > 0:
-                    return True, f"Entri dengan ID {signature_id} berhasil dihapus."
-                else:
-                    return False, f"Tidak ditemukan entri dengan ID {signature_id}."
+                terhapus = conn.total_changes > 0; revisi = self._revisi_signature(conn)
+            # Cek apakah ada baris yang benar-benar dihapus
+            if terhapus:
+                if baris: self._perbarui_indeks(hapus=[baris], revisi=(revisi - 1, revisi))
+                return True, f"Entri dengan ID {signature_id} berhasil dihapus."
+            else:
+                return False, f"Tidak ditemukan entri dengan ID {signature_id}."
         except Exception as e:
             return False, f"Error SQL saat menghapus: {e}"
         finally:
             conn.close()
 
-    def pindai_folder(self, folder_path, progress_queue, cancel_event):
+    # --- CACHE HASIL PINDAI (scan_cache) ---
+
+    def _cari_cache(self, conn, st):
+        """Mengembalikan (md5, sha256) dari scan_cache jika metadata file belum berubah, selain itu None."""
+        try:
+            return conn.execute("SELECT md5, sha256 FROM scan_cache WHERE dev = ? AND ino = ? AND ukuran = ? AND mtime_ns = ? AND ctime_ns = ?",
+                                (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns)).fetchone()
+        except sqlite3.Error as e: print(f"Error saat membaca scan_cache: {e}"); return None
+
+    def _tulis_cache(self, conn, simpan, sentuh):
+        """Menulis batch entri baru (simpan) & stempel waktu entri yang terpakai (sentuh) dalam satu transaksi."""
+        if not simpan and not sentuh: return
+        try:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO scan_cache (dev, ino, ukuran, mtime_ns, ctime_ns, md5, sha256, terakhir_dilihat) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", simpan)
+                conn.executemany("UPDATE scan_cache SET terakhir_dilihat = ? WHERE dev = ? AND ino = ?", sentuh)
+        except sqlite3.Error as e: print(f"Error saat menulis scan_cache: {e}")
+        simpan.clear(); sentuh.clear()
+
+    def _pangkas_cache(self, conn, batas=MAX_CACHE_ENTRI):
+        """Membuang entri scan_cache yang paling lama tidak terlihat hingga jumlahnya <= batas."""
+        try:
+            with conn:
+                jumlah = conn.execute("SELECT COUNT(*) FROM scan_cache").fetchone()[0]
+                if jumlah <= batas: return 0
+                conn.execute("DELETE FROM scan_cache WHERE (dev, ino) IN (SELECT dev, ino FROM scan_cache ORDER BY terakhir_dilihat LIMIT ?)", (jumlah - batas,))
+                return jumlah - batas
+        except sqlite3.Error as e: print(f"Error saat memangkas scan_cache: {e}"); return 0
+
+    def hapus_cache_pindai(self):
+        """Mengosongkan seluruh scan_cache."""
+        conn = self._create_connection()
+        if not conn: return False, "Gagal terhubung ke DB"
+        try:
+            with conn: conn.execute("DELETE FROM scan_cache")
+            return True, "Cache pindai dikosongkan."
+        except Exception as e: return False, f"Error SQL saat mengosongkan cache: {e}"
+        finally: conn.close()
+
+    # --- CHECKPOINT PEMINDAIAN ---
+
+    @staticmethod
+    def _kunci_posisi(folder_path, path, folder=False):
+        """
+        Kunci urutan penjelajahan untuk `path` di bawah folder_path: di tiap folder, file (urut nama) lebih dulu
+        daripada subfolder (urut nama). Perbandingan tuple kunci = urutan pemindaian. folder=True: posisi sebuah
+        folder yang gagal dibuka (semua isinya dianggap sudah dilewati).
+        """
+        bagian = os.path.relpath(path, folder_path).split(os.sep)
+        return tuple((1, b) for b in bagian) if folder else tuple((1, b) for b in bagian[:-1]) + ((0, bagian[-1]),)
+
+    def _baca_checkpoint(self, conn, folder=None, deteksi=False):
+        """Checkpoint `folder` (None: yang terakhir diperbarui) sebagai dict atau None; deteksi=True: sertakan [(path, sha256)]."""
+        sql = "SELECT folder, path_terakhir, terakhir_folder, dipindai, terinfeksi, jumlah_error, mulai, diperbarui FROM checkpoint_pindai"
+        try:
+            baris = conn.execute(sql + " WHERE folder = ?", (folder,)).fetchone() if folder else conn.execute(sql + " ORDER BY diperbarui DESC LIMIT 1").fetchone()
+            if not baris: return None
+            data = dict(zip(("folder", "path_terakhir", "terakhir_folder", "dipindai", "terinfeksi", "jumlah_error", "mulai", "diperbarui"), baris), terakhir_folder=bool(baris[2]))
+            if deteksi: data["deteksi"] = conn.execute("SELECT path, sha256 FROM checkpoint_deteksi WHERE folder = ? ORDER BY path", (data["folder"],)).fetchall()
+            return data
+        except sqlite3.Error as e: print(f"Error saat membaca checkpoint pemindaian: {e}"); return None
+
+    def _tulis_checkpoint(self, conn, data, deteksi_baru):
+        """Menyimpan posisi & penghitung beserta deteksi baru sejak checkpoint sebelumnya dalam satu transaksi."""
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO checkpoint_pindai (folder, path_terakhir, terakhir_folder, dipindai, terinfeksi, jumlah_error, mulai, diperbarui) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (data["folder"], data["path_terakhir"], int(data["terakhir_folder"]), data["dipindai"], data["terinfeksi"], data["jumlah_error"], data["mulai"], time.time()))
+                conn.executemany("INSERT OR REPLACE INTO checkpoint_deteksi (folder, path, sha256) VALUES (?, ?, ?)", ((data["folder"], p, s) for p, s in deteksi_baru))
+            deteksi_baru.clear(); return True
+        except sqlite3.Error as e: print(f"Error saat menulis checkpoint pemindaian: {e}"); return False
+
+    def _hapus_checkpoint(self, conn, folder):
+        try:
+            with conn:
+                conn.execute("DELETE FROM checkpoint_pindai WHERE folder = ?", (folder,))
+                conn.execute("DELETE FROM checkpoint_deteksi WHERE folder = ?", (folder,))
+        except sqlite3.Error as e: print(f"Error saat menghapus checkpoint pemindaian: {e}")
+
+    def ambil_checkpoint(self, folder=None):
+        """Checkpoint pemindaian yang belum selesai untuk `folder` (default: yang terakhir diperbarui) sebagai dict, None jika tidak ada."""
+        conn = self._create_connection()
+        if not conn: return None
+        try: return self._baca_checkpoint(conn, os.path.abspath(folder) if folder else None)
+        finally: conn.close()
+
+    # --- METRIK ---
+
+    def snapshot_metrik(self):
+        """Snapshot MetrikPindai pemindaian yang sedang/terakhir berjalan dengan metrik aktif ({} jika tidak ada). Aman dari thread lain."""
+        return self.metrik.snapshot() if self.metrik else {}
+
+    @staticmethod
+    def _kirim_metrik(pengirim, metrik):
+        pesan = metrik.selesai() # Profil & file Prometheus ditulis sebelum EventSelesai
+        pengirim.kirim(EventMetrik(metrik.snapshot()))
+        if pesan: pengirim.kirim(EventStatus(pesan))
+
+    # --- ATURAN PINDAI ---
+
+    @staticmethod
+    def _mulai_aturan(aturan, folder_path, pengirim):
+        """Mengirim uraian aturan sebagai EventStatus & mengembalikan PenyaringPindai untuk folder_path (None tanpa aturan)."""
+        if not aturan: return None
+        pengirim.kirim(EventStatus(aturan.uraian()))
+        return aturan.penyaring(folder_path)
+
+    @staticmethod
+    def _laporkan_lewati(lewati, statistik, pengirim):
+        """Menggabungkan hitungan yang dilewati aturan ke statistik & meringkasnya sebagai EventStatus."""
+        statistik.update(lewati)
+        if pesan := uraian_lewati(lewati): pengirim.kirim(EventStatus(pesan))
+
+    # --- PENJELAJAHAN DIREKTORI ---
+
+    def _jelajahi_folder(self, folder_path, antrian_jelajah, pengirim, berhenti, rekursif=True, lanjut_dari=None, file_awal=0, saring=None):
+        """
+        Menjelajahi folder sekali jalan (DFS seperti os.walk topdown, isi tiap folder diurutkan nama) memakai os.scandir.
+        Mengirim (root, [DirEntry file]) per direktori ke antrian_jelajah, lalu None saat selesai
+        (atau EventFatal). Folder yang gagal dibuka dikirim sebagai EventError di posisinya dalam urutan.
+        Total file dikirim lewat `pengirim` sebagai perkiraan yang makin akurat; penjelajahan berhenti jika `pengirim` sudah membuang event (event akhir terkirim).
+        rekursif=False: hanya file yang langsung berada di folder_path.
+        lanjut_dari: kunci _kunci_posisi checkpoint; file & folder sampai posisi itu dilewati, file_awal = jumlahnya.
+        saring: PenyaringPindai; folder yang ditolak tidak pernah dibuka, file yang ditolak tidak dikirim.
+        """
+        def kirim(item):
+            while not berhenti.is_set():
+                try: antrian_jelajah.put(item, timeout=0.1); return True
+                except queue.Full: continue
+            return False
+
+        # Tumpukan berisi (folder, kunci); kunci hanya diisi untuk folder yang memuat posisi checkpoint (sebagian sudah dipindai)
+        stack = [(folder_path, () if lanjut_dari else None)]; file_ditemukan = 0; dir_selesai = 0; waktu_lapor = time.monotonic(); metrik = self.metrik
+        while stack:
+            if berhenti.is_set(): return
+            root, kunci = stack.pop(); files = []; subdirs = []; t0 = time.perf_counter_ns() if metrik else 0
+            try:
+                with os.scandir(root) as it:
+                    for entry in it:
+                        try: is_dir = entry.is_dir()
+                        except OSError: is_dir = False
+                        if not is_dir:
+                            if saring is None or saring.file(entry): files.append(entry)
+                        elif not entry.is_symlink() and (saring is None or saring.folder(entry)): subdirs.append(entry.name) # Sama seperti os.walk: symlink folder tidak diikuti
+            except PermissionError:
+                if root == folder_path: kirim(EventFatal(f"Izin ditolak untuk mengakses folder utama: {folder_path}")); return
+                if metrik: metrik.error("PermissionError")
+                if not kirim(EventError("PINDAI", root, "Izin ditolak untuk folder")): return
+            except OSError as e:
+                if root == folder_path: kirim(EventFatal(f"Gagal akses folder utama: {folder_path} - {e}")); return
+                if metrik: metrik.error(type(e).__name__)
+                if not kirim(EventError("PINDAI", root, f"Gagal akses folder - {e}")): return
+            files.sort(key=lambda e: e.name); subdirs.sort()
+            if kunci is not None: # Folder yang memuat posisi checkpoint: buang isi yang sudah dipindai
+                files = [e for e in files if kunci + ((0, e.name),) > lanjut_dari]
+                for s in reversed(subdirs) if rekursif else ():
+                    k = kunci + ((1, s),)
+                    if len(k) < len(lanjut_dari) and lanjut_dari[:len(k)] == k: stack.append((os.path.join(root, s), k)) # Memuat posisi checkpoint
+                    elif k > lanjut_dari: stack.append((os.path.join(root, s), None)) # Seluruhnya setelah posisi checkpoint
+            elif rekursif: stack.extend((os.path.join(root, s), None) for s in reversed(subdirs))
+            if metrik: metrik.waktu("jelajah", time.perf_counter_ns() - t0); metrik.tambah("direktori")
+            dir_selesai += 1; file_ditemukan += len(files)
+            if files and not kirim((root, files)): return
+            if time.monotonic() - waktu_lapor >= INTERVAL_PERKIRAAN:
+                # Folder yang belum dibuka diperkirakan berisi rata-rata file per folder sejauh ini
+                perkiraan = file_ditemukan + round(len(stack) * file_ditemukan / dir_selesai)
+                if not pengirim.kirim(EventTotal(file_awal + perkiraan, final=False)): return # Pemindaian sudah mengirim event akhir
+                waktu_lapor = time.monotonic()
+        if pengirim.kirim(EventTotal(file_awal + file_ditemukan)): kirim(None)
+
+    def pindai_folder(self, folder_path, progress_queue, cancel_event, jumlah_worker=None, paksa_pindai_ulang=False, jumlah_proses=0, pembatas=None, metrik=None, rekursif=True, checkpoint=False, lanjutkan=False, aturan=None):
         """
         Memindai folder menggunakan koneksi DB yang dibuat oleh thread ini.
-        Dengan penanganan error os.walk yang lebih baik.
+        Penjelajahan (os.scandir) berjalan di thread sendiri sehingga hashing langsung dimulai;
+        total file dilaporkan sebagai TOTAL_FILES_PERKIRAAN lalu TOTAL_FILES saat penjelajahan selesai.
+        Hashing dibagi ke pool thread berukuran `jumlah_worker` (default MAX_SCAN_WORKERS, 1 = serial).
+        Hasil tetap diproses sesuai urutan penjelajahan agar output sama persis dengan mode serial.
+        File yang metadatanya cocok dengan scan_cache tidak di-hash ulang, kecuali `paksa_pindai_ulang`.
+        Hardlink ke inode yang sudah di-hash di pemindaian ini memakai hasil yang sama.
+        Kabar dikirim ke progress_queue sebagai objek event_pindai (progres digabung per batch); antrian
+        sebaiknya terbatas (buat_antrian_event) agar pemindai menunggu jika konsumen tertinggal.
+        Event terakhir selalu EventSelesai, EventDibatalkan atau EventFatal.
+        jumlah_proses > 1 memakai mode multi-proses (lihat _pindai_folder_multiproses), jumlah_worker diabaikan.
+        pembatas: PembatasLaju (mode hemat) untuk membatasi byte/file per detik & menurunkan prioritas thread pemindai;
+        laju target & tercapai dikirim berkala sebagai EventLaju.
+        metrik: MetrikPindai untuk mengukur waktu per fase (snapshot_metrik() selama berjalan, EventMetrik di akhir).
+        rekursif=False: hanya file yang langsung berada di folder_path (dipakai shard distribusi), selalu mode thread.
+        checkpoint: tiap INTERVAL_CHECKPOINT detik simpan posisi (file terakhir yang selesai diproses) & penghitung ke
+        tabel checkpoint_pindai; dihapus saat selesai, dipertahankan saat batal/fatal/proses mati.
+        lanjutkan: mulai dari checkpoint folder ini (deteksi sebelumnya dikirim ulang, total mencakup bagian sebelumnya);
+        tanpa checkpoint pemindaian mulai dari awal. Checkpoint hanya di mode thread (urutan hasil tetap).
+        aturan: AturanPindai (glob, path, ukuran maks, satu filesystem, file khusus) yang diterapkan saat penjelajahan;
+        hitungan yang dilewati masuk EventStatistik & diringkas sebagai EventStatus.
         """
+        self.metrik = metrik
+        if metrik: metrik.mulai()
+        if jumlah_proses and jumlah_proses > 1 and rekursif:
+            if lanjutkan: progress_queue.put(EventStatus("Melanjutkan dari checkpoint hanya didukung mode thread; mode multi-proses diabaikan."))
+            else:
+                if checkpoint: progress_queue.put(EventStatus("Checkpoint tidak didukung mode multi-proses (urutan hasil tidak tetap); pemindaian ini tidak bisa dilanjutkan jika terhenti."))
+                return self._pindai_folder_multiproses(folder_path, progress_queue, cancel_event, jumlah_proses, paksa_pindai_ulang, pembatas, metrik, aturan)
+        jumlah_worker = max(1, jumlah_worker or MAX_SCAN_WORKERS)
         conn = self._create_connection()
-        if not conn: progress_queue.put("FATAL_ERROR: Tidak bisa terhubung ke database."); return
-        total_file = 0; total_terinfeksi = 0; file_dipindai = 0
-        try:
-            progress_queue.put("STATUS: Menghitung total file...")
+        if not conn: progress_queue.put(EventFatal("Tidak bisa terhubung ke database.")); return
+        berhenti = threading.Event() # Diset saat event akhir dikirim atau pemindaian berakhir: penjelajah & pengirim lain berhenti
+        pengirim = PengirimEvent(progress_queue, metrik=metrik, berhenti=berhenti) # Progres digabung per batch, put memblok jika konsumen tertinggal
+        total_terinfeksi = 0; file_dipindai = 0; file_dari_cache = 0; jumlah_error = 0
+        posisi = PosisiCheckpoint(self, conn, folder_path) if checkpoint or lanjutkan else None
+        if pembatas and pembatas.batal is None: pembatas.batal = cancel_event # Penantian token terpotong saat batal
+        def siapkan_thread(): # Initializer thread milik pemindaian (pool hash & penjelajah)
+            if pembatas: pembatas.siapkan_thread()
+            if metrik: metrik.siapkan_thread()
+        # Mode hemat selalu memakai pool agar hashing berjalan di thread berprioritas rendah, bukan thread pemanggil
+        executor = ThreadPoolExecutor(max_workers=jumlah_worker, thread_name_prefix="hash", initializer=siapkan_thread) if jumlah_worker > 1 or pembatas else None
+        antrian_hash = deque() # (path, hasil/future, stat untuk cache) yang sedang dikerjakan, urut sesuai penjelajahan
+        folder_gagal_antri = 0 # Entri EventError (folder gagal dibuka) di antrian_hash; tidak ikut file_dipindai
+        batas_antrian = jumlah_worker * 2 if executor else 0 # Batasi file "in-flight" agar memori & latensi batal tetap kecil
+        inode_dipindai = {} # (dev, ino) -> hasil/future, hanya untuk file hardlink (st_nlink > 1)
+        cache_simpan = []; cache_sentuh = []; waktu_pindai = time.time_ns()
+        indeks = None; deteksi_lama = [] # Deteksi yang cocok dengan signature lama tanpa ukuran (untuk migrasi)
+        statistik = dict.fromkeys(("file_lewati_ukuran", "byte_lewati_ukuran", "file_lewati_hash_awal", "byte_lewati_hash_awal", "byte_lewati_cache", "byte_hash_penuh"), 0)
+        self.statistik_terakhir = statistik
+
+        def jadwalkan(entry):
+            """Mengembalikan (hasil atau future, stat file, simpan ke cache?). Urutan: ukuran -> hardlink -> cache -> blok awal -> hash penuh."""
+            nonlocal file_dari_cache
+            file_path_lengkap = entry.path
             try:
-                for root, dirs, files in os.walk(folder_path, topdown=True, onerror=None):
-                    if cancel_event.is_set(): progress_queue.put("DIBATALKAN: Pemindaian dibatalkan saat menghitung."); return
-                    try: total_file += len(files)
-                    except PermissionError: progress_queue.put(f"ERROR_HITUNG: Izin ditolak untuk folder {root}")
-                    except OSError as e: progress_queue.put(f"ERROR_HITUNG: Gagal akses {root} - {e}")
-            except PermissionError: progress_queue.put(f"FATAL_ERROR: Izin ditolak untuk mengakses folder utama: {folder_path}"); return
-            except Exception as e: progress_queue.put(f"FATAL_ERROR: Gagal saat menghitung file: {e}"); return
-
-            progress_queue.put(f"TOTAL_FILES:{total_file}")
-            if total_file == 0: progress_queue.put("SELESAI: Tidak ada file ditemukan atau bisa diakses."); return
-
-            progress_queue.put(f"STATUS: Memulai pemindaian {total_file} file...")
+                st = entry.stat() # Memakai data stat yang di-cache DirEntry
+                if indeks and not indeks.lolos_ukuran(st.st_size): statistik["file_lewati_ukuran"] += 1; statistik["byte_lewati_ukuran"] += st.st_size; return LEWATI_UKURAN, st, False
+                if not st.st_ino: st = os.stat(file_path_lengkap) # Windows: DirEntry tidak mengisi st_ino/st_dev/st_nlink
+            except OSError: st = None # Biarkan _hitung_hashes yang melaporkan errornya
+            kunci = (st.st_dev, st.st_ino) if st and st.st_ino else None
+            if kunci and kunci in inode_dipindai: file_dari_cache += 1; return inode_dipindai[kunci], st, False
+            hasil = None if paksa_pindai_ulang or not kunci else self._cari_cache(conn, st)
+            if kunci and st.st_nlink > 1: inode_dipindai[kunci] = hasil # Diisi ulang di bawah jika harus di-hash
+            if hasil: file_dari_cache += 1; statistik["byte_lewati_cache"] += st.st_size; cache_sentuh.append((waktu_pindai, *kunci)); return hasil, st, False
+            if indeks and st and indeks.perlu_hash_awal(st.st_size): tugas = (self._hitung_bertahap, file_path_lengkap, st.st_size, indeks, pembatas)
+            else: tugas = (self._hitung_hashes, file_path_lengkap, None, pembatas)
+            hasil = executor.submit(*tugas) if executor else tugas[0](*tugas[1:])
+            if kunci and st.st_nlink > 1: inode_dipindai[kunci] = hasil
+            return hasil, st, bool(kunci)
+
+        def proses_hasil(file_path_lengkap, hash_md5, hash_sha256, st):
+            nonlocal total_terinfeksi, jumlah_error
+            if hash_sha256 is None: jumlah_error += 1; pengirim.kirim(EventError("HASH", file_path_lengkap, hash_md5)); pengirim.progres(); return
+            t0 = time.perf_counter_ns() if metrik else 0
+            cocok = self._check_hash(conn, hash_md5, hash_sha256)
+            if metrik: metrik.waktu("cek_hash", time.perf_counter_ns() - t0)
+            if cocok:
+                total_terinfeksi += 1; pengirim.kirim(EventDeteksi(file_path_lengkap, hash_sha256))
+                if posisi: posisi.deteksi(file_path_lengkap, hash_sha256)
+                if indeks and indeks.jumlah_tanpa_ukuran and st and self._cocok_signature_lama(conn, hash_md5, hash_sha256): deteksi_lama.append((file_path_lengkap, hash_md5, hash_sha256, st.st_size))
+            pengirim.progres()
+
+        def kuras_antrian(sisa):
+            """Memproses hasil terdepan sampai jumlah in-flight <= sisa (sisa < 0: hanya yang sudah selesai). False jika dibatalkan."""
+            nonlocal jumlah_error, folder_gagal_antri
+            while len(antrian_hash) > sisa:
+                if cancel_event.is_set(): return False
+                if sisa < 0 and isinstance(antrian_hash[0][1], Future) and not antrian_hash[0][1].done(): break # Mode non-blok
+                file_path_lengkap, hasil, st, simpan_cache = antrian_hash.popleft()
+                if posisi: posisi.catat(file_path_lengkap, isinstance(hasil, EventError)) # Entri yang sudah dikeluarkan selalu diproses sampai tuntas
+                if isinstance(hasil, Future): hasil = hasil.result()
+                if hasil is LEWATI_UKURAN: pengirim.progres(); continue
+                if hasil is LEWATI_HASH_AWAL:
+                    statistik["file_lewati_hash_awal"] += 1; statistik["byte_lewati_hash_awal"] += st.st_size - UKURAN_BLOK_AWAL
+                    pengirim.progres(); continue
+                if isinstance(hasil, EventError): jumlah_error += 1; folder_gagal_antri -= 1; pengirim.kirim(hasil); continue # Folder gagal dibuka
+                hash_md5, hash_sha256 = hasil
+                if simpan_cache and hash_sha256 is not None:
+                    statistik["byte_hash_penuh"] += st.st_size
+                    cache_simpan.append((st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns, hash_md5, hash_sha256, waktu_pindai))
+                if len(cache_simpan) + len(cache_sentuh) >= BATCH_TULIS_CACHE: self._tulis_cache(conn, cache_simpan, cache_sentuh)
+                proses_hasil(file_path_lengkap, hash_md5, hash_sha256, st)
+            return True
+
+        def simpan_checkpoint(): # File yang masih in-flight belum dihitung; folder gagal di antrian tidak pernah dihitung file_dipindai
+            return posisi.simpan(file_dipindai - (len(antrian_hash) - folder_gagal_antri), total_terinfeksi, jumlah_error) if posisi else False
+
+        def akhiri(event):
+            """Mengirim EventDibatalkan/EventFatal setelah checkpoint ditulis, agar konsumen langsung bisa menawarkan lanjutkan."""
+            if simpan_checkpoint() and isinstance(event, EventDibatalkan): event = EventDibatalkan(f"{event.pesan} Posisi tersimpan setelah {posisi.data['dipindai']} file, bisa dilanjutkan.")
+            pengirim.kirim(event)
+
+        antrian_jelajah = queue.Queue(maxsize=BATAS_ANTRIAN_JELAJAH)
+        try:
+            if cara := self.sinkronkan_indeks(conn): pengirim.kirim(EventStatus(f"Tabel signatures diubah sejak indeks dimuat, indeks {cara}."))
+            indeks = self._muat_indeks(conn)
+            if indeks is None: pengirim.kirim(EventStatus("Indeks signature gagal dimuat, prefilter nonaktif & cek hash lewat query DB."))
+            elif indeks.jumlah_tanpa_ukuran: pengirim.kirim(EventStatus(f"{indeks.jumlah_tanpa_ukuran} signature lama belum punya data ukuran, prefilter ukuran/blok awal nonaktif (tambahkan ulang file virusnya untuk melengkapi)."))
+            if pembatas: pengirim.kirim(EventStatus(pembatas.uraian()))
+            saring = self._mulai_aturan(aturan, folder_path, pengirim)
+            lanjut_dari = None; file_awal = 0
+            if posisi and (lama := posisi.mulai(lanjutkan, pengirim)):
+                lanjut_dari = lama["lanjut_dari"]; file_awal = file_dipindai = lama["dipindai"]; total_terinfeksi = lama["terinfeksi"]; jumlah_error = lama["jumlah_error"]
+            pengirim.kirim(EventStatus(f"Memulai pemindaian dengan {jumlah_worker} worker (total file dihitung sambil berjalan)..."))
+            def jelajahi():
+                siapkan_thread()
+                self._jelajahi_folder(folder_path, antrian_jelajah, pengirim, berhenti, rekursif, lanjut_dari, file_awal, saring)
+            threading.Thread(target=jelajahi, daemon=True, name="penjelajah").start()
             try:
-                for root, dirs, files in os.walk(folder_path, topdown=True, onerror=None):
-                    if cancel_event.is_set(): progress_queue.put("DIBATALKAN: Pemindaian dibatalkan oleh pengguna."); return
-                    try:
-                        for nama_file in files:
-                            if cancel_event.is_set(): progress_queue.put("DIBATALKAN: Pemindaian dibatalkan oleh pengguna."); return
-                            file_path_lengkap = os.path.join(root, nama_file)
-                            file_dipindai += 1
-                            hash_md5, hash_sha256 = self._hitung_hashes(file_path_lengkap)
-                            if hash_sha256 is None: progress_queue.put(f"ERROR_HASH: {file_path_lengkap} ({hash_md5})")
-                            elif self._check_hash(conn, hash_md5, hash_sha256): total_terinfeksi += 1; progress_queue.put(f"TERDETEKSI: {file_path_lengkap}")
-                            progress_queue.put("PROGRESS:1")
-                    except PermissionError: progress_queue.put(f"ERROR_PINDAI: Izin ditolak untuk file di {root}")
-                    except OSError as e: progress_queue.put(f"ERROR_PINDAI: Gagal akses file di {root} - {e}")
-            except PermissionError: progress_queue.put(f"FATAL_ERROR: Izin ditolak untuk mengakses folder utama: {folder_path}"); return
-            except Exception as e: progress_queue.put(f"FATAL_ERROR: Gagal saat memindai file: {e}"); return
-            progress_queue.put(f"SELESAI: Total Dipindai: {file_dipindai}, Terinfeksi: {total_terinfeksi}")
+                while True:
+                    if cancel_event.is_set(): akhiri(EventDibatalkan()); return
+                    try: item = antrian_jelajah.get(timeout=0.1)
+                    except queue.Empty:
+                        kuras_antrian(-1) # Laporkan hasil yang sudah jadi selagi menunggu penjelajah
+                        if metrik: metrik.tulis_berkala()
+                        if posisi and posisi.jatuh_tempo(): simpan_checkpoint()
+                        continue
+                    if item is None: break
+                    if isinstance(item, EventFatal): akhiri(item); return
+                    if isinstance(item, EventError): antrian_hash.append((item.path, item, None, False)); folder_gagal_antri += 1; continue # Diproses berurutan dengan file
+                    root, entries = item
+                    if metrik: metrik.tambah("file", len(entries)); metrik.tulis_berkala() # Per direktori, bukan per file: jalur per file tetap murah
+                    if posisi and posisi.jatuh_tempo(): simpan_checkpoint()
+                    for entry in entries:
+                        if cancel_event.is_set(): akhiri(EventDibatalkan()); return
+                        if posisi and not file_dipindai & 1023 and posisi.jatuh_tempo(): simpan_checkpoint() # Folder sangat besar
+                        file_dipindai += 1
+                        if pembatas:
+                            pembatas.file_diproses()
+                            if laju := pembatas.laporan(): pengirim.kirim(EventLaju(**laju))
+                        antrian_hash.append((entry.path, *jadwalkan(entry)))
+                        if not kuras_antrian(batas_antrian): akhiri(EventDibatalkan()); return
+                if not kuras_antrian(0): akhiri(EventDibatalkan()); return
+            except Exception as e: akhiri(EventFatal(f"Gagal saat memindai file: {e}")); return
+            if posisi: posisi.hapus()
+            if file_dipindai == 0: pengirim.kirim(EventSelesai(0, 0, "Tidak ada file ditemukan atau bisa diakses.")); return
+            self._tulis_cache(conn, cache_simpan, cache_sentuh); self._pangkas_cache(conn)
+            if deteksi_lama and (pesan := self._lengkapi_signature(conn, deteksi_lama)[1]): pengirim.kirim(EventStatus(pesan))
+            if indeks and not indeks.jumlah_tanpa_ukuran:
+                mb = lambda n: f"{n / 1048576:.1f} MB"
+                pengirim.kirim(EventStatus(f"Prefilter: {statistik['file_lewati_ukuran']} file ({mb(statistik['byte_lewati_ukuran'])}) dilewati karena ukuran, "
+                                   f"{statistik['file_lewati_hash_awal']} file ({mb(statistik['byte_lewati_hash_awal'])}) dilewati karena blok awal, {mb(statistik['byte_hash_penuh'])} di-hash penuh."))
+            if file_dari_cache: pengirim.kirim(EventStatus(f"{file_dari_cache} file tidak di-hash ulang (tidak berubah sejak pemindaian terakhir atau hardlink)."))
+            if saring: self._laporkan_lewati(saring.lewati, statistik, pengirim)
+            if pembatas: pengirim.kirim(EventLaju(**pembatas.laporan(akhir=True))); statistik["detik_tunggu_laju"] = round(pembatas.detik_tunggu, 2)
+            pengirim.kirim(EventStatistik(dict(statistik, file_dari_cache=file_dari_cache)))
+            if metrik: self._kirim_metrik(pengirim, metrik)
+            pengirim.kirim(EventSelesai(file_dipindai, total_terinfeksi))
+        finally:
+            berhenti.set()
+            # Jangan tunggu file yang masih di-hash saat batal; future yang belum mulai dibuang
+            if executor: executor.shutdown(wait=False, cancel_futures=True)
+            if conn: self._tulis_cache(conn, cache_simpan, cache_sentuh); conn.close() # Hasil yang sudah selesai tetap disimpan walau batal
+            if metrik: metrik.selesai() # Batal/fatal: file Prometheus & profil tetap ditulis
+
+    # --- MODE MULTI-PROSES ---
+
+    def _pindai_folder_multiproses(self, folder_path, progress_queue, cancel_event, jumlah_proses, paksa_pindai_ulang=False, pembatas=None, metrik=None, aturan=None):
+        """
+        Memindai folder dengan `jumlah_proses` proses worker. Pohon dibagi per subtree: tiap worker menjelajah
+        folder secara DFS dan menyerahkan separuh tumpukan folder yang belum dibuka ke antrian bersama
+        saat ada worker menganggur (work stealing). Tiap worker memuat salinan indeks signature sendiri.
+        Hasil digabung lalu dikirim ke progress_queue sebagai event yang sama dengan mode thread;
+        cancel_event diteruskan ke semua worker. scan_cache dibaca worker & ditulis oleh proses ini.
+        Mode hemat: tiap worker mendapat 1/jumlah_proses dari laju pembatas dan menyesuaikan diri sendiri terhadap beban.
+        Metrik: worker mengukur fasenya sendiri & mengirim totalnya bersama batch hasil; profil hanya mencakup proses ini.
+        Aturan: tiap worker menyusun ulang AturanPindai dari konfigurasinya; hitungan yang dilewati ikut statistik worker.
+        """
+        pengirim = PengirimEvent(progress_queue, metrik=metrik)
+        try:
+            with os.scandir(folder_path): pass
+        except PermissionError: pengirim.kirim(EventFatal(f"Izin ditolak untuk mengakses folder utama: {folder_path}")); return
+        except OSError as e: pengirim.kirim(EventFatal(f"Gagal akses folder utama: {folder_path} - {e}")); return
+        conn = self._create_connection()
+        if not conn: pengirim.kirim(EventFatal("Tidak bisa terhubung ke database.")); return
+        ctx = multiprocessing.get_context()
+        antrian_tugas = ctx.Queue(); antrian_hasil = ctx.Queue(maxsize=jumlah_proses * 4) # Terbatas: worker menunggu jika induk tertinggal
+        tertunda = ctx.Value("q", 1); menganggur = ctx.Value("i", 0); batal = ctx.Event()
+        antrian_tugas.put(folder_path)
+        laju = pembatas.konfigurasi(bagi=jumlah_proses) if pembatas else None
+        proses = [ctx.Process(target=_worker_pindai_proses, args=(self.db_path, paksa_pindai_ulang, antrian_tugas, antrian_hasil, tertunda, menganggur, batal, jumlah_proses, laju, metrik is not None,
+                                                                            folder_path, aturan.konfigurasi() if aturan else None),
+                              daemon=True, name=f"pindai-{i}") for i in range(jumlah_proses)]
+        file_dipindai = 0; file_ditemukan = 0; total_terinfeksi = 0; worker_selesai = 0; statistik = Counter(); waktu_lapor = time.monotonic(); faktor_worker = {}
+        try:
+            self._siapkan_indeks(conn) # File indeks diperbarui sekali di sini SEBELUM worker jalan, lalu di-mmap oleh semua worker
+            for p in proses: p.start()
+            if pembatas: pengirim.kirim(EventStatus(pembatas.uraian()))
+            if aturan: pengirim.kirim(EventStatus(aturan.uraian()))
+            pengirim.kirim(EventStatus(f"Memulai pemindaian dengan {jumlah_proses} proses worker (total file dihitung sambil berjalan)..."))
+            while worker_selesai < jumlah_proses:
+                if cancel_event.is_set(): batal.set()
+                try: item = antrian_hasil.get(timeout=0.1)
+                except queue.Empty:
+                    if not any(p.is_alive() for p in proses): pengirim.kirim(EventFatal("Proses worker berhenti tanpa melapor.")); return
+                    continue
+                if item[0] == "selesai":
+                    worker_selesai += 1; statistik.update(item[1])
+                    if metrik and item[2]: metrik.gabung_proses(*item[2])
+                    continue
+                jumlah_selesai, jumlah_ditemukan, kabar, cache_simpan, cache_sentuh, laju_worker, metrik_worker = item
+                if metrik:
+                    if metrik_worker: metrik.gabung_proses(*metrik_worker)
+                    metrik.tulis_berkala()
+                file_dipindai += jumlah_selesai; file_ditemukan += jumlah_ditemukan
+                if pembatas and laju_worker: # (byte dibaca, faktor, alasan) dari worker; yang paling mundur yang dilaporkan
+                    pembatas.byte += laju_worker[0]; pembatas.file += jumlah_selesai
+                    faktor_worker[laju_worker[3]] = laju_worker[1:3]
+                    pembatas.faktor, pembatas.alasan = min(faktor_worker.values())
+                    if laporan := pembatas.laporan(): pengirim.kirim(EventLaju(**laporan))
+                for jenis, *data in kabar:
+                    if jenis == "deteksi": total_terinfeksi += 1; pengirim.kirim(EventDeteksi(*data))
+                    else: pengirim.kirim(EventError(*data))
+                pengirim.progres(jumlah_selesai)
+                self._tulis_cache(conn, cache_simpan, cache_sentuh)
+                if time.monotonic() - waktu_lapor >= INTERVAL_PERKIRAAN: pengirim.kirim(EventTotal(file_ditemukan, final=False)); waktu_lapor = time.monotonic()
+            if batal.is_set(): pengirim.kirim(EventDibatalkan()); return
+            pengirim.kirim(EventTotal(file_ditemukan))
+            if file_dipindai == 0: pengirim.kirim(EventSelesai(0, 0, "Tidak ada file ditemukan atau bisa diakses.")); return
+            self._pangkas_cache(conn); self.statistik_terakhir = dict(statistik)
+            if aturan and (pesan := uraian_lewati(statistik)): pengirim.kirim(EventStatus(pesan))
+            if pembatas: pengirim.kirim(EventLaju(**pembatas.laporan(akhir=True)))
+            pengirim.kirim(EventStatistik(dict(statistik)))
+            if metrik: self._kirim_metrik(pengirim, metrik)
+            pengirim.kirim(EventSelesai(file_dipindai, total_terinfeksi))
+        except Exception as e: pengirim.kirim(EventFatal(f"Gagal saat memindai file (multi-proses): {e}"))
         finally:
-            if conn: conn.close()
\ No newline at end of file
+            batal.set()
+            for p in proses:
+                if p.pid is None: continue # Belum sempat dijalankan
+                p.join(timeout=1)
+                if p.is_alive(): p.terminate()
+            conn.close()
+            if metrik: metrik.selesai()
+
+def _worker_pindai_proses(db_path, paksa_pindai_ulang, antrian_tugas, antrian_hasil, tertunda, menganggur, batal, jumlah_proses, laju=None, ukur=False, folder_path=None, aturan=None):
+    """Badan proses worker untuk Scanner._pindai_folder_multiproses (level modul agar bisa di-spawn).
+    laju: PembatasLaju.konfigurasi(); ukur: kumpulkan MetrikPindai & kirim totalnya ke proses induk;
+    aturan: AturanPindai.konfigurasi(), dievaluasi relatif terhadap folder_path."""
+    pembatas = PembatasLaju(**laju, batal=batal) if laju else None
+    if pembatas: pembatas.siapkan_thread() # Proses worker berutas tunggal: prioritas seluruh proses ikut turun
+    scanner = Scanner(db_path); scanner.metrik = metrik = MetrikPindai() if ukur else None
+    conn = scanner._create_connection(); indeks = scanner._muat_indeks(conn)
+    statistik = Counter(); kabar = []; cache_simpan = []; cache_sentuh = []; inode_dipindai = {}; waktu_pindai = time.time_ns()
+    hitungan = [0, 0, 0] # [file selesai, file ditemukan, byte dibaca pembatas] sejak batch terakhir
+    saring = AturanPindai(**aturan).penyaring(folder_path) if aturan else None
+
+    def kirim_batch():
+        if hitungan[0] or hitungan[1] or kabar:
+            laju_worker = (pembatas.byte - hitungan[2], pembatas.faktor, pembatas.alasan, os.getpid()) if pembatas else None
+            antrian_hasil.put((hitungan[0], hitungan[1], kabar[:], cache_simpan[:], cache_sentuh[:], laju_worker, (os.getpid(), metrik.data_mentah()) if metrik else None))
+            hitungan[0] = hitungan[1] = 0; kabar.clear(); cache_simpan.clear(); cache_sentuh.clear()
+            if pembatas: hitungan[2] = pembatas.byte
+
+    def periksa(entry):
+        """Tahapan yang sama dengan mode thread (ukuran -> hardlink -> cache -> blok awal -> hash penuh), tapi sinkron."""
+        if pembatas: pembatas.file_diproses()
+        try:
+            st = entry.stat()
+            if indeks and not indeks.lolos_ukuran(st.st_size): statistik["file_lewati_ukuran"] += 1; statistik["byte_lewati_ukuran"] += st.st_size; return
+            if not st.st_ino: st = os.stat(entry.path)
+        except OSError: st = None
+        kunci = (st.st_dev, st.st_ino) if st and st.st_ino else None
+        hasil = inode_dipindai.get(kunci) if kunci else None
+        if hasil is None and kunci and not paksa_pindai_ulang:
+            hasil = scanner._cari_cache(conn, st)
+            if hasil: statistik["file_dari_cache"] += 1; statistik["byte_lewati_cache"] += st.st_size; cache_sentuh.append((waktu_pindai, *kunci))
+        if hasil is None:
+            hasil = scanner._hitung_bertahap(entry.path, st.st_size, indeks, pembatas) if indeks and st and indeks.perlu_hash_awal(st.st_size) else scanner._hitung_hashes(entry.path, pembatas=pembatas)
+            if hasil is LEWATI_HASH_AWAL: statistik["file_lewati_hash_awal"] += 1; statistik["byte_lewati_hash_awal"] += st.st_size - UKURAN_BLOK_AWAL; return
+            if kunci and hasil[1] is not None:
+                statistik["byte_hash_penuh"] += st.st_size
+                cache_simpan.append((st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns, *hasil, waktu_pindai))
+        if kunci and st.st_nlink > 1: inode_dipindai[kunci] = hasil
+        hash_md5, hash_sha256 = hasil
+        if hash_sha256 is None: kabar.append(("error", "HASH", entry.path, hash_md5)); return
+        t0 = time.perf_counter_ns() if metrik else 0
+        cocok = scanner._check_hash(conn, hash_md5, hash_sha256)
+        if metrik: metrik.waktu("cek_hash", time.perf_counter_ns() - t0)
+        if cocok: kabar.append(("deteksi", entry.path, hash_sha256))
+
+    try:
+        while not batal.is_set():
+            with menganggur.get_lock(): menganggur.value += 1
+            try:
+                tugas = False
+                while tugas is False and not batal.is_set():
+                    try: tugas = antrian_tugas.get(timeout=0.1)
+                    except queue.Empty: pass
+            finally:
+                with menganggur.get_lock(): menganggur.value -= 1
+            if tugas is None or tugas is False: break # None: semua subtree selesai, False: dibatalkan
+            stack = [tugas]
+            while stack and not batal.is_set():
+                root = stack.pop(); files = []; subdirs = []; t0 = time.perf_counter_ns() if metrik else 0
+                try:
+                    with os.scandir(root) as it:
+                        for entry in it:
+                            try: is_dir = entry.is_dir()
+                            except OSError: is_dir = False
+                            if not is_dir:
+                                if saring is None or saring.file(entry): files.append(entry)
+                            elif not entry.is_symlink() and (saring is None or saring.folder(entry)): subdirs.append(entry.path)
+                except OSError as e:
+                    if metrik: metrik.error(type(e).__name__)
+                    kabar.append(("error", "PINDAI", root, "Izin ditolak untuk folder" if isinstance(e, PermissionError) else f"Gagal akses folder - {e}"))
+                if metrik: metrik.waktu("jelajah", time.perf_counter_ns() - t0); metrik.tambah("direktori"); metrik.tambah("file", len(files))
+                stack.extend(reversed(subdirs)); hitungan[1] += len(files)
+                for entry in files:
+                    if batal.is_set(): break
+                    periksa(entry); hitungan[0] += 1
+                    if hitungan[0] >= BATCH_HASIL_PROSES: kirim_batch()
+                # Work stealing: serahkan separuh tumpukan (folder terdangkal = subtree terbesar) jika ada worker menganggur
+                if menganggur.value > 0 and len(stack) > 1:
+                    separuh = len(stack) // 2; donasi = stack[:separuh]; del stack[:separuh]
+                    with tertunda.get_lock(): tertunda.value += len(donasi)
+                    for d in donasi: antrian_tugas.put(d)
+                    kirim_batch()
+            with tertunda.get_lock(): tertunda.value -= 1; habis = tertunda.value == 0
+            if habis:
+                for _ in range(jumlah_proses): antrian_tugas.put(None) # Bangunkan semua worker untuk berhenti
+    finally:
+        if pembatas: statistik["detik_tunggu_laju"] = round(pembatas.detik_tunggu, 2)
+        if saring: statistik.update(saring.lewati)
+        kirim_batch(); antrian_hasil.put(("selesai", dict(statistik), (os.getpid(), metrik.data_mentah()) if metrik else None))
+        if conn: conn.close()
+
+# ======================================================================
+# --- ANTARMUKA BARIS PERINTAH (Tanpa GUI) ---
+# ======================================================================
+# Kode keluar: 0 = bersih, 1 = ada file terdeteksi, 2 = error (argumen/DB/folder), 130 = dibatalkan (Ctrl+C)
+KELUAR_BERSIH, KELUAR_TERDETEKSI, KELUAR_ERROR, KELUAR_DIBATALKAN = 0, 1, 2, 130
+
+def _tulis_jsonl(data, keluaran=sys.stdout):
+    keluaran.write(json.dumps(data, ensure_ascii=False) + "\n"); keluaran.flush()
+
+def _jalankan_pemindaian(target, *args, **kwargs):
+    """Menjalankan target(..., progress_queue, cancel_event) di thread lalu menghasilkan event-nya (generator).
+    Ctrl+C menyetel cancel_event dan tetap menunggu event penutup dari pemindai."""
+    progress_queue = buat_antrian_event(); cancel_event = threading.Event()
+    threading.Thread(target=target, args=(*args, progress_queue, cancel_event), kwargs=kwargs, daemon=True, name="pindai-cli").start()
+    while True:
+        try: event = progress_queue.get(timeout=0.2)
+        except queue.Empty: continue
+        except KeyboardInterrupt: cancel_event.set(); print("Membatalkan pemindaian...", file=sys.stderr); continue
+        yield event
+        if isinstance(event, EVENT_AKHIR): return
+
+def _aturan_dari_args(args):
+    """AturanPindai dari file aturan (--aturan, default FILE_ATURAN jika ada) ditambah opsi baris perintah. ValueError jika tidak valid."""
+    if args.aturan and not os.path.isfile(args.aturan): raise ValueError(f"File aturan tidak ditemukan: {args.aturan}")
+    data = baca_aturan(args.aturan or FILE_ATURAN).konfigurasi()
+    data["kecuali"] += args.kecuali; data["sertakan"] += args.sertakan; data["kecuali_path"] += args.kecuali_path
+    if args.ukuran_maks is not None: data["ukuran_maks"] = int(args.ukuran_maks * 1048576)
+    if args.satu_fs: data["satu_filesystem"] = True
+    if args.pindai_khusus: data["lewati_khusus"] = False
+    if args.pindai_semu: data["lewati_semu"] = False
+    return AturanPindai(**data)
+
+def _perintah_scan(args):
+    if not os.path.isfile(args.db): print(f"Database tidak ditemukan: {args.db}", file=sys.stderr); return KELUAR_ERROR
+    scanner = Scanner(args.db); kode = KELUAR_BERSIH; pembatas = None
+    if args.path is None:
+        if not args.lanjutkan: print("PATH wajib diisi (atau pakai --lanjutkan untuk melanjutkan pemindaian terakhir).", file=sys.stderr); return KELUAR_ERROR
+        if not (terakhir := scanner.ambil_checkpoint()): print("Tidak ada pemindaian yang bisa dilanjutkan.", file=sys.stderr); return KELUAR_ERROR
+        args.path = terakhir["folder"]
+    if args.hemat or args.batas_mb is not None or args.batas_file is not None: # 0 = tanpa batas untuk jenis itu
+        pembatas = PembatasLaju(LAJU_BYTE_HEMAT if args.batas_mb is None else args.batas_mb * 1048576,
+                                LAJU_FILE_HEMAT if args.batas_file is None else args.batas_file, path=args.path)
+    metrik = MetrikPindai(args.metrik_prom, args.profil, args.profil_keluaran) if args.metrik or args.metrik_prom or args.profil else None
+    try: aturan = _aturan_dari_args(args)
+    except ValueError as e: print(e, file=sys.stderr); return KELUAR_ERROR
+    for event in _jalankan_pemindaian(scanner.pindai_folder, args.path, jumlah_worker=args.workers, paksa_pindai_ulang=args.paksa, jumlah_proses=args.proses, pembatas=pembatas, metrik=metrik,
+                                      checkpoint=not args.tanpa_checkpoint and args.proses <= 1, lanjutkan=args.lanjutkan, aturan=aturan):
+        if isinstance(event, EventDeteksi): kode = KELUAR_TERDETEKSI; _tulis_jsonl(ke_dict(event))
+        elif isinstance(event, EventError) and args.tampilkan_error: _tulis_jsonl(ke_dict(event))
+        elif isinstance(event, EventMetrik): _tulis_jsonl(ke_dict(event))
+        elif isinstance(event, (EventStatus, EventError, EventLaju)) and not args.quiet: print(event, file=sys.stderr)
+        elif isinstance(event, EVENT_AKHIR):
+            _tulis_jsonl(ke_dict(event))
+            if isinstance(event, EventFatal): return KELUAR_ERROR
+            if isinstance(event, EventDibatalkan): return KELUAR_DIBATALKAN
+    return kode
+
+def _perintah_watch(args):
+    from pantau import pantau_folder # Impor di sini: pantau.py sendiri mengimpor modul ini
+    if not os.path.isfile(args.db): print(f"Database tidak ditemukan: {args.db}", file=sys.stderr); return KELUAR_ERROR
+    scanner = Scanner(args.db); kode = KELUAR_BERSIH
+    for event in _jalankan_pemindaian(pantau_folder, scanner, args.path, backend=args.backend, jumlah_worker=args.workers):
+        if isinstance(event, EventDeteksi): kode = KELUAR_TERDETEKSI; _tulis_jsonl(ke_dict(event))
+        elif isinstance(event, EventError) and args.tampilkan_error: _tulis_jsonl(ke_dict(event))
+        elif isinstance(event, (EventStatus, EventError, EventStatistik)) and not args.quiet: print(event, file=sys.stderr)
+        elif isinstance(event, EVENT_AKHIR):
+            _tulis_jsonl(ke_dict(event))
+            if isinstance(event, EventFatal): return KELUAR_ERROR
+    return kode
+
+def _perintah_daemon(args):
+    from daemon_pindai import SOCKET_DAEMON, jalankan_daemon # Impor di sini: daemon_pindai.py sendiri mengimpor modul ini
+    if not os.path.isfile(args.db): print(f"Database tidak ditemukan: {args.db}", file=sys.stderr); return KELUAR_ERROR
+    laporan = (lambda pesan: None) if args.quiet else (lambda pesan: print(f"STATUS: {pesan}", file=sys.stderr))
+    try: jalankan_daemon(Scanner(args.db), args.socket or SOCKET_DAEMON, args.workers, laporan)
+    except (OSError, RuntimeError) as e: print(f"Daemon gagal dijalankan: {e}", file=sys.stderr); return KELUAR_ERROR
+    return KELUAR_BERSIH
+
+def _perintah_klien(args):
+    import asyncio
+    from daemon_pindai import SOCKET_DAEMON, KlienDaemon
+    path_socket = args.socket or SOCKET_DAEMON
+    async def jalankan():
+        kode = KELUAR_BERSIH
+        async with KlienDaemon(path_socket) as klien:
+            async for event in klien.pindai(args.path, paksa=args.paksa):
+                if isinstance(event, EventDeteksi): kode = KELUAR_TERDETEKSI; _tulis_jsonl(ke_dict(event))
+                elif isinstance(event, EventError):
+                    if args.tampilkan_error: _tulis_jsonl(ke_dict(event))
+                    elif not args.quiet: print(event, file=sys.stderr)
+                elif isinstance(event, EVENT_AKHIR):
+                    _tulis_jsonl(ke_dict(event))
+                    if not isinstance(event, EventSelesai): return KELUAR_ERROR
+        return kode
+    try: return asyncio.run(jalankan())
+    except OSError as e: print(f"Tidak bisa terhubung ke daemon di {path_socket}: {e}", file=sys.stderr); return KELUAR_ERROR
+
+def _perintah_distribusi(args):
+    import distribusi
+    laporan = (lambda pesan: None) if args.quiet else (lambda pesan: print(f"STATUS: {pesan}", file=sys.stderr))
+    try:
+        if args.aksi == "manifest":
+            manifest = distribusi.buat_manifest(args.root, args.shard); distribusi.simpan_manifest(manifest, args.output)
+            _tulis_jsonl({"event": "manifest", "path": args.output, "jumlah_shard": len(manifest["shard"]), **{k: manifest[k] for k in ("id", "root", "total_byte", "total_file", "total_folder", "detik_jelajah")}})
+            return KELUAR_BERSIH
+        manifest = distribusi.baca_manifest(args.manifest)
+        if args.aksi == "status":
+            for entri in distribusi.status_shard(manifest, args.hasil): _tulis_jsonl({"event": "shard", **entri})
+            return KELUAR_BERSIH
+        if args.aksi in ("kerjakan", "lokal") and not os.path.isfile(args.db): print(f"Database tidak ditemukan: {args.db}", file=sys.stderr); return KELUAR_ERROR
+        if args.aksi == "kerjakan":
+            for ringkasan in distribusi.kerjakan(Scanner(args.db), manifest, args.hasil, args.root_lokal, args.workers, args.shard, args.ambil_alih, args.paksa, laporan): _tulis_jsonl({"event": "shard", **ringkasan})
+            return KELUAR_BERSIH
+        if args.aksi == "lokal": hasil = distribusi.jalankan_lokal(args.db, manifest, args.hasil, args.proses, args.workers or 1, args.root_lokal, laporan)
+        else: hasil = distribusi.gabung_hasil(manifest, args.hasil, args.dengan_error)
+    except (OSError, ValueError) as e: print(f"Distribusi gagal: {e}", file=sys.stderr); return KELUAR_ERROR
+    except KeyboardInterrupt: print("Dibatalkan; shard yang sedang dikerjakan bisa diambil alih setelah detaknya kedaluwarsa.", file=sys.stderr); return KELUAR_DIBATALKAN
+    for pesan in hasil["peringatan"]: laporan(pesan)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: json.dump(hasil, f, ensure_ascii=False, indent=1)
+        _tulis_jsonl({"event": "laporan", "path": args.output, **{k: hasil[k] for k in ("id_manifest", "dipindai", "terinfeksi", "jumlah_error", "shard_kurang")}})
+    else: _tulis_jsonl({"event": "laporan", **hasil})
+    return KELUAR_TERDETEKSI if hasil["terinfeksi"] else KELUAR_ERROR if hasil["shard_kurang"] else KELUAR_BERSIH
+
+def _perintah_import(args):
+    scanner = Scanner(args.db)
+    laporan = None if args.quiet else (lambda st: print(f"... {st['dibaca']} baris, {st['ditambahkan']} baru, {st['baris_per_detik']:.0f} baris/s", file=sys.stderr))
+    sukses, hasil = scanner.impor_massal(args.file, format_feed=args.format, ukuran_batch=args.batch, laporan=laporan, versi=args.versi)
+    if not sukses: print(hasil, file=sys.stderr); return KELUAR_ERROR
+    _tulis_jsonl({"event": "impor", **hasil}); return KELUAR_BERSIH
+
+def _perintah_delta(args):
+    if not os.path.isfile(args.db): print(f"Database tidak ditemukan: {args.db}", file=sys.stderr); return KELUAR_ERROR
+    scanner = Scanner(args.db)
+    for path in args.file: # Urut sesuai argumen; berhenti di delta pertama yang gagal agar tidak ada versi yang terlewat
+        sukses, hasil = scanner.terapkan_delta(path)
+        if not sukses: print(f"{path}: {hasil}", file=sys.stderr); return KELUAR_ERROR
+        if not hasil["diterapkan"] and not args.quiet: print(f"{path}: versi {hasil['versi']} sudah diterapkan (database di versi {hasil['versi_db']}), dilewati.", file=sys.stderr)
+        _tulis_jsonl({"event": "delta", "file": path, **hasil})
+    return KELUAR_BERSIH
+
+def buat_parser():
+    parser = argparse.ArgumentParser(prog="python -m scanner_logic", description="Pemindai AntiVirus KSS tanpa GUI. Hasil ditulis ke stdout sebagai JSON Lines.")
+    parser.add_argument("--db", default=DATABASE_FILE, help=f"file database signature (default: {DATABASE_FILE})")
+    sub = parser.add_subparsers(dest="perintah", required=True)
+    p_scan = sub.add_parser("scan", help="memindai folder, satu baris JSON per file terdeteksi")
+    p_scan.add_argument("path", nargs="?", default=None, help="folder yang dipindai (boleh kosong dengan --lanjutkan: folder pemindaian terakhir yang terhenti)")
+    p_scan.add_argument("--workers", type=int, default=None, help=f"jumlah thread hashing (default: {MAX_SCAN_WORKERS}, 1 = serial)")
+    p_scan.add_argument("--proses", type=int, default=0, help="pakai N proses worker (mode multi-proses untuk pohon sangat besar)")
+    p_scan.add_argument("--paksa", action="store_true", help="abaikan scan_cache, hash ulang semua file")
+    p_scan.add_argument("--lanjutkan", action="store_true", help="lanjutkan dari checkpoint pemindaian yang terhenti (batal/Ctrl+C/proses mati)")
+    p_scan.add_argument("--tanpa-checkpoint", dest="tanpa_checkpoint", action="store_true", help=f"jangan simpan checkpoint tiap {INTERVAL_CHECKPOINT:g} detik (default: disimpan, kecuali mode --proses)")
+    p_scan.add_argument("--aturan", default=None, metavar="FILE", help=f"file aturan pengecualian JSON (default: {FILE_ATURAN} jika ada); opsi di bawah ditambahkan ke isinya")
+    p_scan.add_argument("--kecuali", action="append", default=[], metavar="GLOB", help="lewati file/folder yang namanya cocok (mis. '*.iso', 'node_modules'); dengan '/' dicocokkan ke path relatif (bisa berulang)")
+    p_scan.add_argument("--sertakan", action="append", default=[], metavar="GLOB", help="hanya pindai file yang cocok (mis. '*.exe'); folder tetap dijelajahi (bisa berulang)")
+    p_scan.add_argument("--kecuali-path", dest="kecuali_path", action="append", default=[], metavar="PATH", help="lewati file/folder ini beserta isinya (bisa berulang)")
+    p_scan.add_argument("--ukuran-maks", dest="ukuran_maks", type=float, default=None, metavar="MB", help="lewati file lebih besar dari MB (0 = tanpa batas)")
+    p_scan.add_argument("--satu-fs", dest="satu_fs", action="store_true", help="jangan masuk ke folder di filesystem/mount lain")
+    p_scan.add_argument("--pindai-khusus", dest="pindai_khusus", action="store_true", help="ikut buka FIFO, socket & device (default: dilewati, bisa memblok)")
+    p_scan.add_argument("--pindai-semu", dest="pindai_semu", action="store_true", help="ikut masuk ke filesystem semu seperti /proc & /sys (default: dipangkas)")
+    p_scan.add_argument("--hemat", action="store_true", help="mode hemat untuk server produksi: batas laju baca, prioritas CPU/I/O rendah, mundur saat sistem sibuk")
+    p_scan.add_argument("--batas-mb", dest="batas_mb", type=float, default=None, help=f"mode hemat: batas baca MB/detik (default: {LAJU_BYTE_HEMAT >> 20}, 0 = tanpa batas)")
+    p_scan.add_argument("--batas-file", dest="batas_file", type=float, default=None, help=f"mode hemat: batas file/detik (default: {LAJU_FILE_HEMAT}, 0 = tanpa batas)")
+    p_scan.add_argument("--tampilkan-error", dest="tampilkan_error", action="store_true", help="tulis juga error per file sebagai JSON ke stdout")
+    p_scan.add_argument("--metrik", action="store_true", help="ukur waktu per fase & tulis snapshot metrik sebagai JSON di akhir")
+    p_scan.add_argument("--metrik-prom", dest="metrik_prom", default=None, metavar="FILE", help="tulis metrik berkala dalam format teks Prometheus ke FILE (mengaktifkan --metrik)")
+    p_scan.add_argument("--profil", choices=("cprofile", "tracemalloc"), default=None, help="profilkan pemindaian ini (mengaktifkan --metrik)")
+    p_scan.add_argument("--profil-keluaran", dest="profil_keluaran", default=None, metavar="FILE", help="file laporan profil (cProfile: akhiran .prof = data biner pstats)")
+    p_scan.add_argument("-q", "--quiet", action="store_true", help="jangan tulis pesan status ke stderr")
+    p_scan.set_defaults(fungsi=_perintah_scan)
+    p_watch = sub.add_parser("watch", help="memantau folder secara real-time (Linux), berjalan sampai Ctrl+C")
+    p_watch.add_argument("path", nargs="+", help="folder yang dipantau (beserta subfoldernya)")
+    p_watch.add_argument("--backend", choices=("inotify", "fanotify"), default="inotify", help="fanotify: satu mark per mount, perlu root (default: inotify)")
+    p_watch.add_argument("--workers", type=int, default=None, help=f"jumlah thread pemeriksa (default: {MAX_SCAN_WORKERS})")
+    p_watch.add_argument("--tampilkan-error", dest="tampilkan_error", action="store_true", help="tulis juga error per file sebagai JSON ke stdout")
+    p_watch.add_argument("-q", "--quiet", action="store_true", help="jangan tulis pesan status ke stderr")
+    p_watch.set_defaults(fungsi=_perintah_watch)
+    p_daemon = sub.add_parser("daemon", help="jalankan daemon pemindai (indeks & scan_cache tetap di memori) di Unix socket, berjalan sampai Ctrl+C")
+    p_daemon.add_argument("--socket", default=None, help="path Unix socket (default: $XDG_RUNTIME_DIR atau /tmp, kss_pindai-UID.sock)")
+    p_daemon.add_argument("--workers", type=int, default=None, help=f"jumlah thread pemeriksa bersama untuk semua permintaan (default: {MAX_SCAN_WORKERS})")
+    p_daemon.add_argument("-q", "--quiet", action="store_true", help="jangan tulis pesan status ke stderr")
+    p_daemon.set_defaults(fungsi=_perintah_daemon)
+    p_klien = sub.add_parser("klien", help="memindai file/folder lewat daemon yang sedang berjalan, satu baris JSON per file terdeteksi")
+    p_klien.add_argument("path", nargs="+", help="file atau folder yang dipindai")
+    p_klien.add_argument("--socket", default=None, help="path Unix socket daemon (default sama dengan perintah daemon)")
+    p_klien.add_argument("--paksa", action="store_true", help="abaikan scan_cache, hash ulang semua file")
+    p_klien.add_argument("--tampilkan-error", dest="tampilkan_error", action="store_true", help="tulis juga error per file sebagai JSON ke stdout")
+    p_klien.add_argument("-q", "--quiet", action="store_true", help="jangan tulis error ke stderr")
+    p_klien.set_defaults(fungsi=_perintah_klien)
+    p_dist = sub.add_parser("distribusi", help="pemindaian terdistribusi: manifest shard, worker per node, status straggler, gabung hasil")
+    sub_dist = p_dist.add_subparsers(dest="aksi", required=True)
+    d = sub_dist.add_parser("manifest", help="bagi ROOT menjadi shard berisi subtree dengan perkiraan byte/file")
+    d.add_argument("root", help="folder yang akan dipindai bersama"); d.add_argument("--shard", type=int, required=True, help="jumlah shard (mis. 2-4x jumlah node)")
+    d.add_argument("-o", "--output", default="manifest.json", help="file manifest (default: manifest.json)")
+    d.add_argument("-q", "--quiet", action="store_true", help="jangan tulis pesan status ke stderr")
+    bantuan = {"kerjakan": "worker satu node: klaim & pindai shard sampai habis, tulis file hasil per shard",
+               "status": "status tiap shard (selesai/berjalan/lambat/macet/belum) sebagai JSON Lines",
+               "gabung": "gabungkan semua file hasil menjadi satu laporan", "lokal": "uji lokal: N proses worker sebagai pengganti node, lalu gabung"}
+    for aksi, teks in bantuan.items():
+        d = sub_dist.add_parser(aksi, help=teks); d.add_argument("manifest", help="file manifest"); d.add_argument("hasil", help="folder hasil bersama (klaim, progres & file hasil)")
+        if aksi in ("kerjakan", "lokal"):
+            d.add_argument("--root-lokal", dest="root_lokal", default=None, help="lokasi root manifest di node ini jika di-mount di path lain")
+            d.add_argument("--workers", type=int, default=None, help="jumlah thread hashing per worker")
+        if aksi == "kerjakan":
+            d.add_argument("--shard", type=int, default=None, help="kerjakan shard ini saja meskipun sudah diklaim (menjalankan ulang straggler)")
+            d.add_argument("--ambil-alih", dest="ambil_alih", action="store_true", help="ikut klaim shard yang workernya macet (detak berhenti)")
+            d.add_argument("--paksa", action="store_true", help="abaikan scan_cache, hash ulang semua file")
+        if aksi == "lokal": d.add_argument("--proses", type=int, default=max(2, MAX_SCAN_WORKERS // 2), help="jumlah proses worker")
+        if aksi in ("gabung", "lokal"):
+            d.add_argument("-o", "--output", default=None, help="tulis laporan JSON lengkap ke file ini (default: satu baris JSON ke stdout)")
+            d.add_argument("--dengan-error", dest="dengan_error", action="store_true", help="sertakan daftar error per file di laporan")
+        d.add_argument("-q", "--quiet", action="store_true", help="jangan tulis pesan status ke stderr")
+    p_dist.set_defaults(fungsi=_perintah_distribusi)
+    p_import = sub.add_parser("import", help="impor massal daftar hash (teks/csv/jsonl) ke database")
+    p_import.add_argument("file", help="file feed; teks: 'md5 sha256 [ukuran [hash_awal]]' per baris, csv/jsonl: kolom md5,sha256,ukuran,hash_awal")
+    p_import.add_argument("--format", choices=("teks", "csv", "jsonl"), default=None, help="format feed (default: dari ekstensi file)")
+    p_import.add_argument("--batch", type=int, default=BATCH_IMPOR, help=f"baris per transaksi (default: {BATCH_IMPOR})")
+    p_import.add_argument("--versi", type=int, default=None, help="versi feed dari snapshot ini; delta berikutnya diterapkan di atasnya")
+    p_import.add_argument("-q", "--quiet", action="store_true", help="jangan tulis progres ke stderr")
+    p_import.set_defaults(fungsi=_perintah_import)
+    p_delta = sub.add_parser("delta", help=f"terapkan file delta signature ({EKSTENSI_DELTA}) secara atomik, urut versi")
+    p_delta.add_argument("file", nargs="+", help="file delta: '# delta-signature versi=N [dasar=M]', lalu '+ md5 sha256 [ukuran [hash_awal]]' / '- hash' per baris")
+    p_delta.add_argument("-q", "--quiet", action="store_true", help="jangan tulis pesan status ke stderr")
+    p_delta.set_defaults(fungsi=_perintah_delta)
+    return parser
+
+def main(argv=None):
+    args = buat_parser().parse_args(argv)
+    return args.fungsi(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
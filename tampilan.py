@@ -0,0 +1,149 @@
+# File: tampilan.py
+# Widget Tk untuk data bervolume besar: log berbuffer cincin (disisipkan per batch sekali per tick GUI, jumlah baris di
+# widget dibatasi, log lengkap ditulis ke file berputar) & daftar virtual (Listbox hanya berisi baris yang terlihat).
+
+import logging
+import logging.handlers
+import tkinter as tk
+import tkinter.font as tkfont
+from collections import deque
+from datetime import datetime
+from tkinter import ttk
+
+# --- KONFIGURASI ---
+MAKS_BARIS_LOG = 5000 # Baris yang disimpan widget log; yang lebih lama dibuang dari tampilan (tetap ada di file log)
+UKURAN_FILE_LOG = 5 << 20 # Byte per file log sebelum diputar (log_pindai.log -> log_pindai.log.1 ...)
+JUMLAH_CADANGAN_LOG = 3 # File log lama yang disimpan
+BARIS_GULIR_RODA = 3 # Baris per langkah roda mouse di DaftarVirtual
+
+class LogBerbuffer:
+    """
+    Log untuk widget Text. tulis() hanya menambah ke buffer cincin (deque maxlen = maks_baris, jadi ledakan pesan tidak
+    menumpuk di memori); segarkan() dipanggil sekali per tick GUI: satu insert untuk semua baris baru, baris tertua di
+    atas maks_baris dibuang, dan gulir otomatis hanya jika pengguna sedang melihat baris terakhir.
+    path_file: semua baris (termasuk yang tidak pernah tampil) juga ditulis per batch ke file berputar.
+    """
+    def __init__(self, widget, path_file=None, maks_baris=MAKS_BARIS_LOG):
+        self.widget = widget; self.maks_baris = maks_baris
+        self._tertunda = deque(maxlen=maks_baris); self._tertunda_file = []; self._handler = None
+        if path_file:
+            try: self._handler = logging.handlers.RotatingFileHandler(path_file, maxBytes=UKURAN_FILE_LOG, backupCount=JUMLAH_CADANGAN_LOG, encoding="utf-8", delay=True)
+            except OSError as e: print(f"File log '{path_file}' tidak bisa dibuka, log hanya di layar: {e}")
+
+    def tulis(self, pesan):
+        baris = f"{datetime.now().strftime('[%H:%M:%S]')} {pesan}"
+        self._tertunda.append(baris)
+        if self._handler: self._tertunda_file.append(baris)
+
+    def _tulis_file(self):
+        if not self._tertunda_file: return
+        teks = "\n".join(self._tertunda_file); self._tertunda_file.clear()
+        self._handler.handle(logging.makeLogRecord({"msg": teks})) # Satu record per batch; rotasi diperiksa per record
+
+    def segarkan(self):
+        if self._handler: self._tulis_file()
+        if not self._tertunda: return
+        teks = "\n".join(self._tertunda) + "\n"; self._tertunda.clear()
+        di_bawah = self.widget.yview()[1] >= 0.999
+        self.widget.config(state=tk.NORMAL); self.widget.insert(tk.END, teks)
+        berlebih = int(self.widget.index("end-1c").split(".")[0]) - 1 - self.maks_baris
+        if berlebih > 0: self.widget.delete("1.0", f"{berlebih + 1}.0")
+        self.widget.config(state=tk.DISABLED)
+        if di_bawah: self.widget.see(tk.END)
+
+    def tutup(self):
+        """Menulis sisa buffer ke file & menutupnya (dipanggil saat aplikasi ditutup)."""
+        if self._handler: self._tulis_file(); self._handler.close(); self._handler = None
+
+class DaftarVirtual(ttk.Frame):
+    """
+    Daftar virtual pengganti Listbox: data disimpan di list Python dan Listbox hanya berisi baris yang terlihat (diisi
+    ulang saat digulir), jadi 100 ribu entri tampil seketika. Pilihan seperti selectmode EXTENDED (klik, Ctrl-klik,
+    Shift-klik, Ctrl+A, panah) disimpan sebagai indeks data. tambah() murah per event; tampilan diperbarui di segarkan().
+    """
+    def __init__(self, master, height=10, **kwargs):
+        super().__init__(master, **kwargs)
+        self.grid_rowconfigure(0, weight=1); self.grid_columnconfigure(0, weight=1)
+        self.data = []; self.terpilih = set(); self.jangkar = None; self.awal = 0; self.baris = height; self._kotor = False
+        self.listbox = tk.Listbox(self, height=height, selectmode=tk.EXTENDED, exportselection=False, activestyle="none")
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._gulir_scrollbar)
+        self.listbox.grid(row=0, column=0, sticky="nsew"); self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.listbox.bind("<Configure>", self._ubah_ukuran)
+        self.listbox.bind("<Button-1>", lambda e: self._klik(e, "ganti")); self.listbox.bind("<Control-Button-1>", lambda e: self._klik(e, "tambah")); self.listbox.bind("<Shift-Button-1>", lambda e: self._klik(e, "rentang"))
+        self.listbox.bind("<B1-Motion>", lambda e: self._klik(e, "rentang")); self.listbox.bind("<Double-Button-1>", lambda e: "break")
+        self.listbox.bind("<MouseWheel>", lambda e: self._gulir_ke(self.awal + (-BARIS_GULIR_RODA if e.delta > 0 else BARIS_GULIR_RODA)))
+        self.listbox.bind("<Button-4>", lambda e: self._gulir_ke(self.awal - BARIS_GULIR_RODA)); self.listbox.bind("<Button-5>", lambda e: self._gulir_ke(self.awal + BARIS_GULIR_RODA))
+        for tombol, langkah in (("<Up>", -1), ("<Down>", 1), ("<Prior>", -height), ("<Next>", height)): self.listbox.bind(tombol, lambda e, n=langkah: self._gerak(n))
+        self.listbox.bind("<Home>", lambda e: self._gerak(-len(self.data))); self.listbox.bind("<End>", lambda e: self._gerak(len(self.data)))
+        self.listbox.bind("<Control-a>", self._pilih_semua)
+
+    # --- DATA ---
+
+    def __len__(self): return len(self.data)
+
+    def tambah(self, *item):
+        self.data.extend(item); self._kotor = True
+
+    def kosongkan(self):
+        self.data = []; self.terpilih.clear(); self.jangkar = None; self.awal = 0; self._tampilkan()
+
+    def buang(self, item):
+        """Membuang semua entri yang ada di `item` (set); pilihan direset."""
+        item = set(item); self.data = [p for p in self.data if p not in item]; self.terpilih.clear(); self.jangkar = None; self._tampilkan()
+
+    def semua(self): return list(self.data)
+
+    def ambil_terpilih(self): return [self.data[i] for i in sorted(self.terpilih) if i < len(self.data)]
+
+    def segarkan(self):
+        """Dipanggil sekali per tick GUI: menggambar ulang jendela baris terlihat jika data bertambah."""
+        if self._kotor: self._tampilkan()
+
+    # --- TAMPILAN ---
+
+    def _tampilkan(self):
+        n = len(self.data); self.awal = max(0, min(self.awal, n - self.baris))
+        potongan = self.data[self.awal:self.awal + self.baris]
+        self.listbox.delete(0, tk.END)
+        if potongan: self.listbox.insert(tk.END, *potongan)
+        for i in range(len(potongan)):
+            if self.awal + i in self.terpilih: self.listbox.selection_set(i)
+        self.scrollbar.set(*((self.awal / n, (self.awal + len(potongan)) / n) if n else (0, 1))); self._kotor = False
+
+    def _ubah_ukuran(self, event):
+        font = tkfont.Font(font=self.listbox.cget("font"))
+        tinggi_baris = font.metrics("linespace") + 1 + 2 * int(self.listbox.cget("selectborderwidth"))
+        tepi = 2 * (int(self.listbox.cget("borderwidth")) + int(self.listbox.cget("highlightthickness")))
+        baris = max(1, (event.height - tepi) // tinggi_baris)
+        if baris != self.baris: self.baris = baris; self._tampilkan()
+
+    def _gulir_ke(self, awal):
+        self.awal = awal; self._tampilkan(); return "break"
+
+    def _gulir_scrollbar(self, aksi, jumlah, satuan=None):
+        if aksi == "moveto": self._gulir_ke(int(float(jumlah) * len(self.data)))
+        else: self._gulir_ke(self.awal + int(jumlah) * (self.baris if satuan == "pages" else 1))
+
+    def _lihat(self, i):
+        """Menggulir seminimal mungkin agar indeks data i terlihat."""
+        if i < self.awal: self.awal = i
+        elif i >= self.awal + self.baris: self.awal = i - self.baris + 1
+
+    # --- PILIHAN ---
+
+    def _klik(self, event, mode):
+        self.listbox.focus_set()
+        if not self.data: return "break"
+        i = min(self.awal + self.listbox.nearest(event.y), len(self.data) - 1)
+        if mode == "rentang" and self.jangkar is not None: self.terpilih = set(range(min(self.jangkar, i), max(self.jangkar, i) + 1))
+        elif mode == "tambah": self.terpilih ^= {i}; self.jangkar = i
+        else: self.terpilih = {i}; self.jangkar = i
+        self._lihat(i); self._tampilkan(); return "break"
+
+    def _gerak(self, langkah):
+        if not self.data: return "break"
+        i = max(0, min(len(self.data) - 1, (self.jangkar if self.jangkar is not None else self.awal - 1) + langkah))
+        self.terpilih = {i}; self.jangkar = i; self._lihat(i); self._tampilkan(); return "break"
+
+    def _pilih_semua(self, event=None):
+        self.terpilih = set(range(len(self.data))); self._tampilkan(); return "break"
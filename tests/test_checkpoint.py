@@ -0,0 +1,94 @@
+# File: tests/test_checkpoint.py
+# Pemindaian yang dibatalkan lalu dilanjutkan dari checkpoint harus memproses tiap file tepat sekali,
+# di titik batal mana pun (termasuk di dalam subfolder & tepat setelah folder yang gagal dibuka).
+
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import scanner_logic
+from event_pindai import EVENT_AKHIR, EventDeteksi, EventDibatalkan, EventError, EventSelesai
+from scanner_logic import Scanner
+
+# Isi pohon uji: urutan pemindaian = file (urut nama) lalu subfolder (urut nama) di tiap folder
+POHON = {"": ["r0", "r1"], "a": ["a0", "a1"], "a/b": ["b0", "b1", "b2"], "a/b/kunci": ["k0"], "a/c": ["c0"], "d": ["d0", "d1"]}
+FOLDER_GAGAL = "kunci" # os.scandir menolak folder ini (PermissionError), seperti folder tanpa izin baca
+FILE_VIRUS = "a/b/b1"
+
+class AntrianPemicu(queue.Queue):
+    """progress_queue yang memanggil `pemicu` untuk tiap EventError (folder gagal ikut dihitung sebagai langkah pemindaian)."""
+    def __init__(self, pemicu):
+        super().__init__(); self.pemicu = pemicu
+    def put(self, item, *args, **kwargs):
+        super().put(item, *args, **kwargs)
+        if isinstance(item, EventError): self.pemicu()
+
+class UjiCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(); self.addCleanup(self.tmp.cleanup)
+        self.root = os.path.join(self.tmp.name, "pohon"); self.md5_ke_path = {}
+        for folder, files in POHON.items():
+            os.makedirs(os.path.join(self.root, folder), exist_ok=True)
+            for nama in files:
+                path = os.path.join(self.root, folder, nama); isi = path.encode() + os.urandom(64) # Isi unik: md5 -> path
+                with open(path, "wb") as f: f.write(isi)
+                self.md5_ke_path[hashlib.md5(isi).hexdigest()] = path
+                if path == os.path.join(self.root, *FILE_VIRUS.split("/")): self.virus = (hashlib.md5(isi).digest(), hashlib.sha256(isi).digest())
+        self.terbaca = sorted(p for p in self.md5_ke_path.values() if os.sep + FOLDER_GAGAL + os.sep not in p)
+        scandir = os.scandir
+        def scandir_uji(path="."):
+            if os.path.basename(path) == FOLDER_GAGAL: raise PermissionError(13, "Permission denied", path)
+            return scandir(path)
+        patcher = mock.patch.object(scanner_logic.os, "scandir", scandir_uji); patcher.start(); self.addCleanup(patcher.stop)
+
+    def pindai(self, db_path, batal_setelah=None, lanjutkan=False):
+        """Satu pemindaian serial dengan checkpoint; batal setelah `batal_setelah` langkah (file diproses atau folder gagal).
+        Mengembalikan (event, path yang diproses)."""
+        scanner = Scanner(db_path); diproses = []; batal = threading.Event()
+        # Signature lama tanpa ukuran menonaktifkan prefilter: setiap file di-hash & dicek tepat saat diproses
+        conn = scanner._create_connection()
+        with conn: conn.execute("INSERT OR IGNORE INTO signatures (md5, sha256) VALUES (?, ?)", self.virus)
+        conn.close()
+        jumlah_error = 0
+        def langkah():
+            if batal_setelah is not None and len(diproses) + jumlah_error >= batal_setelah: batal.set()
+        def pemicu_error():
+            nonlocal jumlah_error
+            jumlah_error += 1; langkah()
+        cek_hash = scanner._check_hash
+        def check_hash(conn, hash_md5, hash_sha256):
+            diproses.append(self.md5_ke_path[hash_md5]); langkah()
+            return cek_hash(conn, hash_md5, hash_sha256)
+        scanner._check_hash = check_hash
+        antrian = AntrianPemicu(pemicu_error)
+        scanner.pindai_folder(self.root, antrian, batal, jumlah_worker=1, paksa_pindai_ulang=True, checkpoint=True, lanjutkan=lanjutkan)
+        event = []
+        while not antrian.empty(): event.append(antrian.get_nowait())
+        self.assertIsInstance(event[-1], EVENT_AKHIR); self.assertEqual(sum(isinstance(e, EVENT_AKHIR) for e in event), 1)
+        return event, diproses
+
+    def test_batal_lalu_lanjut_memproses_tiap_file_sekali(self):
+        langkah_total = len(self.terbaca) + 1 # + folder gagal
+        for batal_setelah in range(1, langkah_total):
+            with self.subTest(batal_setelah=batal_setelah):
+                db_path = os.path.join(self.tmp.name, f"uji{batal_setelah}.db")
+                event1, diproses1 = self.pindai(db_path, batal_setelah)
+                self.assertIsInstance(event1[-1], EventDibatalkan)
+                self.assertIsNotNone(Scanner(db_path).ambil_checkpoint(os.path.abspath(self.root)))
+                event2, diproses2 = self.pindai(db_path, lanjutkan=True)
+                selesai = event2[-1]
+                self.assertIsInstance(selesai, EventSelesai)
+                self.assertEqual(sorted(diproses1 + diproses2), self.terbaca) # Tepat sekali: tanpa duplikat & tanpa yang terlewat
+                self.assertEqual((selesai.dipindai, selesai.terinfeksi), (len(self.terbaca), 1))
+                error = [e for e in event1 + event2 if isinstance(e, EventError)]
+                self.assertEqual([os.path.basename(e.path) for e in error], [FOLDER_GAGAL])
+                # Deteksi sebelum batal dikirim ulang dari checkpoint: daftar deteksi pemindaian lanjutan tetap lengkap
+                self.assertEqual([e.path for e in event2 if isinstance(e, EventDeteksi)], [os.path.join(os.path.abspath(self.root), *FILE_VIRUS.split("/"))])
+                self.assertIsNone(Scanner(db_path).ambil_checkpoint(os.path.abspath(self.root)))
+
+if __name__ == "__main__":
+    unittest.main()
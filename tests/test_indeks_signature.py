@@ -0,0 +1,90 @@
+# File: tests/test_indeks_signature.py
+# Indeks signature di memori & file sidecar-nya: penambalan setelah tambah_hash/terapkan_delta,
+# pembangunan ulang saat revisi tabel berubah, dan migrasi DB lama (hash hex TEXT).
+
+import hashlib
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from penyimpanan_indeks import buka_indeks
+from scanner_logic import Scanner
+
+def signature(isi):
+    """(md5 hex, sha256 hex, ukuran, hash_awal hex) untuk isi file `isi`."""
+    return hashlib.md5(isi).hexdigest(), hashlib.sha256(isi).hexdigest(), len(isi), hashlib.md5(isi[:4096]).hexdigest()
+
+class UjiIndeks(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(); self.addCleanup(self.tmp.cleanup)
+        self.db_path = os.path.join(self.tmp.name, "uji.db")
+
+    def scanner(self):
+        scanner = Scanner(self.db_path); conn = scanner._create_connection(); self.addCleanup(conn.close)
+        return scanner, conn
+
+    def assertCocok(self, scanner, conn, sig, cocok=True):
+        self.assertEqual(scanner._check_hash(conn, sig[0], sig[1]), cocok)
+
+    def test_tambah_hash_dan_delta_ditambal_lalu_dibuka_ulang(self):
+        a, b, c, bersih = (signature(os.urandom(n)) for n in (5000, 6000, 7000, 8000))
+        scanner, conn = self.scanner(); scanner._muat_indeks(conn)
+        self.assertTrue(scanner.tambah_hash(*a)[0]); self.assertTrue(scanner.tambah_hash(*c)[0])
+        delta = io.StringIO(f"# delta-signature versi=1 dasar=0\n+ {b[0]} {b[1]} {b[2]} {b[3]}\n- {c[1]}\n")
+        ok, statistik = scanner.terapkan_delta(delta)
+        self.assertTrue(ok, statistik); self.assertEqual((statistik["ditambahkan"], statistik["dihapus"]), (1, 1))
+        # Indeks yang sudah dimuat ditambal di tempat dan tetap sesuai revisi tabel
+        self.assertEqual(scanner._indeks.revisi, scanner._revisi_signature(conn)); self.assertIsNone(scanner.sinkronkan_indeks(conn))
+        for sig, cocok in ((a, True), (b, True), (c, False), (bersih, False)): self.assertCocok(scanner, conn, sig, cocok)
+        # Pemakai baru membangun indeks dari tabel (sidecar usang) dengan hasil yang sama
+        baru, conn_baru = self.scanner(); indeks = baru._muat_indeks(conn_baru)
+        self.assertEqual(len(indeks), 2)
+        for sig, cocok in ((a, True), (b, True), (c, False), (bersih, False)): self.assertCocok(baru, conn_baru, sig, cocok)
+        self.assertTrue(indeks.lolos_ukuran(a[2])); self.assertFalse(indeks.lolos_ukuran(bersih[2]))
+
+    def test_revisi_usang_memaksa_bangun_ulang(self):
+        a, b = signature(os.urandom(5000)), signature(os.urandom(6000))
+        scanner, conn = self.scanner(); scanner.tambah_hash(*a); scanner._muat_indeks(conn)
+        revisi_lama = buka_indeks(scanner._path_indeks()).revisi
+        # Diubah di luar Scanner (proses lain): hanya trigger revisi yang tahu
+        with conn: conn.execute("INSERT INTO signatures (md5, sha256, ukuran) VALUES (?, ?, ?)", (bytes.fromhex(b[0]), bytes.fromhex(b[1]), b[2]))
+        self.assertCocok(scanner, conn, b, False) # Indeks lama belum tahu
+        self.assertEqual(scanner.sinkronkan_indeks(conn), "dimuat ulang") # Bukan dari delta: tidak bisa ditambal
+        self.assertCocok(scanner, conn, a); self.assertCocok(scanner, conn, b)
+        sidecar = buka_indeks(scanner._path_indeks())
+        self.assertGreater(sidecar.revisi, revisi_lama); self.assertEqual(sidecar.revisi, scanner._revisi_signature(conn))
+        baru, conn_baru = self.scanner(); self.assertEqual(len(baru._muat_indeks(conn_baru)), 2)
+
+    def test_migrasi_db_lama_hex_teks(self):
+        a, b = signature(os.urandom(5000)), signature(os.urandom(6000))
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.execute("CREATE TABLE signatures (id INTEGER PRIMARY KEY AUTOINCREMENT, md5 TEXT NOT NULL UNIQUE, sha256 TEXT NOT NULL UNIQUE, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)")
+            conn.execute("CREATE INDEX idx_md5 ON signatures (md5)")
+            conn.executemany("INSERT INTO signatures (md5, sha256) VALUES (?, ?)", [(a[0], a[1]), (b[0].upper(), b[1].upper()), ("bukan-hex", "0" * 64)])
+        conn.close()
+        scanner, conn = self.scanner()
+        jenis = conn.execute("SELECT typeof(md5), typeof(sha256), ukuran FROM signatures ORDER BY id").fetchall()
+        self.assertEqual(jenis, [("blob", "blob", None)] * 2) # Baris hex rusak dibuang
+        self.assertIsNone(conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_md5'").fetchone())
+        indeks = scanner._muat_indeks(conn)
+        self.assertEqual(indeks.jumlah_tanpa_ukuran, 2); self.assertTrue(indeks.lolos_ukuran(123)) # Prefilter ukuran nonaktif
+        self.assertCocok(scanner, conn, a); self.assertCocok(scanner, conn, b); self.assertCocok(scanner, conn, signature(b"bersih"), False)
+        # Menambah ulang file virusnya melengkapi ukuran & hash_awal (sebagai BLOB) dan mengaktifkan prefilter
+        self.assertFalse(scanner.tambah_hash(*a)[0]); self.assertFalse(scanner.tambah_hash(*b)[0])
+        self.assertEqual(conn.execute("SELECT DISTINCT typeof(hash_awal) FROM signatures").fetchall(), [("blob",)])
+        self.assertEqual(indeks.jumlah_tanpa_ukuran, 0); self.assertFalse(indeks.lolos_ukuran(123))
+
+    def test_perbaikan_hash_awal_teks(self):
+        a = signature(os.urandom(5000)); self.scanner()
+        conn = sqlite3.connect(self.db_path)
+        with conn: conn.execute("INSERT INTO signatures (md5, sha256, ukuran, hash_awal) VALUES (?, ?, ?, ?)", (bytes.fromhex(a[0]), bytes.fromhex(a[1]), a[2], a[3]))
+        conn.close()
+        scanner, conn = self.scanner()
+        self.assertEqual(conn.execute("SELECT typeof(hash_awal), hash_awal FROM signatures").fetchone(), ("blob", bytes.fromhex(a[3])))
+        self.assertTrue(scanner._muat_indeks(conn).lolos_hash_awal(a[2], a[3]))
+
+if __name__ == "__main__":
+    unittest.main()